@@ -34,6 +34,7 @@ movers needs
 
 
 import sys
+import copy
 
 import numpy as np
 
@@ -130,6 +131,24 @@ class ArrayType(AddLogger):
         shape = value.shape if self.shape is None else self.shape
         return self.initialize(num, shape, value)
 
+    def split_elements(self, data, counts, fractions):
+        '''
+        split all the elements of a data array at once -- element i is
+        replaced by counts[i] elements, each with its value.
+
+        :param data: the data array, with one value per element
+        :param counts: number of elements each element becomes -- 1 for the
+            elements that are not split
+        :type counts: numpy array of int, len(counts) == len(data)
+        :param fractions: the fraction of its element's value that each new
+            element gets. Not used here -- derived classes that divide the
+            value use it.
+        :type fractions: numpy array, len(fractions) == counts.sum()
+
+        :returns: new data array of length counts.sum()
+        '''
+        return np.repeat(data, counts, axis=0)
+
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
@@ -225,6 +244,19 @@ class ArrayTypeDivideOnSplit(ArrayType):
             else:
                 return split * l_frac
 
+    def split_elements(self, data, counts, fractions):
+        '''
+        split all the elements of a data array at once -- element i is
+        replaced by counts[i] elements, and its value is divided among them
+        by fractions. See ArrayType.split_elements()
+        '''
+        split = np.repeat(data, counts, axis=0)
+
+        # one fraction per row, whatever the shape of the values
+        split *= fractions.reshape((-1,) + (1,) * (split.ndim - 1))
+
+        return split
+
 
 # SpillContainer manipulates initial_value property to initialize 'spill_num'
 # and 'element_id' properly. Referencing global ArrayType objects for this
@@ -380,3 +412,51 @@ DEFAULT_ARRAY_TYPES = ['positions',
                        ]
 
 default_array_types = {at: gat(at) for at in DEFAULT_ARRAY_TYPES}
+
+
+# The arrays that can be stored as float32, to save memory -- see the
+# float32_arrays parameter of the Model. The positions, 'mass' and the other
+# arrays that are added up for the mass balance are always float64, as are
+# the arrays passed to the C++ code, except for 'windages', which the wind
+# movers convert.
+FLOAT32_ARRAY_TYPES = ('mass_components',
+                       'evap_decay_constant',
+                       'fay_area',
+                       'frac_coverage',
+                       'oil_density',
+                       'oil_viscosity',
+                       'frac_lost',
+                       'yield_factor',
+                       'partition_coeff',
+                       'droplet_diameter',
+                       'surface_concentration',
+                       'windages',
+                       )
+
+
+def float32_array_types(array_types, names):
+    """
+    float32 versions of the ArrayTypes for the arrays in names
+
+    :param array_types: dict of the ArrayTypes used in the model run. The
+        default_array_types are used for any names that aren't in it.
+    :param names: names of the arrays to store as float32. They must be in
+        FLOAT32_ARRAY_TYPES
+
+    :returns: dict of copies of the ArrayTypes, with dtype float32, for the
+        names that are used in the run
+    """
+    f32_types = {}
+
+    for name in names:
+        if name not in FLOAT32_ARRAY_TYPES:
+            raise ValueError('{0} can not be stored as float32. Arrays that '
+                             'can be: {1}'.format(name, FLOAT32_ARRAY_TYPES))
+
+        at = array_types.get(name, default_array_types.get(name))
+        if at is not None:
+            at = copy.copy(at)
+            at.dtype = np.float32
+            f32_types[name] = at
+
+    return f32_types
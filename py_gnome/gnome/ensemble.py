@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+
+"""
+ensemble.py
+
+Run an ensemble of model runs, each with its own set of perturbed
+parameters, on a pool of worker processes.
+
+The model is saved to a save file once. Each worker loads a fresh copy of
+the model from it for every ensemble member, applies the member's
+perturbations, and runs it to the end. The per-step element data and mass
+balance of the run are written into ``multiprocessing.shared_memory``
+blocks as the run goes, a block every few steps, so only a small
+description of the blocks is pickled and sent back to the parent process.
+
+::
+
+    from gnome.ensemble import EnsembleRunner
+
+    members = [{'environment.0.speed_uncertainty_scale': 0.1 * i}
+               for i in range(200)]
+
+    with EnsembleRunner(model, workers=64) as runner:
+        results = runner.run(members)
+
+    mass = results[10].arrays['mass']
+    evaporated = results[10].mass_balance['evaporated']
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import numbers
+
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from gnome.model import Model
+
+# byte alignment of each array in a shared memory block
+_ALIGNMENT = 64
+
+# the element data of a run is written to a new shared memory block
+# each time this many bytes of it have been collected
+_BLOCK_SIZE = 2 ** 26
+
+# state of a worker process, set by _init_worker()
+_worker = {}
+
+
+def set_attributes(model, params):
+    '''
+    The default perturbation: set attributes of the model, or of the
+    objects in it.
+
+    :param params: dict of {path: value}. The path is a dotted list of
+                   attribute names, with integers used to index into the
+                   collections. For example::
+
+                       {'spills.0.amount': 2000.0,
+                        'environment.1.speed_uncertainty_scale': 0.2,
+                        'time_step': 900}
+    '''
+    for path, value in params.items():
+        obj = model
+        names = path.split('.')
+
+        for name in names[:-1]:
+            obj = obj[int(name)] if name.isdigit() else getattr(obj, name)
+
+        setattr(obj, names[-1], value)
+
+
+def set_uncertainty(model, params):
+    '''
+    A perturbation for the uncertainty combinations the ModelBroadcaster
+    runs.
+
+    :param params: dict with the optional keys 'wind_speed' and
+                   'spill_amount', each one of {'down', 'normal', 'up'}
+    '''
+    from gnome.environment import Wind
+
+    model.spills.uncertain = False
+
+    if 'wind_speed' in params:
+        for wind in [e for e in model.environment if isinstance(e, Wind)]:
+            wind.set_speed_uncertainty(params['wind_speed'])
+
+    if 'spill_amount' in params:
+        for spill in model.spills:
+            spill.set_amount_uncertainty(params['spill_amount'])
+
+
+class MemberResult(object):
+    '''
+    The results of one ensemble member
+
+    The element data of all the steps is stored end to end, the same as in
+    the files written by NetCDFOutput.
+
+    :ivar params: the perturbations of the member
+    :ivar times: list of the model times of each step
+    :ivar particle_count: number of elements in each step
+    :ivar arrays: dict of the element data arrays, for all steps
+    :ivar mass_balance: dict of arrays of the mass balance values, one per
+                        step. Values that don't exist for a step are NaN.
+    :ivar uncertain: MemberResult of the uncertain elements if the model was
+                     run with uncertainty, otherwise None
+    '''
+    def __init__(self, params, times, particle_count, arrays, mass_balance,
+                 uncertain=None):
+        self.params = params
+        self.times = times
+        self.particle_count = particle_count
+        self.arrays = arrays
+        self.mass_balance = mass_balance
+        self.uncertain = uncertain
+
+        self.offsets = np.zeros((len(particle_count) + 1,), dtype=np.int64)
+        np.cumsum(particle_count, out=self.offsets[1:])
+
+    def __len__(self):
+        'number of steps'
+        return len(self.times)
+
+    def step(self, index):
+        '''
+        the element data arrays for step index
+        '''
+        rows = slice(self.offsets[index], self.offsets[index + 1])
+
+        return {name: array[rows] for name, array in self.arrays.items()}
+
+
+def _init_worker(savefile, perturb, array_names):
+    _worker.update(savefile=savefile,
+                   perturb=perturb,
+                   array_names=array_names)
+
+
+def _run_member(member):
+    '''
+    run one member in a worker process
+
+    The data of the uncertain elements, if any, is stored under names
+    starting with 'uncertain/'.
+
+    :returns: (index, times, blocks) -- blocks is the list of the shared
+              memory blocks the data was written to -- see _BlockWriter
+    '''
+    index, params = member
+
+    model = Model.load_savefile(_worker['savefile'])
+
+    # the results come back through shared memory, so there is no need
+    # for any outputters or the cache
+    for outputter in list(model.outputters):
+        del model.outputters[outputter.id]
+    model.cache_enabled = False
+
+    _worker['perturb'](model, params)
+
+    array_names = _worker['array_names']
+    times = []
+    mass_balance = {}
+    writer = _BlockWriter()
+
+    try:
+        for _output in model:
+            times.append(model.model_time)
+
+            for sc in model.spills.items():
+                prefix = 'uncertain/' if sc.uncertain else ''
+
+                step = {prefix + 'particle_count': np.array([len(sc)],
+                                                            dtype=np.int64)}
+                for name in array_names:
+                    step[prefix + name] = sc[name].copy()
+
+                writer.append(step)
+
+                mass_balance.setdefault(prefix, []).append(
+                    {key: val for key, val in sc.mass_balance.items()
+                     if isinstance(val, numbers.Number)})
+
+        for prefix, steps in mass_balance.items():
+            writer.append({prefix + 'mass_balance/' + key:
+                           np.array([mb.get(key, np.nan) for mb in steps],
+                                    dtype=np.float64)
+                           for key in set().union(*steps)})
+
+        writer.flush()
+    except Exception:
+        writer.discard()
+        raise
+
+    return index, times, writer.blocks
+
+
+def _create_shared(size):
+    '''
+    create a shared memory block that is freed by the parent process
+
+    The resource tracker of the process that creates a block unlinks it
+    when the process exits, and warns that it leaked -- the block is
+    unregistered from it, so only the parent process is responsible for it.
+    '''
+    if sys.version_info >= (3, 13):
+        return SharedMemory(create=True, size=size, track=False)
+
+    shm = SharedMemory(create=True, size=size)
+
+    if os.name == 'posix':
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+    return shm
+
+
+def _free_shared(name):
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+
+    shm.close()
+    shm.unlink()
+
+
+class _BlockWriter(object):
+    '''
+    Collects the arrays of the steps of a run, and writes them to a new
+    shared memory block each time block_size bytes have been collected, so
+    the worker only holds one block of steps in its own memory.
+
+    The pieces of each array are written end to end, so the blocks of a run
+    can be read back into one array of each name by _read_shared().
+
+    :ivar blocks: list of (layout, name) of the blocks written -- see
+                  _write_shared()
+    '''
+    def __init__(self, block_size=_BLOCK_SIZE):
+        self.block_size = block_size
+        self.blocks = []
+
+        self._pieces = {}
+        self._nbytes = 0
+
+    def append(self, arrays):
+        '''
+        add the arrays of dict arrays to the end of the arrays of the same
+        name
+        '''
+        for name, array in arrays.items():
+            self._pieces.setdefault(name, []).append(array)
+            self._nbytes += array.nbytes
+
+        if self._nbytes >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        write the arrays collected so far to a new block
+        '''
+        if self._pieces:
+            self.blocks.append(_write_shared(self._pieces))
+
+        self._pieces = {}
+        self._nbytes = 0
+
+    def discard(self):
+        '''
+        free the blocks written so far -- for when the run fails
+        '''
+        for _layout, name in self.blocks:
+            _free_shared(name)
+
+        self.blocks = []
+        self._pieces = {}
+        self._nbytes = 0
+
+
+def _write_shared(pieces):
+    '''
+    copy arrays into a new shared memory block
+
+    :param pieces: dict of {array name: list of arrays} -- the arrays of
+                   each name are written end to end, as one array
+
+    :returns: (layout, name) -- layout is a list of
+              (array name, dtype, shape, offset) for each array, name the
+              name of the shared memory block
+    '''
+    layout = []
+    size = 0
+    for name, arrays in pieces.items():
+        shape = ((sum(len(a) for a in arrays),) + arrays[0].shape[1:])
+        dtype = arrays[0].dtype
+
+        size = -(-size // _ALIGNMENT) * _ALIGNMENT
+        layout.append((name, dtype.str, shape, size))
+        size += int(np.prod(shape)) * dtype.itemsize
+
+    shm = _create_shared(max(size, 1))
+    try:
+        for (name, dtype, shape, offset) in layout:
+            out = np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                             offset=offset)
+            start = 0
+            for array in pieces[name]:
+                out[start:start + len(array)] = array
+                start += len(array)
+
+            del out
+    except Exception:
+        shm.close()
+        shm.unlink()
+        raise
+
+    shm.close()
+
+    return layout, shm.name
+
+
+def _read_shared(blocks):
+    '''
+    copy the arrays out of the shared memory blocks written by
+    _write_shared(), joining the arrays of the same name end to end, and
+    free the blocks
+    '''
+    arrays = {}
+    try:
+        # allocate the whole of each array first, so the data is only
+        # copied once
+        lengths = {}
+        for layout, _name in blocks:
+            for (a_name, dtype, shape, _offset) in layout:
+                lengths[a_name] = lengths.get(a_name, 0) + shape[0]
+
+                if a_name not in arrays:
+                    arrays[a_name] = (dtype, shape[1:])
+
+        arrays = {a_name: np.empty((lengths[a_name],) + shape, dtype=dtype)
+                  for a_name, (dtype, shape) in arrays.items()}
+
+        starts = dict.fromkeys(arrays, 0)
+        while blocks:
+            layout, name = blocks[0]
+
+            shm = SharedMemory(name=name)
+            try:
+                for (a_name, dtype, shape, offset) in layout:
+                    start = starts[a_name]
+                    arrays[a_name][start:start + shape[0]] = \
+                        np.ndarray(shape, dtype=dtype, buffer=shm.buf,
+                                   offset=offset)
+                    starts[a_name] = start + shape[0]
+            finally:
+                shm.close()
+                shm.unlink()
+
+            blocks = blocks[1:]
+    finally:
+        # the blocks that weren't read
+        for _layout, name in blocks:
+            _free_shared(name)
+
+    return arrays
+
+
+def _member_result(params, times, arrays, prefix=''):
+    '''
+    make the MemberResult of the arrays whose names start with prefix,
+    removing them from arrays
+    '''
+    particle_count = arrays.pop(prefix + 'particle_count')
+
+    mb_prefix = prefix + 'mass_balance/'
+    mass_balance = {name[len(mb_prefix):]: arrays.pop(name)
+                    for name in list(arrays) if name.startswith(mb_prefix)}
+
+    data = {name[len(prefix):]: arrays.pop(name)
+            for name in list(arrays) if name.startswith(prefix)}
+
+    return MemberResult(params, times, particle_count, data, mass_balance)
+
+
+class EnsembleRunner(object):
+    '''
+    Runs ensembles of a model on a pool of worker processes
+
+    The pool is started the first time run() is called, and reused by later
+    calls until close() is called.
+    '''
+    def __init__(self, model, workers=None,
+                 perturb=set_attributes,
+                 array_names=('positions', 'mass', 'status_codes', 'id'),
+                 start_method=None):
+        '''
+        :param model: the model to run. It is saved when the runner is
+                      created -- later changes to it are not seen by the
+                      ensemble.
+
+        :param workers=None: number of worker processes. Defaults to
+                             os.cpu_count()
+
+        :param perturb=set_attributes: function called as
+                                       perturb(model, params) in the worker,
+                                       to apply the parameters of a member to
+                                       its copy of the model. It must be
+                                       importable (defined at the top level
+                                       of a module) so it can be sent to the
+                                       workers.
+
+        :param array_names: the element data arrays to return for each step
+
+        :param start_method=None: the multiprocessing start method for the
+                                  workers: 'fork', 'spawn' or 'forkserver'.
+                                  None uses the platform default.
+        '''
+        self.workers = os.cpu_count() if workers is None else workers
+        self.perturb = perturb
+        self.array_names = tuple(array_names)
+        self.start_method = start_method
+
+        self._pool = None
+        self._save_dir = tempfile.mkdtemp(prefix='gnome_ensemble_')
+        self.savefile = os.path.join(self._save_dir, 'ensemble_model.gnome')
+
+        model.save(self.savefile)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _get_pool(self):
+        if self._pool is None:
+            context = get_context(self.start_method)
+            self._pool = context.Pool(self.workers,
+                                      initializer=_init_worker,
+                                      initargs=(self.savefile,
+                                                self.perturb,
+                                                self.array_names))
+
+        return self._pool
+
+    def run(self, members):
+        '''
+        Run the ensemble
+
+        :param members: sequence of the parameters of each member -- each
+                        one is passed to the perturb function.
+
+        :returns: list of a MemberResult for each member, in the same order
+                  as members
+        '''
+        members = list(members)
+        results = [None] * len(members)
+
+        # members are handed out one at a time, so the workers stay busy
+        # even if the runs take different times
+        for index, times, blocks in \
+                self._get_pool().imap_unordered(_run_member,
+                                                enumerate(members)):
+            arrays = _read_shared(blocks)
+
+            if 'uncertain/particle_count' in arrays:
+                uncertain = _member_result(members[index], times, arrays,
+                                           'uncertain/')
+            else:
+                uncertain = None
+
+            results[index] = _member_result(members[index], times, arrays)
+            results[index].uncertain = uncertain
+
+        return results
+
+    def close(self):
+        '''
+        stop the worker processes and remove the save file
+        '''
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+        shutil.rmtree(self._save_dir, ignore_errors=True)
@@ -2,6 +2,8 @@
 import os
 import datetime
 import copy
+import hashlib
+import inspect
 import numpy as np
 # import logging
 import warnings
@@ -25,6 +27,43 @@ from gnome.persist.extend_colander import LocalDateTime
 from gnome.utilities.inf_datetime import InfDateTime
 
 
+# (hash passed down from at(), points hash) of the last lookup --
+# see Variable._get_xy_hash()
+_xy_hash_memo = [None, None]
+
+# {grid class: whether it memoizes on a _hash} -- see _grid_memo_supported()
+_grid_memo_support = {}
+
+
+def _grid_memo_supported(grid):
+    '''
+    Whether interpolate_var_to_points() of the grid takes the _hash and
+    _memo keywords, which Variable._xy_interp() uses to memoize the cell
+    search on the points alone.
+
+    They are private to gridded (written against gridded 0.3), so this is
+    checked rather than assumed.
+    '''
+    grid_type = type(grid)
+
+    try:
+        return _grid_memo_support[grid_type]
+    except KeyError:
+        pass
+
+    try:
+        params = inspect.signature(grid_type.interpolate_var_to_points
+                                   ).parameters
+    except (AttributeError, TypeError, ValueError):
+        supported = False
+    else:
+        supported = '_hash' in params and '_memo' in params
+
+    _grid_memo_support[grid_type] = supported
+
+    return supported
+
+
 class TimeSchema(base_schema.ObjTypeSchema):
     filename = FilenameSchema(
         isdatafile=True, test_equal=False, update=False
@@ -624,6 +663,58 @@ class Variable(gridded.Variable, GnomeId):
                     raise
         return value
 
+    @staticmethod
+    def _get_xy_hash(points, _hash=None):
+        """
+        The key the grid memoizes the cell locations and interpolation alphas
+        of points under.
+
+        These only depend on the horizontal positions, not the time, so the
+        key leaves the time out: queries at the same positions at other times
+        (the other time slice, the next RK stage, or a weatherer sampling
+        where a mover already looked) skip the cell search.
+
+        The key is a hash of the positions made here, so it doesn't depend on
+        what gridded puts in its own hashes.
+
+        :param _hash=None: the hash passed down from at(). It is only
+                           compared with the last one, so the points are
+                           hashed once per at(), not for every time slice
+                           and variable.
+        """
+        if _hash is not None and _hash == _xy_hash_memo[0]:
+            return _xy_hash_memo[1]
+
+        xy = np.ascontiguousarray(points[:, 0:2])
+        xy_hash = ('xy', xy.shape, xy.dtype.str, hashlib.sha1(xy).hexdigest())
+
+        if _hash is not None:
+            _xy_hash_memo[:] = [_hash, xy_hash]
+
+        return xy_hash
+
+    def _xy_interp(self, points, time, extrapolate, slices=(), **kwargs):
+        """
+        Interpolate the data to the points for the time and depth given by
+        slices -- memoizing the cell search on the points alone (see
+        _get_xy_hash)
+
+        If the grid's interpolate_var_to_points() doesn't take the _hash and
+        _memo keywords, gridded's own _xy_interp() is used.
+        """
+        if not _grid_memo_supported(self.grid):
+            return super(Variable, self)._xy_interp(points, time, extrapolate,
+                                                    slices=slices, **kwargs)
+
+        _hash = self._get_xy_hash(points, kwargs.get('_hash'))
+
+        return self.grid.interpolate_var_to_points(points[:, 0:2],
+                                                   self.data,
+                                                   location=self.location,
+                                                   _hash=_hash,
+                                                   slices=slices,
+                                                   _memo=True)
+
     @classmethod
     @combine_signatures
     def new_from_dict(cls, dict_):
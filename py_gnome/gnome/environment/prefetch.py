@@ -0,0 +1,419 @@
+"""
+prefetch.py
+
+Background prefetching of the time slices of netCDF-backed gridded
+variables.
+
+Gridded variables (GridCurrent, GridWind, GridTemperature, ...) read the
+time slices of their data from the netCDF file as the model time moves
+into each new time interval, so the model waits on the disk (and
+decompression) during the step. A TimeSlicePrefetcher knows the times the
+model will ask for, and reads the next few slices of each variable in a
+background thread, while the model is busy with the current step.
+
+It is used by the Model when ``prefetch_time_slices`` is set, or can be
+used directly::
+
+    prefetcher = TimeSlicePrefetcher(gridded_variables(model.environment),
+                                     model.start_time, model.time_step,
+                                     model.duration, num_slices=2)
+    prefetcher.start()
+    ...  # run the model
+    prefetcher.stop()
+    print(prefetcher.hits, prefetcher.misses)
+
+netCDF is not thread safe, so the background thread reads from its own
+handles of the files, opened when the prefetcher is started -- the model
+goes on reading the grid, depths and other variables of its own handles
+while the slices are read. Variables whose file can't be opened again are
+not read ahead. All reads of the prefetched variables, through either
+handle, are also done holding the prefetcher's lock.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import netCDF4
+
+from gnome.gnomeobject import GnomeId
+from .gridded_objects_base import Variable
+
+
+def gridded_variables(objs):
+    '''
+    Find the gridded Variables with data that has not been loaded into
+    memory in objs, and in all the objects they refer to -- e.g. the u and v
+    Variables of a GridCurrent
+
+    :param objs: sequence of gnome objects -- e.g. model.environment
+
+    :returns: list of Variables
+    '''
+    found = []
+    seen = set()
+    stack = list(objs)
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if (isinstance(obj, Variable) and
+                not isinstance(obj.data, (np.ndarray, PrefetchedData))):
+            found.append(obj)
+
+        for val in vars(obj).values():
+            if isinstance(val, GnomeId):
+                stack.append(val)
+            elif isinstance(val, (list, tuple)):
+                stack.extend(v for v in val if isinstance(v, GnomeId))
+
+    return found
+
+
+def _split_time_index(key):
+    '''
+    split a __getitem__ key into the integer time index, and the rest of
+    the key
+
+    :returns: (time index, rest) or (None, key) if the key doesn't start
+              with an integer.
+    '''
+    if isinstance(key, tuple):
+        if len(key) == 0:
+            return None, key
+        first, rest = key[0], key[1:]
+    else:
+        first, rest = key, ()
+
+    if (isinstance(first, (int, np.integer)) and
+            not isinstance(first, (bool, np.bool_))):
+        return int(first), rest
+    else:
+        return None, key
+
+
+class PrefetchedData(object):
+    '''
+    Stands in for the netCDF variable of a gridded Variable while a
+    TimeSlicePrefetcher is running.
+
+    Reads of a time slice -- data[t] or data[t, ...] -- come from the
+    prefetcher's slice cache, anything else from the netCDF variable.
+    Other attributes are those of the netCDF variable.
+
+    :ivar own_data: the same netCDF variable, from the background thread's
+                    own handle of the file -- None if the file couldn't be
+                    opened again, in which case the slices are only read
+                    when the model asks for them.
+    '''
+    def __init__(self, data, plan, prefetcher, own_data=None):
+        '''
+        :param data: the netCDF variable
+        :param plan: the time indexes the model will use, in order
+        :param prefetcher: the TimeSlicePrefetcher
+        :param own_data=None: the netCDF variable for the background thread
+                              to read from
+        '''
+        self._data = data
+        self._prefetcher = prefetcher
+        self.own_data = own_data
+
+        self.plan = plan
+        self._plan_index = {t: i for i, t in enumerate(plan)}
+
+        # position in the plan of the latest slice used
+        self.position = 0
+        self.slices = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        with self._prefetcher.lock:
+            return getattr(self._data, name)
+
+    def __len__(self):
+        with self._prefetcher.lock:
+            return len(self._data)
+
+    def __getitem__(self, key):
+        t, rest = _split_time_index(key)
+
+        if t is None:
+            with self._prefetcher.lock:
+                return self._data[key]
+
+        if t < 0:
+            t += self._data.shape[0]
+
+        # a copy, so callers can't change the cached slice
+        return self._prefetcher.get_slice(self, t)[rest].copy()
+
+
+class TimeSlicePrefetcher(object):
+    '''
+    Reads the time slices of gridded variables ahead of the model, in a
+    background thread.
+    '''
+    def __init__(self, variables, start_time, time_step, duration,
+                 num_slices=2):
+        '''
+        :param variables: the gridded Variables -- see gridded_variables().
+                          Variables that don't vary in time are not
+                          prefetched.
+
+        :param start_time: start time of the model run
+        :param time_step: model time step in seconds
+        :param duration: duration of the model run, a timedelta
+
+        :param num_slices=2: number of slices of each variable to read ahead
+                             of the one the model is using. At most
+                             num_slices + 2 slices of each variable are
+                             kept in memory.
+        '''
+        self.num_slices = num_slices
+
+        # held for every read of the netCDF variables
+        self.lock = threading.RLock()
+
+        # guards the slice caches, and wakes up the background thread
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+        # the model asks for data at each step, and half way through
+        # each step (RK4)
+        num_times = int(duration.total_seconds() // time_step) + 1
+        model_times = [start_time + timedelta(seconds=time_step * i / 2.)
+                       for i in range(2 * num_times - 1)]
+
+        # gnome objects aren't hashable, so these are parallel lists
+        self.variables = []
+        self._plans = []
+        for var in variables:
+            plan = self._plan(var, model_times)
+            if plan is not None:
+                self.variables.append(var)
+                self._plans.append(plan)
+
+        self._proxies = []
+        # the datasets opened for the background thread
+        self._datasets = []
+
+    @staticmethod
+    def _plan(var, model_times):
+        '''
+        the time indexes of var needed at model_times, in order
+
+        :returns: list of indexes, or None if var doesn't vary in time
+        '''
+        if var.time is None or len(var.time.data) < 2:
+            return None
+
+        times = np.asarray(var.time.data, dtype='datetime64[us]')
+        if len(var.data.shape) == 0 or var.data.shape[0] != len(times):
+            # time isn't the first dimension
+            return None
+
+        plan = []
+        for t in np.asarray(model_times, dtype='datetime64[us]'):
+            i = np.searchsorted(times, t)
+
+            if i < len(times) and times[i] == t:
+                needed = (i,)
+            else:
+                needed = (i - 1, i)
+
+            for t_idx in needed:
+                t_idx = min(max(int(t_idx), 0), len(times) - 1)
+                if not plan or t_idx > plan[-1]:
+                    plan.append(t_idx)
+
+        return plan
+
+    @property
+    def hits(self):
+        'number of slices that were already read when the model needed them'
+        return sum(p.hits for p in self._proxies)
+
+    @property
+    def misses(self):
+        'number of slices the model had to wait to read'
+        return sum(p.misses for p in self._proxies)
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        '''
+        Put the variables' data behind slice caches, and start reading them
+        '''
+        if self.running:
+            return
+
+        self._proxies = []
+        for var, plan in zip(self.variables, self._plans):
+            proxy = PrefetchedData(var.data, plan, self,
+                                   own_data=self._open_own(var.data))
+            var.data = proxy
+            self._proxies.append(proxy)
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='TimeSlicePrefetcher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''
+        Stop the background thread, and give the variables back their
+        netCDF data
+
+        The hit and miss counts are kept.
+        '''
+        if not self.running:
+            return
+
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+
+        self._thread.join()
+        self._thread = None
+
+        for var, proxy in zip(self.variables, self._proxies):
+            var.data = proxy._data
+            proxy.own_data = None
+            proxy.slices.clear()
+
+        datasets = self._datasets
+        self._datasets = []
+        for dataset in datasets:
+            dataset.close()
+
+    def _open_own(self, data):
+        '''
+        open the file of netCDF variable data again, for the background
+        thread to read from
+
+        :returns: the variable in the new handle, or None if data isn't a
+                  variable of a single netCDF file
+        '''
+        try:
+            group = data.group()
+            filepath = group.filepath()
+        except (AttributeError, ValueError):
+            return None
+
+        try:
+            dataset = netCDF4.Dataset(filepath)
+        except OSError:
+            return None
+
+        try:
+            own = dataset[group.path] if group.path != '/' else dataset
+            own = own.variables[data.name]
+
+            # read the same way as the model's variable
+            own.set_auto_mask(data.mask)
+            own.set_auto_scale(data.scale)
+            own.set_always_mask(data.always_mask)
+            own.set_auto_chartostring(data.chartostring)
+        except (AttributeError, IndexError, KeyError):
+            dataset.close()
+            return None
+
+        self._datasets.append(dataset)
+
+        return own
+
+    def get_slice(self, proxy, t):
+        '''
+        time slice t of proxy's data -- from the cache if it has been read
+        '''
+        with self._cond:
+            arr = proxy.slices.get(t)
+
+            if t in proxy._plan_index:
+                position = proxy._plan_index[t]
+                if position > proxy.position:
+                    proxy.position = position
+                    self._evict(proxy)
+                    self._cond.notify()
+
+        if arr is not None:
+            proxy.hits += 1
+        else:
+            proxy.misses += 1
+            arr = self._read(proxy, t)
+
+            with self._cond:
+                self._store(proxy, t, arr)
+
+        return arr
+
+    def _read(self, proxy, t, own=False):
+        '''
+        read slice t of proxy's data -- from the background thread's handle
+        if own is True
+        '''
+        with self.lock:
+            if own:
+                return proxy.own_data[t]
+            else:
+                return proxy._data[t]
+
+    def _window(self, proxy):
+        'the part of the plan that is kept in the cache'
+        start = max(proxy.position - 1, 0)
+
+        return proxy.plan[start:proxy.position + self.num_slices + 1]
+
+    def _store(self, proxy, t, arr):
+        proxy.slices[t] = arr
+        self._evict(proxy)
+
+    def _evict(self, proxy):
+        window = set(self._window(proxy))
+
+        for t in [t for t in proxy.slices if t not in window]:
+            del proxy.slices[t]
+
+        while len(proxy.slices) > self.num_slices + 2:
+            proxy.slices.popitem(last=False)
+
+    def _next_read(self):
+        'the next (proxy, time index) to read, or None'
+        for proxy in self._proxies:
+            if proxy.own_data is None:
+                continue
+
+            for t in self._window(proxy):
+                if t not in proxy.slices:
+                    return proxy, t
+
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+
+                todo = self._next_read()
+                if todo is None:
+                    # wait for the model to move on
+                    self._cond.wait()
+                    continue
+
+            proxy, t = todo
+            arr = self._read(proxy, t, own=True)
+
+            with self._cond:
+                if t in self._window(proxy):
+                    self._store(proxy, t, arr)
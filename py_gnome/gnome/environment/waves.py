@@ -114,7 +114,7 @@ class Waves(Environment):
         else:
             return InfTime()
 
-    def get_value(self, points, time):
+    def get_value(self, points, time, samples=None):
         """
         return the rms wave height, peak period and percent wave breaking
         at a given time. Does not currently support location-variable waves.
@@ -122,6 +122,10 @@ class Waves(Environment):
         :param time: the time you want the wave data for
         :type time: datetime.datetime object
 
+        :param samples=None: the spill container's EnvironmentSamples. If
+                             given, the values are computed once for all
+                             the weatherers that ask for them.
+
         :returns: wave_height, peak_period, whitecap_fraction,
                   dissipation_energy
 
@@ -131,16 +135,24 @@ class Waves(Environment):
           whitecap_fraction: unit-less fraction
           dissipation_energy: not sure!! # fixme!
         """
+        if samples is not None:
+            return samples.get(('waves', id(self)), points, time,
+                               lambda: self._compute_value(points, time,
+                                                           samples))
+
+        return self._compute_value(points, time)
+
+    def _compute_value(self, points, time, samples=None):
         # make sure are we are up to date with water object
         wave_height = self.water.get('wave_height')
 
         if wave_height is None:
             # only need velocity
-            U = self.get_wind_speed(points, time)
+            U = self.get_wind_speed(points, time, samples=samples)
             H = self.compute_H(U)
         else:
             # user specified a wave height
-            U = self.get_wind_speed(points, time)
+            U = self.get_wind_speed(points, time, samples=samples)
             H = np.full_like(U, wave_height)
             #H = wave_height
             U = self.pseudo_wind(H)	#significant wave height used for pseudo wind
@@ -154,10 +166,21 @@ class Waves(Environment):
         return H, T, Wf, De
 
     def get_wind_speed(self, points, model_time,
-                       coord_sys='r', fill_value=1.0):
+                       coord_sys='r', fill_value=1.0, samples=None):
         '''
         Wrapper for the weatherers so they can extrapolate
+
+        If samples (an EnvironmentSamples) is given, the wind speed is
+        shared with the weatherers that use the same wind.
         '''
+        if samples is not None:
+            return samples.get(('wind_speed', id(self.wind),
+                                coord_sys, fill_value),
+                               points, model_time,
+                               lambda: self.get_wind_speed(points, model_time,
+                                                           coord_sys,
+                                                           fill_value))
+
         retval = self.wind.at(points, model_time, coord_sys=coord_sys)
 
         if isinstance(retval, np.ma.MaskedArray):
@@ -165,7 +188,7 @@ class Waves(Environment):
         else:
             return retval
 
-    def get_emulsification_wind(self, points, time):
+    def get_emulsification_wind(self, points, time, samples=None):
         """
         Return the right wind for the wave climate
 
@@ -183,7 +206,8 @@ class Waves(Environment):
                given by the user for dispersion, why not for emulsification?
         """
         wave_height = self.water.get('wave_height')
-        U = self.get_wind_speed(points, time)  # only need velocity
+        # only need velocity
+        U = self.get_wind_speed(points, time, samples=samples)
 
         if wave_height is None:
             return U
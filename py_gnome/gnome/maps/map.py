@@ -49,8 +49,10 @@ from gnome.utilities.file_tools import haz_files
 # from gnome.utilities.file_tools.osgeo_helpers import (ogr_open_file)
 
 from gnome.utilities.geometry.polygons import PolygonSet
+from gnome.utilities.geometry.BBox import asBBox
 from gnome.utilities.geometry import points_in_poly, point_in_poly
 from gnome.utilities.appearance import AppearanceSchema
+from gnome.maps.raster_cache import RasterCache, get_raster_cache
 
 from gnome.cy_gnome.cy_land_check import check_land_layers, move_particles
 from gnome.persist import base_schema
@@ -694,10 +696,15 @@ class RasterMap(GnomeMap):
 
     land_flag = 1
 
+    # directory for the optional on-disk raster cache
+    # see gnome.maps.raster_cache
+    raster_cache_dir = None
+
     def __init__(self,
                  raster=None,
                  projection=None,
                  refloat_halflife=1,
+                 layers=None,
                  **kwargs):
         """
         create a new RasterMap
@@ -713,6 +720,11 @@ class RasterMap(GnomeMap):
                            lat-long to pixels in the array
         :type projection: :class:`gnome.map_canvas.Projection`
 
+        :param layers=None: The coarser versions of the raster, as built by
+                            build_coarser_rasters() -- not including the raster
+                            itself. If None, they will be built.
+        :type layers: list of numpy arrays of type uint8
+
         Optional arguments (kwargs)
 
         :param refloat_halflife: The halflife for refloating off land
@@ -739,7 +751,7 @@ class RasterMap(GnomeMap):
         if raster is None:
             self.raster = np.zeros((1024, 1024))
         else:
-            self.raster = np.ascontiguousarray(raster)
+            self._set_raster(raster, layers)
 
         self.projection = projection
 
@@ -767,23 +779,8 @@ class RasterMap(GnomeMap):
         then land was hit.
         """
         self.logger.info('generating coarser rasters')
-        self.layers = []
-        base_w = self.raster.shape[0]
-        base_h = self.raster.shape[1]
-
-        for ratio in self.ratios[:-1]:
-            genned_layer = np.zeros((int(math.ceil(float(base_w) / ratio)),
-                                     int(math.ceil(float(base_h) / ratio))),
-                                    dtype=np.uint8, order='C')
-
-            for j in range(0, genned_layer.shape[1]):
-                for i in range(0, genned_layer.shape[0]):
-                    genned_layer[i, j] = np.any(self.raster[
-                                                i * ratio:(i + 1) * ratio,
-                                                j * ratio:(j + 1) * ratio
-                                                ])
-
-            self.layers.append(genned_layer)
+        self.layers = [coarsen_raster(self.raster, ratio)
+                       for ratio in self.ratios[:-1]]
 
         self.layers.append(self.raster)
         # self.layers = np.array(self.layers)
@@ -806,6 +803,13 @@ class RasterMap(GnomeMap):
 
     @raster.setter
     def raster(self, arr):
+        self._set_raster(arr)
+
+    def _set_raster(self, arr, layers=None):
+        '''
+        set the raster, and the coarser layers -- they are built if not
+        passed in
+        '''
         if arr.size > 16000000:
             self._ratios = np.array((128, 32, 1,), dtype=np.int32)
         elif arr.size > 1000000:
@@ -814,7 +818,71 @@ class RasterMap(GnomeMap):
             self._ratios = np.array((16, 1,), dtype=np.int32)
 
         self._raster = np.ascontiguousarray(arr)
-        self.build_coarser_rasters()
+
+        if layers is None or len(layers) != len(self._ratios) - 1:
+            self.build_coarser_rasters()
+        else:
+            self.layers = list(layers) + [self._raster]
+
+    @property
+    def land_polys(self):
+        '''
+        The land polygons. A map loaded from the raster cache does not read
+        them from its file until they are needed -- subclasses that do that
+        set _land_polys to None, and define _read_polygons().
+        '''
+        if self._land_polys is None:
+            self._land_polys = self._read_polygons()[0]
+
+        return self._land_polys
+
+    @land_polys.setter
+    def land_polys(self, polys):
+        GnomeMap.land_polys.fset(self, polys)
+
+    def _raster_cache_key(self):
+        '''
+        key for this map in the raster cache, or None if it can't be cached
+        -- subclasses that build their raster from a file define this.
+        '''
+        return None
+
+    def _raster_cache_polygons(self):
+        '''
+        the polygons to save in the raster cache with the raster, so they
+        don't need to be read from the file when the map is loaded from the
+        cache -- a JSON serializable dict.
+        '''
+        return None
+
+    def _load_cached_raster(self):
+        '''
+        Get the raster, projection, layers and polygons from the raster
+        cache, if it is turned on.
+
+        :returns: (raster, projection, layers, polygons), or None if not in
+                  the cache
+        '''
+        raster_cache = get_raster_cache(self.raster_cache_dir)
+        key = self._raster_cache_key()
+
+        if raster_cache is None or key is None:
+            return None
+        else:
+            return raster_cache.load(key)
+
+    def _save_cached_raster(self):
+        '''
+        Save the raster, projection, layers and polygons to the raster cache,
+        if it is turned on.
+        '''
+        raster_cache = get_raster_cache(self.raster_cache_dir)
+        key = self._raster_cache_key()
+
+        if raster_cache is not None and key is not None:
+            raster_cache.save(key, self.raster, self.projection,
+                              self.layers[:-1],
+                              self._raster_cache_polygons())
 
     @property
     def refloat_halflife(self):
@@ -1077,6 +1145,38 @@ class RasterMap(GnomeMap):
         return self.projection.to_pixel(coords)
 
 
+def coarsen_raster(raster, ratio):
+    """
+    Builds a coarser version of a land raster: each (ratio x ratio) block of
+    cells in the input becomes one cell, which is 1 if any of the cells in
+    the block are non-zero, and 0 otherwise.
+
+    If the raster is not a multiple of ratio in size, the blocks on the
+    far edges are partial -- the same as padding the raster with water.
+
+    :param raster: (W, H) numpy array
+    :param ratio: number of cells on a side of each block
+
+    :return: (ceil(W / ratio), ceil(H / ratio)) C-contiguous array of uint8
+    """
+    ratio = int(ratio)
+    base_w, base_h = raster.shape
+    coarse_w = int(math.ceil(float(base_w) / ratio))
+    coarse_h = int(math.ceil(float(base_h) / ratio))
+
+    if (coarse_w * ratio, coarse_h * ratio) != (base_w, base_h):
+        # pad with water, so it can be split evenly into blocks
+        padded = np.zeros((coarse_w * ratio, coarse_h * ratio),
+                          dtype=raster.dtype)
+        padded[:base_w, :base_h] = raster
+        raster = padded
+
+    # a view with the blocks on axes 1 and 3 -- no copy made
+    blocks = raster.reshape(coarse_w, ratio, coarse_h, ratio)
+
+    return np.ascontiguousarray(blocks.any(axis=(1, 3)), dtype=np.uint8)
+
+
 def ShiftLon360(points):
     try:
         points[points[:,0]<0,0] = points[:,0]+360
@@ -1105,6 +1205,7 @@ class MapFromBNA(RasterMap):
                  map_bounds=None,
                  spillable_area=None,
                  shift_lons=0,
+                 raster_cache_dir=None,
                  **kwargs):
         """
         Creates a RasterMap from a data file.
@@ -1124,6 +1225,13 @@ class MapFromBNA(RasterMap):
                           180, or 360 are valid inputs
         :type shiftLons: integer
 
+        :param raster_cache_dir=None: directory to cache the rasterized map
+                                      in, so it does not need to be re-drawn
+                                      the next time the same map is built. If
+                                      None, the default set with
+                                      gnome.maps.raster_cache
+                                      .set_default_cache_dir() is used, if any.
+
         Optional arguments (kwargs):
 
         :param refloat_halflife: the half-life (in hours) for the re-floating.
@@ -1140,49 +1248,51 @@ class MapFromBNA(RasterMap):
         self.filename = filename
         self._raster_size = raster_size
         self.shift_lons = shift_lons
-
-        # fixme: do some file type checking here.
-        polygons = haz_files.ReadBNA(filename, 'PolygonSet')
+        self.raster_cache_dir = raster_cache_dir
+        self._map_bounds_arg = map_bounds
 
         if kwargs.get('name', False):
             self.name = os.path.split(filename)[1]
 
-        # find the spillable area and map bounds:
-        # and create a new polygonset without them
-        #  fixme -- adding a "pop" method to PolygonSet might be better
-        #      or a gnome_map_data object...
-
-        land_polys = PolygonSet()  # and lakes....
-        spillable_area_bna = PolygonSet()
-
-        #add if based on input param
         tf = ShiftLon360 if shift_lons == 360 else ShiftLon180 if shift_lons == 180 else None
-        if tf is not None:
-            polygons.TransformData(tf)
-            if map_bounds:
-                map_bounds = tf(np.array(map_bounds)).tolist()
-
-        for p in polygons:
-            if p.metadata[1].lower().replace(' ', '') == 'spillablearea':
-                spillable_area_bna.append(p)
-
-            elif p.metadata[1].lower().replace(' ', '') == 'mapbounds':
-                if map_bounds is not None:
-                    warnings.warn('Provided map bounds superscede map bounds found in file. Please double check.')
-                else:
-                    map_bounds = p
+        if tf is not None and map_bounds:
+            map_bounds = tf(np.array(map_bounds)).tolist()
+
+        # a cached raster comes with what is needed from the file, so the
+        # file is only read if the land polygons are asked for
+        cached = self._load_cached_raster()
+        if cached is not None:
+            raster, projection, layers, polygons = cached
+
+            land_polys = None
+            BB = asBBox(polygons['land_bounds'])
+            file_map_bounds = polygons['map_bounds']
+            spillable_area_bna = self._polygon_set_from_points(
+                polygons['spillable_area'])
+        else:
+            land_polys, spillable_area_bna, file_map_bounds = self._read_polygons()
+
+            # Draw the raster map with a map_canvas:
+            # determine the size:
+            BB = land_polys.bounding_box
+
+            # get the raster as a numpy array:
+            raster, projection = self.build_raster(land_polys, BB)
+            layers = None
+
+        self._file_polygons = {
+            'land_bounds': np.asarray(BB).tolist(),
+            'map_bounds': (None if file_map_bounds is None
+                           else np.asarray(file_map_bounds).tolist()),
+            'spillable_area': [np.asarray(p).tolist()
+                               for p in spillable_area_bna],
+        }
+
+        if file_map_bounds is not None:
+            if map_bounds is not None:
+                warnings.warn('Provided map bounds superscede map bounds found in file. Please double check.')
             else:
-                #  Fixme: we could do something with the polylines....
-                if len(p) > 2:
-                    land_polys.append(p)
-                else:
-                    self.logger.debug("invalid polygon ignored:"
-                                      "{} points: {}, ".format(len(p), p.metadata))
-
-
-        # Draw the raster map with a map_canvas:
-        # determine the size:
-        BB = land_polys.bounding_box
+                map_bounds = file_map_bounds
 
         if not spillable_area:  # not passed in
             # use the one in the bna
@@ -1201,18 +1311,76 @@ class MapFromBNA(RasterMap):
             else:
                 map_bounds = BB.AsPoly()
 
-        # get the raster as a numpy array:
-        raster, projection = self.build_raster(land_polys, BB)
-
         super(MapFromBNA, self).__init__(
             raster=raster,
             projection=projection,
+            layers=layers,
             map_bounds=map_bounds,
             spillable_area=spillable_area,
             land_polys=land_polys,
             **kwargs)
+
+        if cached is None:
+            self._save_cached_raster()
+        else:
+            # read from the file when they are needed
+            self._land_polys = None
+
         return None
 
+    def _read_polygons(self):
+        '''
+        Read the polygons from the file, shifted to shift_lons
+
+        :returns: (land_polys, spillable_area, map_bounds) -- the map
+                  bounds are None if they are not in the file
+        '''
+        # fixme: do some file type checking here.
+        polygons = haz_files.ReadBNA(self.filename, 'PolygonSet')
+
+        # find the spillable area and map bounds:
+        # and create a new polygonset without them
+        #  fixme -- adding a "pop" method to PolygonSet might be better
+        #      or a gnome_map_data object...
+
+        land_polys = PolygonSet()  # and lakes....
+        spillable_area = PolygonSet()
+        map_bounds = None
+
+        #add if based on input param
+        tf = ShiftLon360 if self.shift_lons == 360 else ShiftLon180 if self.shift_lons == 180 else None
+        if tf is not None:
+            polygons.TransformData(tf)
+
+        for p in polygons:
+            if p.metadata[1].lower().replace(' ', '') == 'spillablearea':
+                spillable_area.append(p)
+
+            elif p.metadata[1].lower().replace(' ', '') == 'mapbounds':
+                map_bounds = p
+            else:
+                #  Fixme: we could do something with the polylines....
+                if len(p) > 2:
+                    land_polys.append(p)
+                else:
+                    self.logger.debug("invalid polygon ignored:"
+                                      "{} points: {}, ".format(len(p), p.metadata))
+
+        return land_polys, spillable_area, map_bounds
+
+    def _raster_cache_key(self):
+        '''
+        key for this map in the raster cache -- changes if the file or any of
+        the parameters used to build the raster change
+        '''
+        return RasterCache.make_key(self.filename,
+                                   map_type='MapFromBNA',
+                                   raster_size=self.raster_size,
+                                   shift_lons=self.shift_lons,
+                                   map_bounds=self._map_bounds_arg)
+
+    def _raster_cache_polygons(self):
+        return self._file_polygons
 
     def build_raster(self, land_polys=None, BB=None):
         """
@@ -1280,8 +1448,15 @@ class MapFromBNA(RasterMap):
     def raster_size(self, size):
         if size != self._raster_size:
             self._raster_size = size
-            #should trigger base class to recreate coarser rasters
-            self.raster, self.projection = self.build_raster()
+
+            cached = self._load_cached_raster()
+            if cached is None:
+                #should trigger base class to recreate coarser rasters
+                self.raster, self.projection = self.build_raster()
+                self._save_cached_raster()
+            else:
+                raster, self.projection, layers, _polygons = cached
+                self._set_raster(raster, layers)
 
     def to_geojson(self):
         """
@@ -1341,7 +1516,11 @@ class MapFromUGrid(RasterMap):
     """
     _schema = MapFromUGridSchema
 
-    def __init__(self, filename, raster_size=1024 * 1024, **kwargs):
+    def __init__(self,
+                 filename,
+                 raster_size=1024 * 1024,
+                 raster_cache_dir=None,
+                 **kwargs):
         """
         Creates a GnomeMap (specifically a RasterMap) from a netcdf
         data file with a triangular mesh grid in it.
@@ -1359,6 +1538,13 @@ class MapFromUGrid(RasterMap):
                             aspect ratio of the bounding box of the land
         :type raster_size: integer
 
+        :param raster_cache_dir=None: directory to cache the rasterized map
+                                      in, so it does not need to be re-drawn
+                                      the next time the same map is built. If
+                                      None, the default set with
+                                      gnome.maps.raster_cache
+                                      .set_default_cache_dir() is used, if any.
+
         Optional arguments (kwargs):
 
         :param map_bounds: The polygon bounding the map -- could be larger or
@@ -1371,33 +1557,40 @@ class MapFromUGrid(RasterMap):
         :type id: string
         """
         self.filename = filename
+        self.raster_size = raster_size
+        self.raster_cache_dir = raster_cache_dir
 
-        grid = PyGrid.from_netCDF(filename)
-
-        polygons = haz_files.ReadBNA(filename, 'PolygonSet')
-        map_bounds = None
         self.name = kwargs.pop('name', os.path.split(filename)[1])
+        self._map_bounds_arg = kwargs.get('map_bounds', None)
+
+        # a cached raster comes with what is needed from the file, so the
+        # file is only read if the land polygons are asked for
+        cached = self._load_cached_raster()
+        if cached is not None:
+            raster_array, projection, layers, polygons = cached
+
+            land_polys = None
+            BB = asBBox(polygons['land_bounds'])
+            map_bounds = polygons['map_bounds']
+            spillable_area = self._polygon_set_from_points(
+                polygons['spillable_area'])
+        else:
+            grid = PyGrid.from_netCDF(filename)
 
-        # find the spillable area and map bounds:
-        # and create a new polygonset without them
-        #  fixme -- adding a "pop" method to PolygonSet might be better
-        #      or a gnome_map_data object...
+            land_polys, spillable_area, map_bounds = self._read_polygons()
 
-        land_polys = PolygonSet()  # and lakes....
-        spillable_area = PolygonSet()
+            # now draw the raster map with a map_canvas:
+            # determine the size:
 
-        for p in polygons:
-            if p.metadata[1].lower() == 'spillablearea':
-                spillable_area.append(p)
-            elif p.metadata[1].lower() == 'map bounds':
-                map_bounds = p
-            else:
-                land_polys.append(p)
-
-        # now draw the raster map with a map_canvas:
-        # determine the size:
+            BB = land_polys.bounding_box
 
-        BB = land_polys.bounding_box
+        self._file_polygons = {
+            'land_bounds': np.asarray(BB).tolist(),
+            'map_bounds': (None if map_bounds is None
+                           else np.asarray(map_bounds).tolist()),
+            'spillable_area': [np.asarray(p).tolist()
+                               for p in spillable_area],
+        }
 
         # create spillable area and  bounds if they weren't in the BNA
         if map_bounds is None:
@@ -1416,6 +1609,19 @@ class MapFromUGrid(RasterMap):
 
         map_bounds = kwargs.pop('map_bounds', map_bounds)
 
+        if cached is not None:
+            RasterMap.__init__(self, raster_array, projection,
+                               layers=layers,
+                               map_bounds=map_bounds,
+                               spillable_area=spillable_area,
+                               land_polys=land_polys,
+                               **kwargs)
+
+            # read from the file when they are needed
+            self._land_polys = None
+
+            return None
+
         # stretch the bounding box, to get approximate aspect ratio in
         # projected coords.
         aspect_ratio = (np.cos(BB.Center[1] * np.pi / 180) * (BB.Width / BB.Height))
@@ -1464,8 +1670,51 @@ class MapFromUGrid(RasterMap):
                            land_polys=land_polys,
                            ** kwargs)
 
+        self._save_cached_raster()
+
         return None
 
+    def _raster_cache_key(self):
+        '''
+        key for this map in the raster cache -- changes if the file or any of
+        the parameters used to build the raster change
+        '''
+        return RasterCache.make_key(self.filename,
+                                   map_type='MapFromUGrid',
+                                   raster_size=self.raster_size,
+                                   map_bounds=self._map_bounds_arg)
+
+    def _raster_cache_polygons(self):
+        return self._file_polygons
+
+    def _read_polygons(self):
+        '''
+        Read the polygons from the file
+
+        :returns: (land_polys, spillable_area, map_bounds) -- the map
+                  bounds are None if they are not in the file
+        '''
+        polygons = haz_files.ReadBNA(self.filename, 'PolygonSet')
+        map_bounds = None
+
+        # find the spillable area and map bounds:
+        # and create a new polygonset without them
+        #  fixme -- adding a "pop" method to PolygonSet might be better
+        #      or a gnome_map_data object...
+
+        land_polys = PolygonSet()  # and lakes....
+        spillable_area = PolygonSet()
+
+        for p in polygons:
+            if p.metadata[1].lower() == 'spillablearea':
+                spillable_area.append(p)
+            elif p.metadata[1].lower() == 'map bounds':
+                map_bounds = p
+            else:
+                land_polys.append(p)
+
+        return land_polys, spillable_area, map_bounds
+
 
 def map_from_rectangular_grid(mask, lon, lat, refine=1, **kwargs):
     """
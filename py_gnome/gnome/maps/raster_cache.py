@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+"""
+raster_cache.py
+
+An optional on-disk cache of the rasterized land maps built by MapFromBNA
+and MapFromUGrid.
+
+Building a raster map means drawing every land polygon, and then building
+the coarser land layers. If the same map is built over and over (in a web
+server, for instance), that work can be saved: the raster, the projection
+and the coarser layers are stored in a cache directory, keyed by a hash of
+the contents of the map file and the parameters used to build the raster.
+If any of those change, the key changes, so stale rasters are never used.
+
+Rasters are loaded as memory-mapped files, so only the parts of the map
+that are used get read.
+
+The cache is off by default. Turn it on for a single map by passing
+``raster_cache_dir`` to the map, or for all maps with::
+
+    gnome.maps.raster_cache.set_default_cache_dir('a/path/to/cache')
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+from gnome.utilities.projections import FlatEarthProjection
+
+# bump this if the way rasters are built or stored changes,
+# so old cached rasters are not used
+CACHE_VERSION = 2
+
+_default_cache_dir = None
+
+
+def set_default_cache_dir(cache_dir):
+    """
+    Set the raster cache dir used by maps that aren't passed one.
+
+    :param cache_dir: path to the cache directory. It will be created if it
+                      doesn't exist. None turns off the default cache.
+    """
+    global _default_cache_dir
+    _default_cache_dir = cache_dir
+
+
+def get_raster_cache(cache_dir=None):
+    """
+    Returns a RasterCache for cache_dir, or for the default cache dir if
+    cache_dir is None.
+
+    Returns None if neither is set -- i.e. caching is off.
+    """
+    if cache_dir is None:
+        cache_dir = _default_cache_dir
+
+    if cache_dir is None:
+        return None
+    else:
+        return RasterCache(cache_dir)
+
+
+class RasterCache(object):
+    """
+    A directory of cached land rasters
+
+    Each entry is a sub-directory named by its key, holding the raster and
+    the coarser layers as .npy files, and the projection parameters, and
+    the polygons the map needs from its file (map bounds and spillable
+    area), as JSON.
+    """
+    # the FlatEarthProjection attributes needed to re-create it
+    _projection_attrs = ('center', 'offset', 'scale', 'image_size',
+                         'image_box')
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(filename, **params):
+        """
+        Compute the cache key for a map
+
+        :param filename: the map data file -- its contents are hashed.
+
+        :param params: any other parameters that change the raster
+                       (raster_size, shift_lons, map_bounds, ...).
+                       Must be numbers, strings, None, or (nested) sequences
+                       of numbers.
+
+        :returns: a hex digest string
+        """
+        key = hashlib.sha1()
+        key.update('version: {0}\n'.format(CACHE_VERSION).encode())
+
+        with open(filename, 'rb') as infile:
+            for chunk in iter(lambda: infile.read(2 ** 20), b''):
+                key.update(chunk)
+
+        for name in sorted(params):
+            value = params[name]
+            if value is not None and not isinstance(value, (str, int, float)):
+                value = np.asarray(value, dtype=np.float64).tolist()
+
+            key.update('\n{0}: {1!r}'.format(name, value).encode())
+
+        return key.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """
+        Load a cached raster
+
+        :returns: (raster, projection, layers, polygons) or None if the key
+                  is not in the cache. The arrays are copy-on-write
+                  memory-maps of the cached files -- changing them does not
+                  change the cache. polygons is the dict passed to save().
+        """
+        entry = self._entry_dir(key)
+
+        try:
+            with open(os.path.join(entry, 'projection.json')) as infile:
+                proj_params = json.load(infile)
+
+            polygons = proj_params.pop('polygons')
+
+            raster = np.load(os.path.join(entry, 'raster.npy'),
+                             mmap_mode='c')
+            layers = [np.load(os.path.join(entry,
+                                           'layer_{0}.npy'.format(i)),
+                              mmap_mode='c')
+                      for i in range(proj_params.pop('num_layers'))]
+        except (IOError, ValueError, KeyError):
+            # not there, or not complete
+            return None
+
+        projection = FlatEarthProjection()
+        for attr in self._projection_attrs:
+            value = proj_params[attr]
+            if attr in ('center', 'offset'):
+                value = np.array(value, dtype=np.float64)
+            elif attr == 'image_box':
+                value = tuple(np.array(v, dtype=np.float64) for v in value)
+            elif attr == 'image_size':
+                value = tuple(int(v) for v in value)
+            else:
+                value = tuple(value)
+            setattr(projection, attr, value)
+
+        return raster, projection, layers, polygons
+
+    def save(self, key, raster, projection, layers, polygons=None):
+        """
+        Save a raster to the cache
+
+        :param raster: the full resolution raster
+        :param projection: the FlatEarthProjection used to draw the raster
+        :param layers: list of the coarser layers -- not including the raster
+        :param polygons=None: dict of the polygons the map needs when it is
+                              loaded from the cache, so the file does not
+                              have to be read. Must be JSON serializable.
+        """
+        entry = self._entry_dir(key)
+        if os.path.isdir(entry):
+            return
+
+        proj_params = {attr: np.asarray(getattr(projection, attr),
+                                        dtype=np.float64).tolist()
+                       for attr in self._projection_attrs}
+        proj_params['num_layers'] = len(layers)
+        proj_params['polygons'] = polygons
+
+        # write to a temp dir, then move it into place, so other processes
+        # never see a partly written entry
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            np.save(os.path.join(tmp_dir, 'raster.npy'), raster)
+            for i, layer in enumerate(layers):
+                np.save(os.path.join(tmp_dir, 'layer_{0}.npy'.format(i)),
+                        layer)
+
+            with open(os.path.join(tmp_dir, 'projection.json'), 'w') as outf:
+                json.dump(proj_params, outf)
+
+            os.rename(tmp_dir, entry)
+        except OSError:
+            # another process got there first
+            if not os.path.isdir(entry):
+                raise
+        finally:
+            if os.path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
@@ -42,13 +42,14 @@ import copy
 
 import numpy as np
 
-from colander import (SchemaNode,
+from colander import (SchemaNode, SequenceSchema,
                       String, Float, Int, Bool, List,
                       drop, OneOf)
 
 from gnome.utilities.time_utils import round_time, asdatetime
 import gnome.utilities.rand
 from gnome.utilities.cache import ElementCache
+from gnome.utilities.step_timer import StepTimer, NO_TIMING
 from gnome.utilities.orderedcollection import OrderedCollection
 from gnome.spill_container import SpillContainerPair
 from gnome.basic_types import oil_status, fate
@@ -60,7 +61,8 @@ from gnome.maps.map import (GnomeMapSchema,
                             GnomeMap)
 
 from gnome.environment import Environment, Wind
-from gnome.array_types import gat
+from gnome.environment.prefetch import TimeSlicePrefetcher, gridded_variables
+from gnome.array_types import gat, float32_array_types
 from gnome.environment import schemas as env_schemas
 
 from gnome.movers import Mover, mover_schemas
@@ -101,6 +103,12 @@ class ModelSchema(ObjTypeSchema):
     )
     uncertain = SchemaNode(Bool())
     cache_enabled = SchemaNode(Bool())
+    cache_copy_on_write = SchemaNode(Bool(), save=True, update=True,
+                                     missing=drop)
+    cache_write_queue_depth = SchemaNode(Int(), save=True, update=True,
+                                         missing=drop)
+    cache_storage = SchemaNode(String(), save=True, update=True,
+                               missing=drop)
     num_time_steps = SchemaNode(Int(), read_only=True)
     make_default_refs = SchemaNode(Bool())
     mode = SchemaNode(
@@ -147,6 +155,13 @@ class ModelSchema(ObjTypeSchema):
     #UI Configuration properties for web client:
     #manual_weathering = SchemaNode(Bool(), save=False, update=True, test_equal=False, missing=drop)
     weathering_activated = SchemaNode(Bool(), save=True, update=True, test_equal=False, missing=drop)
+    fuse_weathering = SchemaNode(Bool(), save=True, update=True, missing=drop)
+    prefetch_time_slices = SchemaNode(Int(), save=True, update=True,
+                                      missing=drop)
+    step_timing = SchemaNode(Bool(), save=True, update=True, missing=drop)
+    float32_arrays = SequenceSchema(
+        SchemaNode(String()), save=True, update=True, missing=drop
+    )
 
 
 class Model(GnomeId):
@@ -192,6 +207,9 @@ class Model(GnomeId):
                  map=None,
                  uncertain=False,
                  cache_enabled=False,
+                 cache_copy_on_write=False,
+                 cache_write_queue_depth=0,
+                 cache_storage='npz',
                  mode=None,
                  make_default_refs=True,
                  location=[],
@@ -203,6 +221,10 @@ class Model(GnomeId):
                  uncertain_spills=[],
                  #manual_weathering=False,
                  weathering_activated=False,
+                 fuse_weathering=False,
+                 prefetch_time_slices=0,
+                 step_timing=False,
+                 float32_arrays=(),
                  **kwargs):
         '''
         Initializes a model.
@@ -222,6 +244,16 @@ class Model(GnomeId):
         :param weathering_substeps=1: How many weathering substeps to
                                           run inside a single model time step.
 
+        :param fuse_weathering=False: If True, evaporation, natural
+                                      dispersion, dissolution and
+                                      emulsification are run together in one
+                                      pass over the weathering data in each
+                                      substep, followed by the WeatheringData
+                                      update, rather than each one running all
+                                      the substeps on its own copy of the
+                                      data. With one substep, the results are
+                                      the same as the default.
+
         :param map=gnome.map.GnomeMap(): The land-water map.
 
         :param uncertain=False: Flag for setting uncertainty.
@@ -229,9 +261,49 @@ class Model(GnomeId):
         :param cache_enabled=False: Flag for setting whether the model should
                                     cache results to disk.
 
+        :param cache_copy_on_write=False: If True, each step is cached as one
+                                          read-only snapshot that the
+                                          outputters share, rather than
+                                          being copied for each of them.
+                                          See gnome.utilities.cache
+
+        :param cache_write_queue_depth=0: If more than 0, the disk cache is
+                                          written by a background thread,
+                                          with up to this many steps waiting
+                                          to be written.
+
+        :param cache_storage='npz': format of the disk cache: 'npz' for a
+                                    file per step, or 'columnar' for a
+                                    file per data array, that steps are
+                                    loaded from as memory-mapped slices.
+
         :param mode='Gnome': The runtime 'mode' that the model should use.
                              This is a value that the Web Client uses to
                              decide which UI views it should present.
+
+        :param prefetch_time_slices=0: If more than 0, the time slices of
+                                       netCDF-backed gridded environment
+                                       objects are read this many slices
+                                       ahead of the model in a background
+                                       thread, during the run. See
+                                       gnome.environment.prefetch
+
+        :param step_timing=False: If True, the time spent in each call the
+                                  model makes to its components in a step
+                                  is recorded, and returned in the 'timing'
+                                  item of the output of step(). The totals
+                                  for the run are in run_timing. See
+                                  gnome.utilities.step_timer
+
+        :param float32_arrays=(): names of the element data arrays to store
+                                  as float32 rather than float64, to save
+                                  memory with many elements -- e.g.
+                                  ['mass_components',
+                                  'evap_decay_constant'].
+                                  Only the arrays in
+                                  gnome.array_types.FLOAT32_ARRAY_TYPES can
+                                  be. The results differ from the float64
+                                  ones by about float32 precision.
         '''
         # making sure basic stuff is in place before properties are set
         super(Model, self).__init__(name=name, **kwargs)
@@ -253,7 +325,9 @@ class Model(GnomeId):
             _spills = spills
         self.spills.add(_spills)
 
-        self._cache = ElementCache()
+        self._cache = ElementCache(copy_on_write=cache_copy_on_write,
+                                   write_queue_depth=cache_write_queue_depth,
+                                   storage=cache_storage)
         self._cache.enabled = cache_enabled
 
         # default to now, rounded to the nearest hour
@@ -293,6 +367,14 @@ class Model(GnomeId):
         self._register_callbacks()
         #self.manual_weathering = manual_weathering
         self.weathering_activated = weathering_activated
+        self.fuse_weathering = fuse_weathering
+        self.prefetch_time_slices = prefetch_time_slices
+        self._prefetcher = None
+        # hits and misses of the time slice cache in the last run
+        self.prefetch_counts = None
+        self.step_timing = step_timing
+        self._step_timer = None
+        self.float32_arrays = float32_arrays
         self.array_types.update({'age': gat('age')})
 
     def _register_callbacks(self):
@@ -364,6 +446,8 @@ class Model(GnomeId):
         self._current_time_step = -1
         self.model_time = self.start_time
 
+        self._stop_prefetch()
+
         # fixme: do the movers need re-setting? -- or wait for
         #        prepare_for_model_run?
 
@@ -491,6 +575,45 @@ class Model(GnomeId):
     def cache_enabled(self, enabled):
         self._cache.enabled = enabled
 
+    @property
+    def cache_copy_on_write(self):
+        '''
+        If True, each step is cached as one read-only snapshot that is
+        shared by everything that loads it
+        '''
+        return self._cache.copy_on_write
+
+    @cache_copy_on_write.setter
+    def cache_copy_on_write(self, copy_on_write):
+        self._cache.copy_on_write = copy_on_write
+
+    @property
+    def cache_write_queue_depth(self):
+        '''
+        Number of steps that can be waiting to be written to the disk cache
+        by a background thread. 0 means they are written synchronously.
+        '''
+        return self._cache.write_queue_depth
+
+    @cache_write_queue_depth.setter
+    def cache_write_queue_depth(self, depth):
+        self._cache.write_queue_depth = depth
+
+    @property
+    def cache_storage(self):
+        '''
+        format of the disk cache: 'npz' or 'columnar'
+        '''
+        return self._cache.storage
+
+    @cache_storage.setter
+    def cache_storage(self, storage):
+        if storage != self._cache.storage:
+            self._cache.storage = storage
+
+            # the steps already cached are in the old format
+            self.rewind()
+
     @property
     def has_weathering_uncertainty(self):
         return (any([w.on for w in self.weatherers]) and
@@ -741,6 +864,8 @@ class Model(GnomeId):
         6. Conduct miscellaneous prep items. See section in code for details.
         '''
 
+        self._step_timer = StepTimer() if self.step_timing else None
+
         '''Step 1: Set up special objects'''
         weather_data = dict()
         wd = None
@@ -805,6 +930,9 @@ class Model(GnomeId):
                 if (hasattr(item, 'array_types')):
                     array_types.update(item.all_array_types)
 
+        array_types.update(float32_array_types(array_types,
+                                               self.float32_arrays))
+
         #self.logger.debug(array_types)
 
         for sc in self.spills.items():
@@ -855,14 +983,96 @@ class Model(GnomeId):
                                             uncertain=self.uncertain,
                                             spills=self.spills,
                                             model_time_step=self.time_step)
+
+        self._start_prefetch()
+
         self.logger.debug("{0._pid} setup_model_run complete for: "
                           "{0.name}".format(self))
 
+    def _start_prefetch(self):
+        '''
+        start reading the time slices of the gridded environment objects
+        ahead of the model, if prefetch_time_slices is set
+        '''
+        self._stop_prefetch()
+
+        if self.prefetch_time_slices > 0:
+            self._prefetcher = TimeSlicePrefetcher(
+                gridded_variables(self.environment),
+                self.start_time, self.time_step, self.duration,
+                num_slices=self.prefetch_time_slices)
+            self._prefetcher.start()
+
+    def _stop_prefetch(self):
+        prefetcher = getattr(self, '_prefetcher', None)
+
+        if prefetcher is not None:
+            prefetcher.stop()
+            self._prefetcher = None
+
+            self.prefetch_counts = {'hits': prefetcher.hits,
+                                    'misses': prefetcher.misses}
+            self.logger.debug('{0._pid} prefetched time slices for {0.name} '
+                              '-- {1}'.format(self, self.prefetch_counts))
+
+    def _timed(self, phase, obj):
+        '''
+        context manager to do a call to obj in -- it is timed if step_timing
+        is on
+        '''
+        if self._step_timer is None:
+            return NO_TIMING
+        else:
+            return self._step_timer.time(phase, obj)
+
+    @property
+    def run_timing(self):
+        '''
+        The timing totals of the current (or last) run, if step_timing is
+        on:
+
+        {'num_steps': number of steps,
+         'wall_time': seconds for all the steps,
+         'calls': {phase: {object name: seconds}},
+         'max_num_elements': {'certain': n, 'uncertain': n},
+         'cache_bytes': bytes of data saved to the cache}
+
+        None if step_timing is off.
+        '''
+        if self._step_timer is None:
+            return None
+        else:
+            return self._step_timer.totals
+
+    @property
+    def float32_arrays(self):
+        '''
+        names of the element data arrays that are stored as float32. A
+        change is used from the next run -- the arrays of the current run
+        are not converted.
+        '''
+        return self._float32_arrays
+
+    @float32_arrays.setter
+    def float32_arrays(self, names):
+        names = list(names)
+
+        # raises a ValueError for arrays that can't be float32
+        float32_array_types({}, names)
+
+        self._float32_arrays = names
+
     def post_model_run(self):
         '''
         A place where the model goes through all collections and calls
         post_model_run if the object has it.
         '''
+        # make sure everything is in the disk cache before the outputters
+        # need it
+        self._cache.flush()
+
+        self._stop_prefetch()
+
         for env in self.environment:
             env.post_model_run()
         for mov in self.movers:
@@ -881,19 +1091,26 @@ class Model(GnomeId):
         '''
         # initialize movers differently if model uncertainty is on
         for m in self.movers:
-            for sc in self.spills.items():
-                m.prepare_for_model_step(sc, self.time_step, self.model_time)
+            with self._timed('prepare_for_model_step', m):
+                for sc in self.spills.items():
+                    m.prepare_for_model_step(sc, self.time_step,
+                                             self.model_time)
 
         for w in self.weatherers:
-            for sc in self.spills.items():
-                # maybe we will setup a super-sampling step here???
-                w.prepare_for_model_step(sc, self.time_step, self.model_time)
+            with self._timed('prepare_for_model_step', w):
+                for sc in self.spills.items():
+                    # maybe we will setup a super-sampling step here???
+                    w.prepare_for_model_step(sc, self.time_step,
+                                             self.model_time)
 
         for environment in self.environment:
-            environment.prepare_for_model_step(self.model_time)
+            with self._timed('prepare_for_model_step', environment):
+                environment.prepare_for_model_step(self.model_time)
 
         for outputter in self.outputters:
-            outputter.prepare_for_model_step(self.time_step, self.model_time)
+            with self._timed('prepare_for_model_step', outputter):
+                outputter.prepare_for_model_step(self.time_step,
+                                                 self.model_time)
 
     def move_elements(self):
         '''
@@ -911,12 +1128,17 @@ class Model(GnomeId):
                 # reset next_positions
                 (sc['next_positions'])[:] = sc['positions']
 
-                # loop through the movers
-                for m in self.movers:
-                    delta = m.get_move(sc, self.time_step, self.model_time)
-                    sc['next_positions'] += delta
+                # loop through the movers -- they share the index of the
+                # elements to move, and add their moves to next_positions
+                next_positions = sc['next_positions']
+                with sc.shared_in_water_index():
+                    for m in self.movers:
+                        with self._timed('get_move', m):
+                            m.accumulate_move(sc, self.time_step,
+                                              self.model_time, next_positions)
 
-                self.map.beach_elements(sc, self.model_time)
+                with self._timed('beach_elements', self.map):
+                    self.map.beach_elements(sc, self.model_time)
 
                 # let model mark these particles to be removed
                 tbr_mask = sc['status_codes'] == oil_status.off_maps
@@ -983,14 +1205,87 @@ class Model(GnomeId):
 
             sc.reset_fate_dataview()
 
-            for w in self.weatherers:
-                for model_time, time_step in self._split_into_substeps():
-                    # change 'mass_components' in weatherer
-                    w.weather_elements(sc, time_step, model_time)
+            for weatherers in self._weatherer_runs():
+                if len(weatherers) > 1:
+                    self._weather_fused(sc, weatherers)
+                    continue
+
+                w = weatherers[0]
+                with self._timed('weather_elements', w):
+                    for model_time, time_step in self._split_into_substeps():
+                        # change 'mass_components' in weatherer
+                        w.weather_elements(sc, time_step, model_time)
                     #self.logger.info('density after {0}: {1}'.format(w.name, sc['density'][-5:]))
 
         #self.logger.info('density after weather_elements: {0}'.format(sc['density'][-5:]))
 
+    def _weatherer_runs(self):
+        '''
+        The weatherers, in order, in lists of the ones that are run together.
+
+        Each weatherer is on its own, unless fuse_weathering is on. Then
+        each run of weatherers that define weather_data() (and the
+        WeatheringData that follows them) is in one list, so they can be run
+        in one pass.
+        '''
+        runs = []
+        fusing = False
+
+        for w in self.weatherers:
+            if (self.fuse_weathering and
+                    (hasattr(w, 'weather_data') or
+                     (fusing and isinstance(w, WeatheringData)))):
+                if not fusing:
+                    runs.append([])
+                runs[-1].append(w)
+                fusing = not isinstance(w, WeatheringData)
+            else:
+                runs.append([w])
+                fusing = False
+
+        return runs
+
+    def _weather_fused(self, sc, weatherers):
+        '''
+        Run the weatherers on sc in one pass for each substep.
+
+        The data of the surface weathering elements is gathered once for
+        all of them, and each one updates it in turn. 'mass' and
+        'frac_lost' are then computed from 'mass_components' once, and the
+        data is written back to sc once, before WeatheringData updates the
+        density and viscosity.
+        '''
+        kernels = [w for w in weatherers
+                   if w.active and not isinstance(w, WeatheringData)]
+        updates = [w for w in weatherers if isinstance(w, WeatheringData)]
+
+        array_types = set()
+        for w in kernels:
+            array_types.update(w.array_types)
+
+        for model_time, time_step in self._split_into_substeps():
+            if (kernels and sc.num_released > 0 and
+                    sc.substance.is_weatherable):
+                for substance, data in sc.itersubstancedata(array_types):
+                    if len(data['mass']) == 0:
+                        continue
+
+                    for w in kernels:
+                        with self._timed('weather_elements', w):
+                            w.weather_data(sc, substance, data, time_step,
+                                           model_time)
+
+                    data['mass'] = data['mass_components'].sum(1)
+                    if 'frac_lost' in data:
+                        data['frac_lost'][:] = (1 - data['mass'] /
+                                                data['init_mass'])
+
+                sc.update_from_fatedataview()
+
+            for w in updates:
+                with self._timed('weather_elements', w):
+                    w.weather_elements(sc, time_step, model_time)
+
     def _split_into_substeps(self):
         '''
         :return: sequence of (datetime, timestep)
@@ -1025,21 +1320,25 @@ class Model(GnomeId):
         Output data
         '''
         for mover in self.movers:
-            for sc in self.spills.items():
-                mover.model_step_is_done(sc)
+            with self._timed('model_step_is_done', mover):
+                for sc in self.spills.items():
+                    mover.model_step_is_done(sc)
 
         for w in self.weatherers:
-            for sc in self.spills.items():
-                w.model_step_is_done(sc)
+            with self._timed('model_step_is_done', w):
+                for sc in self.spills.items():
+                    w.model_step_is_done(sc)
 
         for outputter in self.outputters:
-            outputter.model_step_is_done()
+            with self._timed('model_step_is_done', outputter):
+                outputter.model_step_is_done()
 
         for sc in self.spills.items():
             '''
             removes elements with oil_status.to_be_removed
             '''
-            sc.model_step_is_done()
+            with self._timed('model_step_is_done', 'spill_container'):
+                sc.model_step_is_done()
 
             # age remaining particles
             sc['age'][:] = sc['age'][:] + self.time_step
@@ -1048,10 +1347,12 @@ class Model(GnomeId):
         output_info = {'step_num': self.current_time_step}
 
         for outputter in self.outputters:
-            if self.current_time_step == self.num_time_steps - 1:
-                output = outputter.write_output(self.current_time_step, True)
-            else:
-                output = outputter.write_output(self.current_time_step)
+            with self._timed('write_output', outputter):
+                if self.current_time_step == self.num_time_steps - 1:
+                    output = outputter.write_output(self.current_time_step,
+                                                    True)
+                else:
+                    output = outputter.write_output(self.current_time_step)
 
             if output is not None:
                 output_info[outputter.__class__.__name__] = output
@@ -1066,7 +1367,35 @@ class Model(GnomeId):
         '''
         Steps the model forward (or backward) in time. Needs testing for
         hindcasting.
+
+        If the step fails, the time slice prefetcher is stopped and the
+        outputters are closed before the error is passed on, so they don't
+        keep threads or files open until the next rewind.
+        '''
+        try:
+            return self._run_step()
+        except StopIteration:
+            raise
+        except BaseException:
+            self._close_run()
+            raise
+
+    def _close_run(self):
         '''
+        stop the prefetcher and close the outputters after a step has
+        failed -- an error closing an outputter is logged, so it doesn't
+        hide the one that stopped the run
+        '''
+        self._stop_prefetch()
+
+        for out in self.outputters:
+            try:
+                out.close()
+            except Exception:
+                self.logger.exception('{0._pid} error closing {1.name} '
+                                      'for {0.name}'.format(self, out))
+
+    def _run_step(self):
         isValid = True
         for sc in self.spills.items():
             # Set the current time stamp only after current_time_step is
@@ -1085,6 +1414,9 @@ class Model(GnomeId):
                 raise RuntimeError("Setup model run complete but model "
                                    "is invalid", msgs)
 
+            if self._step_timer is not None:
+                self._step_timer.start_step()
+
             # going into step 0
             self.current_time_step += 1
             # only release 1 second, to catch any instantaneous releases
@@ -1103,6 +1435,9 @@ class Model(GnomeId):
             raise StopIteration("Run complete for {0}".format(self.name))
 
         else:
+            if self._step_timer is not None:
+                self._step_timer.start_step()
+
             # release half the LEs for this time interval
             self.release_elements(self.time_step / 2, self.model_time)
             self.setup_time_step()
@@ -1116,14 +1451,36 @@ class Model(GnomeId):
             return output_info
 
     def output_step(self, isvalid):
-        self._cache.save_timestep(self.current_time_step, self.spills)
+        with self._timed('save_timestep', 'cache'):
+            self._cache.save_timestep(self.current_time_step, self.spills)
         output_info = self.write_output(isvalid)
 
+        if self._step_timer is not None:
+            output_info['timing'] = self._end_step_timing()
+
         self.logger.debug('{0._pid} '
                           'Completed step: {0.current_time_step} for {0.name}'
                           .format(self))
         return output_info
 
+    def _end_step_timing(self):
+        '''
+        finish timing the step
+
+        :returns: the timing of the step -- see StepTimer.end_step()
+        '''
+        num_elements = {}
+        for sc in self.spills.items():
+            num_elements['uncertain' if sc.uncertain else 'certain'] = len(sc)
+
+        # the data that was saved to the cache in this step
+        cache_bytes = 0
+        for data in self._cache.recent.get(self.current_time_step, ()):
+            if data is not None:
+                cache_bytes += sum(arr.nbytes for arr in data.values())
+
+        return self._step_timer.end_step(num_elements, cache_bytes)
+
     def release_elements(self, time_step, model_time):
         num_released = 0
         for sc in self.spills.items():
@@ -1138,7 +1495,8 @@ class Model(GnomeId):
             if num_released > 0:
                 for item in self.weatherers:
                     if item.on:
-                        item.initialize_data(sc, num_released)
+                        with self._timed('initialize_data', item):
+                            item.initialize_data(sc, num_released)
 
             self.logger.debug("{1._pid} released {0} new elements for step:"
                               " {1.current_time_step} for {1.name}".
@@ -1192,6 +1550,10 @@ class Model(GnomeId):
                 self.logger.info('** Run Complete **')
                 break
 
+        if self._step_timer is not None:
+            self.logger.info('step timing for {0}:\n{1}'
+                             .format(self.name, self._step_timer.report()))
+
         return output_data
 
     def _add_to_environ_collec(self, obj_added):
@@ -8,7 +8,8 @@ from colander import (SchemaNode, TupleSchema, Bool, drop)
 from gnome.basic_types import (world_point,
                                world_point_type,
                                spill_type,
-                               status_code_type)
+                               status_code_type,
+                               oil_status)
 
 from gnome.utilities import time_utils
 from gnome.persist.base_schema import ObjTypeSchema
@@ -199,6 +200,25 @@ class Mover(Process):
 
         return delta
 
+    def accumulate_move(self, sc, time_step, model_time_datetime, out):
+        """
+        Compute the move in (long,lat,z) space, and add it to out, rather
+        than returning a new array of the deltas. This is what the model
+        calls -- out is the spill container's 'next_positions' array, so
+        the movers don't each need to allocate an array for their deltas.
+
+        The base class adds the result of get_move(). Movers that can
+        compute their move without a new array override it, and get_move()
+        becomes a wrapper around it.
+
+        :param sc: an instance of gnome.spill_container.SpillContainer class
+        :param time_step: time step in seconds
+        :param model_time_datetime: current model time as datetime object
+        :param out: (number_elements X 3) array of world_point_type the
+                    move is added to
+        """
+        out += self.get_move(sc, time_step, model_time_datetime)
+
     def get_bounds(self):
         '''
             Return a bounding box surrounding the grid data.
@@ -242,6 +262,42 @@ class PyMover(Mover):
 
         return self.num_methods[method_name]
 
+    def in_water_index(self, sc):
+        '''
+            Indices of the elements to move -- the ones in the water.
+
+            The delta methods are only run on the positions of these
+            elements. In a model step the index is computed once and shared
+            by all the movers -- see SpillContainer.shared_in_water_index()
+        '''
+        try:
+            return sc.in_water_index()
+        except AttributeError:
+            # not a SpillContainer -- just a dict of arrays
+            return np.flatnonzero(sc['status_codes'] == oil_status.in_water)
+
+    def get_move(self, sc, time_step, model_time_datetime, num_method=None):
+        """
+        Compute the move in (long,lat,z) space. It returns the delta move
+        for each element of the spill as a numpy array of size
+        (number_elements X 3) and dtype = gnome.basic_types.world_point_type
+
+        PyMovers compute their move in accumulate_move(), this adds it to
+        an array of zeros.
+
+        :param sc: an instance of gnome.spill_container.SpillContainer class
+        :param time_step: time step in seconds
+        :param model_time_datetime: current model time as datetime object
+        :param num_method=None: name of the numerical method to use -- see
+                                delta_method()
+        """
+        deltas = np.zeros_like(sc['positions'])
+
+        self.accumulate_move(sc, time_step, model_time_datetime, deltas,
+                             num_method=num_method)
+
+        return deltas
+
     def get_delta_Euler(self, sc, time_step, model_time, pos, vel_field):
         vels = vel_field.at(pos, model_time)
 
@@ -315,6 +371,9 @@ class CyMover(Mover):
         # either a 1, or 2 depending on whether spill is certain or not
         self.spill_type = 0
 
+        # reused for the deltas by accumulate_move()
+        self._delta_buf = np.zeros((0,), dtype=world_point)
+
     def prepare_for_model_run(self):
         """
         Calls the contained cython mover's prepare_for_model_run()
@@ -385,20 +444,62 @@ class CyMover(Mover):
         # that have been released
 
         if self.active and len(self.positions) > 0:
-            self.mover.get_move(self.model_time, time_step,
-                                self.positions, self.delta,
-                                self.status_codes, self.spill_type)
+            self._cy_get_move(sc, time_step)
 
         return (self.delta.view(dtype=world_point_type)
                 .reshape((-1, len(world_point))))
 
-    def prepare_data_for_get_move(self, sc, model_time_datetime):
+    def accumulate_move(self, sc, time_step, model_time_datetime, out):
+        """
+        Add the move to out -- see Mover.accumulate_move()
+
+        The cython mover writes its deltas into an array that is kept, and
+        reused in the next call.
+        """
+        num_elements = len(sc['positions'])
+        if not self.active or num_elements == 0:
+            return
+
+        self.prepare_data_for_get_move(sc, model_time_datetime,
+                                       delta=self._get_delta_buf(num_elements))
+        self._cy_get_move(sc, time_step)
+
+        out += (self.delta.view(dtype=world_point_type)
+                .reshape((-1, len(world_point))))
+
+    def _cy_get_move(self, sc, time_step):
+        """
+        call the cython mover's get_move(), to put the deltas in self.delta
+
+        Override for movers that pass it more of the element data -- e.g.
+        the windages
+        """
+        self.mover.get_move(self.model_time, time_step,
+                            self.positions, self.delta,
+                            self.status_codes, self.spill_type)
+
+    def _get_delta_buf(self, num_elements):
+        """
+        the first num_elements of the reused delta array, set to zero
+        """
+        if len(self._delta_buf) < num_elements:
+            self._delta_buf = np.zeros((int(num_elements * 1.5),),
+                                       dtype=world_point)
+
+        delta = self._delta_buf[:num_elements]
+        delta[...] = 0
+
+        return delta
+
+    def prepare_data_for_get_move(self, sc, model_time_datetime, delta=None):
         """
         organizes the spill object into inputs for calling with Cython
         wrapper's get_move(...)
 
         :param sc: an instance of gnome.spill_container.SpillContainer class
         :param model_time_datetime: current model time as datetime object
+        :param delta=None: array of world_point to use for the deltas. If
+                           None, a new array of zeros is made.
         """
         self.model_time = self.datetime_to_seconds(model_time_datetime)
 
@@ -419,7 +520,10 @@ class CyMover(Mover):
         self.positions = (self.positions.view(dtype=world_point)
                           .reshape((len(self.positions),)))
 
-        self.delta = np.zeros(len(self.positions), dtype=world_point)
+        if delta is None:
+            delta = np.zeros(len(self.positions), dtype=world_point)
+
+        self.delta = delta
 
     def model_step_is_done(self, sc=None):
         """
@@ -10,7 +10,6 @@ import numpy as np
 from colander import (SchemaNode,
                       Bool, Float, String, Sequence, drop)
 
-from gnome.basic_types import oil_status
 from gnome.array_types import gat
 
 from gnome.utilities import rand
@@ -249,36 +248,35 @@ class PyWindMover(movers.PyMover):
 
             return centroids
 
-    def get_move(self, sc, time_step, model_time_datetime, num_method=None):
+    def accumulate_move(self, sc, time_step, model_time_datetime, out,
+                        num_method=None):
         """
-        Compute the move in (long,lat,z) space. It returns the delta move
-        for each element of the spill as a numpy array of size
-        (number_elements X 3) and dtype = gnome.basic_types.world_point_type
-
-        Base class returns an array of numpy.nan for delta to indicate the
-        get_move is not implemented yet.
-
-        Each class derived from Mover object must implement it's own get_move
+        Compute the move in (long,lat,z) space, and add it to out
 
         :param sc: an instance of gnome.spill_container.SpillContainer class
         :param time_step: time step in seconds
         :param model_time_datetime: current model time as datetime object
-
-        All movers must implement get_move() since that's what the model calls
+        :param out: (number_elements X 3) array the move is added to
+        :param num_method=None: name of the numerical method to use -- see
+                                delta_method()
         """
         positions = sc['positions']
 
         if self.active and len(positions) > 0:
-            status = sc['status_codes'] != oil_status.in_water
-            pos = positions[:]
+            # only the elements in the water move
+            in_water = self.in_water_index(sc)
+            if len(in_water) == 0:
+                return
 
-            deltas = self.delta_method(num_method)(sc, time_step, model_time_datetime, pos, self.wind)
-            deltas[:, 0] *= sc['windages'] * self.scale_value
-            deltas[:, 1] *= sc['windages'] * self.scale_value
+            pos = positions[in_water]
+            windages = sc['windages'][in_water]
 
-            deltas = FlatEarthProjection.meters_to_lonlat(deltas, positions)
-            deltas[status] = (0, 0, 0)
-        else:
-            deltas = np.zeros_like(positions)
+            moved = self.delta_method(num_method)(sc, time_step, model_time_datetime, pos, self.wind)
+            moved = np.asarray(moved, dtype=np.float64)
+            moved[:, 0] *= windages * self.scale_value
+            moved[:, 1] *= windages * self.scale_value
+
+            # converted in place -- moved is not used again
+            FlatEarthProjection.meters_to_lonlat(moved, pos, out=moved)
 
-        return deltas
+            out[in_water, 0:moved.shape[1]] += moved
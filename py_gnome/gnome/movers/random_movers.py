@@ -171,6 +171,11 @@ class IceAwareRandomMover(RandomMover):
             return (super(IceAwareRandomMover, self)
                       .get_move(sc, time_step, model_time_datetime))
 
+    def accumulate_move(self, sc, time_step, model_time_datetime, out):
+        # the move is scaled by the ice concentration, so it is made with
+        # get_move() rather than added straight into out
+        out += self.get_move(sc, time_step, model_time_datetime)
+
 
 class RandomMover3DSchema(ProcessSchema):
     vertical_diffusion_coef_above_ml = SchemaNode(
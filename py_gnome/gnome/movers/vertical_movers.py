@@ -6,7 +6,6 @@ import copy
 
 from colander import (SchemaNode, Float)
 
-from gnome.basic_types import world_point, world_point_type
 from gnome.array_types import gat
 from gnome.cy_gnome.cy_rise_velocity_mover import CyRiseVelocityMover
 
@@ -54,29 +53,21 @@ class RiseVelocityMover(CyMover):
         return ('RiseVelocityMover(active_range={0}, on={1})'
                 .format(self.active_range, self.on))
 
-    def get_move(self, sc, time_step, model_time_datetime):
+    def _cy_get_move(self, sc, time_step):
         """
         Override base class functionality because mover has a different
         get_move signature
 
         :param sc: an instance of the gnome.SpillContainer class
         :param time_step: time step in seconds
-        :param model_time_datetime: current time of the model as a date time
-            object
         """
-        self.prepare_data_for_get_move(sc, model_time_datetime)
-
-        if self.active and len(self.positions) > 0:
-            self.mover.get_move(self.model_time,
-                                time_step,
-                                self.positions,
-                                self.delta,
-                                sc['rise_vel'],
-                                self.status_codes,
-                                self.spill_type)
-
-        return (self.delta.view(dtype=world_point_type)
-                .reshape((-1, len(world_point))))
+        self.mover.get_move(self.model_time,
+                            time_step,
+                            self.positions,
+                            self.delta,
+                            sc['rise_vel'],
+                            self.status_codes,
+                            self.spill_type)
 
 
 class TamocRiseVelocityMover(RiseVelocityMover):
@@ -10,9 +10,7 @@ from colander import (SchemaNode, Bool, String, Float, drop)
 
 from gnome.exceptions import ReferencedObjectNotSet
 
-from gnome.basic_types import (world_point,
-                               world_point_type,
-                               velocity_rec)
+from gnome.basic_types import velocity_rec
 from gnome.array_types import gat
 
 from gnome.cy_gnome.cy_wind_mover import CyWindMover
@@ -144,26 +142,22 @@ class WindMoversBase(CyMover):
                                     sc['windage_persist'],
                                     time_step)
 
-    def get_move(self, sc, time_step, model_time_datetime):
+    def _cy_get_move(self, sc, time_step):
         """
         Override base class functionality because mover has a different
         get_move signature
 
         :param sc: an instance of the gnome.SpillContainer class
         :param time_step: time step in seconds
-        :param model_time_datetime: current time of the model as a date time
-                                    object
         """
-        self.prepare_data_for_get_move(sc, model_time_datetime)
+        # the windages may be stored as float32 -- the C++ code needs
+        # doubles
+        windages = np.asarray(sc['windages'], dtype=np.float64)
 
-        if self.active and len(self.positions) > 0:
-            self.mover.get_move(self.model_time, time_step,
-                                self.positions, self.delta,
-                                sc['windages'],
-                                self.status_codes, self.spill_type)
-
-        return (self.delta.view(dtype=world_point_type)
-                .reshape((-1, len(world_point))))
+        self.mover.get_move(self.model_time, time_step,
+                            self.positions, self.delta,
+                            windages,
+                            self.status_codes, self.spill_type)
 
     def _state_as_str(self):
         '''
@@ -1,6 +1,6 @@
 
 from .outputter import Outputter, BaseOutputterSchema
-from .netcdf import NetCDFOutput, NetCDFOutputSchema
+from .netcdf import NetCDFOutput, NetCDFOutputSchema, NetCDFTrajectoryReader
 from .renderer import Renderer, RendererSchema
 from .weathering import WeatheringOutput
 from .binary import BinaryOutput
@@ -82,6 +82,8 @@ class Animation(Renderer):
         self.draw_background()
         self.start_animation(os.path.join(self.anim_filename))
 
+        self._start_render_pool()
+
     def save_foreground_frame(self, animation, delay=50):
         """
         Save the foreground image to the specified animation with the
@@ -124,28 +126,27 @@ class Animation(Renderer):
         if not self._write_step:
             return None
 
+        # draw data for self.draw_ontop second so it draws on top
+        scp = self.cache.load_timestep(step_num).items()
+        time_stamp = scp[0].current_time_stamp
+
+        if self._render_pool is not None:
+            self._submit_frame(scp, time_stamp, [], True)
+            return
+
         self.clear_foreground()
 
         if self.draw_back_to_fore:
             self.copy_back_to_fore()
 
-        # draw data for self.draw_ontop second so it draws on top
-        scp = self.cache.load_timestep(step_num).items()
-        if len(scp) == 1:
-            self.draw_elements(scp[0])
-        else:
-            if self.draw_ontop == 'forecast':
-                self.draw_elements(scp[1])
-                self.draw_elements(scp[0])
-            else:
-                self.draw_elements(scp[0])
-                self.draw_elements(scp[1])
-
-        time_stamp = scp[0].current_time_stamp
+        for sc in self._draw_order(scp):
+            self.draw_elements(sc)
 
         self.draw_timestamp(time_stamp)
         self.save_foreground_frame(self.animation, self.delay)
 
     def write_output_post_run(self, **kwargs):
+        self._finish_frames()
+
         print('closing animation')
         self.animation.close_anim()
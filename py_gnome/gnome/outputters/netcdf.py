@@ -9,7 +9,7 @@ import netCDF4 as nc
 
 import numpy as np
 
-from colander import SchemaNode, String, Boolean, drop, Int, Bool
+from colander import SchemaNode, String, Boolean, drop, Int, Bool, Range
 
 from gnome import __version__
 from gnome.basic_types import oil_status, world_point_type
@@ -178,6 +178,41 @@ class NetCDFOutputSchema(BaseOutputterSchema):
     zip_output = SchemaNode(
         Boolean(), missing=drop, save=True, update=True
     )
+    write_buffer_size = SchemaNode(
+        Int(), missing=drop, save=True, update=True, validator=Range(min=0)
+    )
+
+
+class _StepBuffer(object):
+    '''
+    The output steps for one file that haven't been written yet.
+
+    The arrays are those of the step loaded from the cache, which are not
+    changed after they are cached, so they are not copied.
+    '''
+    def __init__(self, start_idx):
+        # index of the first particle of the first step in the buffer
+        self.start_idx = start_idx
+        self.clear()
+
+    def clear(self):
+        self.times = []
+        self.particle_counts = []
+        self.arrays = {}
+        self.mass_balance = []
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time, particle_count, arrays, mass_balance):
+        self.times.append(time)
+        self.particle_counts.append(particle_count)
+        self.mass_balance.append(dict(mass_balance))
+
+        for var_name, data in arrays.items():
+            self.arrays.setdefault(var_name, []).append(data)
+            self.nbytes += data.nbytes
 
 
 class NetCDFOutput(Outputter, OutputterFilenameMixin):
@@ -278,6 +313,7 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
                  # FIXME: this should not be default, but since we don't have
                  #        a way for WebGNOME to set it yet..
                  surface_conc="kde",
+                 write_buffer_size=0,
                  # _middle_of_run=False,
                  _start_idx=0,
                  **kwargs):
@@ -301,6 +337,14 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
             attributes
         :type which_data: string -- one of {'standard', 'most', 'all'}
 
+        :param write_buffer_size=0: If 0, the files are opened, written to
+            and closed at each output step. If greater than zero, the files
+            are kept open for the whole run, and output steps are kept in
+            memory until they take up this many bytes, then written all at
+            once. The files are written and closed at the end of the run, on
+            rewind, or if there is an error writing.
+        :type write_buffer_size: int -- number of bytes
+
         Optional arguments passed on to base class (kwargs):
 
         :param cache: sets the cache object from which to read data. The model
@@ -325,6 +369,11 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
 
         # uncertain file is only written out if model is uncertain
 
+        # files kept open for the run, and their buffered steps,
+        # if write_buffer_size > 0 -- needed by rewind()
+        self._datasets = {}
+        self._buffers = {}
+
         ## why is this even here ?!?!
         # kwargs['_middle_of_run'] = _middle_of_run
         super(NetCDFOutput, self).__init__(filename=filename,
@@ -373,6 +422,8 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
         # number of particles are released
         self._start_idx = _start_idx
 
+        self.write_buffer_size = write_buffer_size
+
         # define NetCDF variable attributes that are instance attributes here
         # It is set in prepare_for_model_run():
         # 'spill_names' is set based on the names of spill's as defined by user
@@ -439,6 +490,18 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
     def netcdf_format(self):
         return self._format
 
+    @property
+    def write_buffer_size(self):
+        return self._write_buffer_size
+
+    @write_buffer_size.setter
+    def write_buffer_size(self, value):
+        value = int(value)
+        if value < 0:
+            raise ValueError('write_buffer_size must be 0 or more bytes')
+
+        self._write_buffer_size = value
+
     def _update_var_attributes(self, spills):
         '''
         update instance specific self._var_attributes
@@ -554,6 +617,9 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
         if not self.on:
             return
 
+        # in case the last run didn't finish
+        self._close_datasets()
+
         super(NetCDFOutput, self).prepare_for_model_run(model_start_time,
                                                         spills, **kwargs)
 
@@ -715,6 +781,15 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
 
             time_stamp = sc.current_time_stamp
 
+            if self.write_buffer_size > 0:
+                try:
+                    self._buffer_step(file_, sc)
+                except Exception:
+                    self._close_datasets()
+                    raise
+
+                continue
+
             with nc.Dataset(file_, 'a') as rootgrp:
                 rg_vars = rootgrp.variables
                 idx = len(rg_vars['time'])
@@ -751,15 +826,132 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
                         grp.variables[key][idx] = val
 
         if islast_step:
+            # the files have to be complete to zip them
+            self._close_datasets()
+
             if self.zip_output is True:
                 self._zip_output_files()
 
-        self._start_idx = _end_idx  # set _start_idx for the next timestep
+        if self.write_buffer_size == 0:
+            # set _start_idx for the next timestep
+            self._start_idx = _end_idx
 
         return {'filename': (self.filename,
                              self._u_filename),
                 'time_stamp': time_stamp.isoformat()}
 
+    def _get_var_data(self, sc, var_name):
+        if var_name == 'longitude':
+            return sc['positions'][:, 0]
+        elif var_name == 'latitude':
+            return sc['positions'][:, 1]
+        elif var_name == 'depth':
+            return sc['positions'][:, 2]
+        else:
+            return sc[var_name]
+
+    def _buffer_step(self, file_, sc):
+        '''
+        add the output for sc to the buffer of file_, and write the buffer
+        if it's full
+        '''
+        try:
+            rootgrp = self._datasets[file_]
+        except KeyError:
+            rootgrp = self._datasets[file_] = nc.Dataset(file_, 'a')
+            self._buffers[file_] = _StepBuffer(len(rootgrp.dimensions['data']))
+
+        buf = self._buffers[file_]
+        time_var = rootgrp.variables['time']
+
+        buf.append(nc.date2num(sc.current_time_stamp,
+                               time_var.units,
+                               time_var.calendar),
+                   len(sc),
+                   {var_name: self._get_var_data(sc, var_name)
+                    for var_name in self.arrays_to_output},
+                   sc.mass_balance)
+
+        if buf.nbytes >= self.write_buffer_size:
+            self._write_buffer(file_)
+
+    def _write_buffer(self, file_):
+        '''
+        write the buffered steps for file_ -- one slab per variable
+        '''
+        buf = self._buffers[file_]
+        if len(buf) == 0:
+            return
+
+        rootgrp = self._datasets[file_]
+        rg_vars = rootgrp.variables
+
+        idx = len(rg_vars['time'])
+        end = idx + len(buf)
+
+        rg_vars['time'][idx:end] = buf.times
+        rg_vars['particle_count'][idx:end] = buf.particle_counts
+
+        _end_idx = buf.start_idx + sum(buf.particle_counts)
+
+        for var_name, data in buf.arrays.items():
+            rg_vars[var_name][buf.start_idx:_end_idx] = np.concatenate(data)
+
+        # mass balance keys can be added during the run
+        mb_values = {}
+        for i, mass_balance in enumerate(buf.mass_balance):
+            for key, val in mass_balance.items():
+                mb_values.setdefault(key, ([], []))
+                mb_values[key][0].append(idx + i)
+                mb_values[key][1].append(val)
+
+        if mb_values:
+            grp = rootgrp.groups['mass_balance']
+            for key, (steps, vals) in mb_values.items():
+                if key not in grp.variables:
+                    self._create_nc_var(grp,
+                                        key, 'float', ('time', ),
+                                        (self._chunksize,)
+                                        )
+
+                if steps[-1] - steps[0] == len(steps) - 1:
+                    grp.variables[key][steps[0]:steps[-1] + 1] = vals
+                else:
+                    for step, val in zip(steps, vals):
+                        grp.variables[key][step] = val
+
+        buf.start_idx = self._start_idx = _end_idx
+        buf.clear()
+
+    def _close_datasets(self):
+        '''
+        write any buffered steps and close the files kept open for the run
+        '''
+        try:
+            for file_ in self._datasets:
+                self._write_buffer(file_)
+        finally:
+            datasets = self._datasets
+            self._datasets = {}
+            self._buffers = {}
+
+            for rootgrp in datasets.values():
+                rootgrp.close()
+
+    def close(self):
+        '''
+        write any buffered steps and close the files kept open for the run
+        '''
+        self._close_datasets()
+
+    def post_model_run(self):
+        '''
+        write any buffered steps and close the files
+        '''
+        self._close_datasets()
+
+        super(NetCDFOutput, self).post_model_run()
+
     def _zip_output_files(self):
         zfilename = self.zip_filename
         zipf = zipfile.ZipFile(zfilename, 'w')
@@ -805,6 +997,7 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
         '''
         super(NetCDFOutput, self).rewind()
 
+        self._close_datasets()
         self._start_idx = 0
 
     # fixme: we should use the code in nc_particles for this!!!
@@ -872,107 +1065,298 @@ class NetCDFOutput(Outputter, OutputterFilenameMixin):
                                ]
         """
 
-        if not os.path.exists(netcdf_file):
-            raise IOError('File not found: {0}'.format(netcdf_file))
-
-        arrays_dict = {}
-        with nc.Dataset(netcdf_file) as data:
-            _start_ix = 0
-
-            # first find the index of index in which we are interested
-            time_ = data.variables['time']
-
+        with NetCDFTrajectoryReader(netcdf_file,
+                                    standard_arrays=klass.standard_arrays
+                                    ) as reader:
             if time is None and index is None:
                 # there should only be 1 time in file. Read and
                 # return data associated with it
-                if len(time_) > 1:
+                if len(reader) > 1:
                     raise ValueError('More than one time found in netcdf '
                                      'file. Please specify time/index for '
                                      'which data is desired')
                 else:
                     index = 0
-            else:
-                if time is not None:
-                    time_offset = nc.date2num(time, time_.units,
-                                              calendar=time_.calendar)
-                    if time_offset < 0:
-                        'desired time is before start of model'
-                        index = 0
-                    else:
-                        index = abs(time_[:] - time_offset).argmin()
-                elif index is not None:
-                    if index < 0:
-                        index = len(time_) + index
-
-            for idx in range(index):
-                _start_ix += data.variables['particle_count'][idx]
-
-            _stop_ix = _start_ix + data.variables['particle_count'][index]
-            elem = data.variables['particle_count'][index]
-
-            c_time = nc.num2date(time_[index], time_.units,
-                                 calendar=time_.calendar)
-
-            arrays_dict['current_time_stamp'] = np.array(c_time)
-
-            # figure out what arrays to read in:
-            if which_data == 'standard':
-                data_arrays = set(klass.standard_arrays)
-
-                # swap out positions:
-                [data_arrays.discard(x) for x in ('latitude',
-                                                  'longitude',
-                                                  'depth')]
-                data_arrays.add('positions')
-            elif which_data == 'all':
-                # pull them from the nc file
-                data_arrays = set(data.variables.keys())
-
-                # remove the irrelevant ones:
-                [data_arrays.discard(x) for x in ('time',
-                                                  'particle_count',
-                                                  'latitude',
-                                                  'longitude',
-                                                  'depth')]
-                data_arrays.add('positions')
-            else:  # should be list of data arrays
-                data_arrays = set(which_data)
-
-            # get the data
-            for array_name in data_arrays:
-                # special case time and positions:
-                if array_name == 'positions':
-                    positions = np.zeros((elem, 3), dtype=world_point_type)
-
-                    positions[:, 0] = \
-                        data.variables['longitude'][_start_ix:_stop_ix]
-                    positions[:, 1] = \
-                        data.variables['latitude'][_start_ix:_stop_ix]
-                    positions[:, 2] = \
-                        data.variables['depth'][_start_ix:_stop_ix]
-
-                    arrays_dict['positions'] = positions
-                else:
-                    try:
-                        arrays_dict[array_name] = data.variables[array_name][_start_ix:_stop_ix]
-                    except KeyError:
-                        # it's OK if it's not there, not all standard_arrays
-                        # will always be output
-                        pass
-
-            # get mass_balance
-            weathering_data = {}
-            if 'mass_balance' in data.groups:
-                mb = data.groups['mass_balance']
-
-                for key, val in mb.variables.items():
-                    # assume SI units
-                    weathering_data[key] = val[index]
 
-        return (arrays_dict, weathering_data)
+            return reader.read_step(index=index, time=time,
+                                    which_data=which_data)
 
     def to_dict(self, json_=None):
         dict_ = super(NetCDFOutput, self).to_dict(json_)
         if json_ == 'save':
             dict_['filename'] = os.path.join('./', dict_['filename'])
         return dict_
+
+
+class NetCDFTrajectoryReader(object):
+    """
+    Random access reader for the particle files written by NetCDFOutput.
+
+    The data for all the time steps is stored end to end in the file, with
+    the number of particles of each step in the 'particle_count' variable.
+    The reader computes the offset of every step once, when it is created,
+    so reading any step is a single slice of each variable.
+
+    >>> with NetCDFTrajectoryReader('a_gnome_run.nc') as reader:
+    ...     data, mass_balance = reader.read_step(index=10)
+    ...     for data, mass_balance in reader.iter_steps():
+    ...         do_something(data)
+    ...     traj = reader.trajectory(particle_id=42)
+
+    The data for a step is returned as a dict of arrays, the same as
+    NetCDFOutput.read_data().
+    """
+    def __init__(self, netcdf_file, standard_arrays=None):
+        """
+        :param netcdf_file: Name of the NetCDF file to read. It is kept open
+                            until close() is called.
+
+        :param standard_arrays=None: the arrays read for
+                                     which_data='standard'. Defaults to
+                                     NetCDFOutput.standard_arrays
+        """
+        if not os.path.exists(netcdf_file):
+            raise IOError('File not found: {0}'.format(netcdf_file))
+
+        self.filename = netcdf_file
+        self.standard_arrays = (NetCDFOutput.standard_arrays
+                                if standard_arrays is None
+                                else standard_arrays)
+        self._data = nc.Dataset(netcdf_file)
+
+        variables = self._data.variables
+        self._time = variables['time']
+        self.particle_count = np.asarray(variables['particle_count'][:],
+                                         dtype=np.int64)
+
+        # offsets[i] is the row of the first particle of step i
+        self.offsets = np.zeros((len(self.particle_count) + 1,),
+                                dtype=np.int64)
+        np.cumsum(self.particle_count, out=self.offsets[1:])
+
+        # built the first time trajectory() is called
+        self._id_order = None
+        self._sorted_ids = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._data.close()
+
+    def __len__(self):
+        'number of time steps in the file'
+        return len(self.particle_count)
+
+    @property
+    def variables(self):
+        'the netCDF variables in the file'
+        return self._data.variables
+
+    def _time_stamps(self, time_offsets):
+        return nc.num2date(time_offsets, self._time.units,
+                           calendar=self._time.calendar)
+
+    def time_stamp(self, index):
+        'the time of step index'
+        return self._time_stamps(self._time[index])
+
+    def index_of(self, time):
+        '''
+        The index of the step closest to time. Times before the start of the
+        model give the first step.
+        '''
+        time_offset = nc.date2num(time, self._time.units,
+                                  calendar=self._time.calendar)
+        if time_offset < 0:
+            # desired time is before start of model
+            return 0
+        else:
+            return int(abs(self._time[:] - time_offset).argmin())
+
+    def step_slice(self, index):
+        'slice of the rows for step index'
+        if index < 0:
+            index = len(self) + index
+
+        return slice(self.offsets[index], self.offsets[index + 1])
+
+    def _data_arrays(self, which_data):
+        'figure out what arrays to read in'
+        if which_data == 'standard':
+            data_arrays = set(self.standard_arrays)
+
+            # swap out positions:
+            data_arrays.difference_update(('latitude', 'longitude', 'depth'))
+            data_arrays.add('positions')
+        elif which_data == 'all':
+            # pull them from the nc file
+            data_arrays = set(self._data.variables.keys())
+
+            # remove the irrelevant ones:
+            data_arrays.difference_update(('time', 'particle_count',
+                                           'latitude', 'longitude', 'depth'))
+            data_arrays.add('positions')
+        else:  # should be list of data arrays
+            data_arrays = set(which_data)
+
+        return data_arrays
+
+    def _read_rows(self, rows, data_arrays):
+        '''
+        read the rows (a slice or an array of indices) of the data arrays
+        '''
+        variables = self._data.variables
+        arrays_dict = {}
+
+        for array_name in data_arrays:
+            # special case positions:
+            if array_name == 'positions':
+                lon = variables['longitude'][rows]
+                positions = np.zeros((len(lon), 3), dtype=world_point_type)
+
+                positions[:, 0] = lon
+                positions[:, 1] = variables['latitude'][rows]
+                positions[:, 2] = variables['depth'][rows]
+
+                arrays_dict['positions'] = positions
+            else:
+                try:
+                    arrays_dict[array_name] = variables[array_name][rows]
+                except KeyError:
+                    # it's OK if it's not there, not all standard_arrays
+                    # will always be output
+                    pass
+
+        return arrays_dict
+
+    def _mass_balance_vars(self):
+        if 'mass_balance' in self._data.groups:
+            return self._data.groups['mass_balance'].variables
+        else:
+            return {}
+
+    def read_step(self, index=None, time=None, which_data='standard'):
+        """
+        Read the data for one step.
+
+        :param int index: Index of the step. Negative values count from the
+                          end.
+
+        :param time: If not None, read the step closest to this time
+                     instead of index.
+
+        :param which_data='standard': Which data arrays are desired.
+                                      Options are:
+                                      ('standard', 'most', 'all',
+                                      [list_of_array_names])
+
+        :returns: (data_arrays, mass_balance) -- the same as
+                  NetCDFOutput.read_data()
+        """
+        if time is not None:
+            index = self.index_of(time)
+        elif index is None:
+            raise ValueError('Please specify time/index for which data is '
+                             'desired')
+        elif index < 0:
+            index = len(self) + index
+
+        arrays_dict = self._read_rows(self.step_slice(index),
+                                      self._data_arrays(which_data))
+        arrays_dict['current_time_stamp'] = np.array(self.time_stamp(index))
+
+        # assume SI units
+        weathering_data = {key: val[index]
+                           for key, val in self._mass_balance_vars().items()}
+
+        return (arrays_dict, weathering_data)
+
+    def iter_steps(self, which_data='standard', steps_per_read=100,
+                   start=0, stop=None):
+        """
+        Iterate through the steps, in order.
+
+        The data is read steps_per_read steps at a time, as one slab per
+        variable, and split up into steps.
+
+        :param which_data='standard': Which data arrays are desired -- see
+                                      read_step()
+        :param steps_per_read=100: number of steps read at once
+        :param start=0: first step
+        :param stop=None: stop before this step. None is the end of the file.
+
+        :returns: iterator of (data_arrays, mass_balance) for each step
+        """
+        data_arrays = self._data_arrays(which_data)
+        mb_vars = self._mass_balance_vars()
+
+        if stop is None:
+            stop = len(self)
+
+        for first in range(start, stop, steps_per_read):
+            last = min(first + steps_per_read, stop)
+            row_0 = self.offsets[first]
+
+            slab = self._read_rows(slice(row_0, self.offsets[last]),
+                                   data_arrays)
+            time_stamps = self._time_stamps(self._time[first:last])
+            mass_balance = {key: val[first:last]
+                            for key, val in mb_vars.items()}
+
+            for i, index in enumerate(range(first, last)):
+                rows = slice(self.offsets[index] - row_0,
+                             self.offsets[index + 1] - row_0)
+
+                arrays_dict = {name: array[rows]
+                               for name, array in slab.items()}
+                arrays_dict['current_time_stamp'] = np.array(time_stamps[i])
+
+                yield (arrays_dict,
+                       {key: val[i] for key, val in mass_balance.items()})
+
+    def _build_id_index(self):
+        ids = np.asarray(self._data.variables['id'][:])
+
+        # a stable sort keeps the rows for an id in time order
+        self._id_order = np.argsort(ids, kind='stable')
+        self._sorted_ids = ids[self._id_order]
+
+    def rows_of(self, particle_id):
+        '''
+        the rows in the file for particle_id, in time order
+        '''
+        if self._id_order is None:
+            self._build_id_index()
+
+        first, last = np.searchsorted(self._sorted_ids,
+                                      [particle_id, particle_id + 1])
+        return self._id_order[first:last]
+
+    def trajectory(self, particle_id, which_data='standard'):
+        """
+        All the data for one particle.
+
+        The first call reads the 'id' variable and builds an index of the
+        rows for each id, so later calls only read the rows they need.
+
+        :param particle_id: the 'id' of the particle
+        :param which_data='standard': Which data arrays are desired -- see
+                                      read_step()
+
+        :returns: dict of arrays, one value per step the particle is in.
+                  'step' is the index of the steps, and
+                  'current_time_stamp' their times.
+        """
+        rows = self.rows_of(particle_id)
+        steps = np.searchsorted(self.offsets, rows, side='right') - 1
+
+        arrays_dict = self._read_rows(rows, self._data_arrays(which_data))
+        arrays_dict['step'] = steps
+        arrays_dict['current_time_stamp'] = \
+            np.array(self._time_stamps(self._time[:][steps]))
+
+        return arrays_dict
@@ -106,8 +106,10 @@ class Outputter(GnomeId):
         :param surface_conc = None: Compute surface concentration
                                   Any non-zero string will compute (and output)
                                   the surface concentration the contents of the
-                                  string determine the algorithm used. "kde" is
-                                  currently the only working option.
+                                  string determine the algorithm used: "kde"
+                                  or "kde_fft" -- a faster, grid binned
+                                  version of "kde" for large numbers of
+                                  particles.
         :type surface_conc: string or None
         """
 
@@ -296,6 +298,14 @@ class Outputter(GnomeId):
         """
         pass
 
+    def close(self):
+        """
+        Override this method if a derived class keeps files or other
+        resources open during a run. Called by the model if a step fails,
+        so that they aren't left open until the next rewind.
+        """
+        pass
+
     def write_output(self, step_num, islast_step=False):
         """
         called by the model at the end of each time step
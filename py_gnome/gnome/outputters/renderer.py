@@ -10,11 +10,13 @@ This one used the new map_canvas, which uses the gd rendering lib.
 import os
 from os.path import basename
 import glob
+from collections import deque
+from multiprocessing import get_context
 
 import numpy as np
 import py_gd
 
-from colander import SchemaNode, String, drop
+from colander import SchemaNode, String, Int, drop
 
 from gnome.basic_types import oil_status
 
@@ -47,6 +49,57 @@ class RendererSchema(BaseOutputterSchema):
     image_size = base_schema.ImageSize(save=True, update=False, missing=drop)
     output_dir = SchemaNode(String(), save=True, update=True, test_equal=False)
     draw_ontop = SchemaNode(String(), save=True, update=True)
+    render_workers = SchemaNode(Int(), save=True, update=True, missing=drop)
+
+
+# state of a frame rendering process, set by _init_frame_worker()
+_frame_worker = {}
+
+
+def _init_frame_worker(background, palette, draw_back_to_fore):
+    image = py_gd.Image(background.shape[0], background.shape[1],
+                        preset_colors=None)
+    image.add_colors(palette)
+
+    _frame_worker.update(image=image,
+                         background=background,
+                         draw_back_to_fore=draw_back_to_fore)
+
+
+def _render_frame(frame):
+    '''
+    draw and save one frame in a rendering process
+
+    :param frame: dict with:
+                  'layers': list of (pixel coords, color, shape) of the
+                            elements, in drawing order
+                  'timestamp': arguments for draw_text() -- or None
+                  'files': list of (filename, file type) to save
+                  'return_image': whether to return the image
+
+    :returns: the frame as an array (see py_gd.Image.__array__) if
+              return_image is set, otherwise None
+    '''
+    image = _frame_worker['image']
+
+    if _frame_worker['draw_back_to_fore']:
+        image.set_data(_frame_worker['background'])
+    else:
+        image.clear('transparent')
+
+    for points, color, shape in frame['layers']:
+        if shape == 'x':
+            image.draw_xes(points, diameter=2, color=color)
+        else:
+            image.draw_dots(points, diameter=2, color=color)
+
+    if frame['timestamp'] is not None:
+        image.draw_text(*frame['timestamp'])
+
+    for filename, file_type in frame['files']:
+        image.save(filename, file_type=file_type)
+
+    return np.asarray(image) if frame['return_image'] else None
 
 
 class Renderer(Outputter, MapCanvas):
@@ -98,6 +151,7 @@ class Renderer(Outputter, MapCanvas):
                  output_start_time=None,
                  on=True,
                  timestamp_attrib={},
+                 render_workers=0,
                  **kwargs
                  ):
         """
@@ -135,6 +189,17 @@ class Renderer(Outputter, MapCanvas):
             is to draw 'forecast' LEs, which are in black on top
         :type draw_ontop: str
 
+        :param render_workers=0: number of processes to draw and save the
+            frames in. If 0, each frame is drawn and saved in write_output().
+            Otherwise, write_output() sends the elements to a pool of
+            processes that have a copy of the background image, and goes
+            on with the model run. The frames are added to the animation in
+            order as they are finished, and all of them are done by the end
+            of post_model_run(). The grid property layers (add_vec_prop())
+            need the model's data, so they are always drawn in
+            write_output().
+        :type render_workers: int
+
         Following args are passed to base class Outputter's init:
 
         :param cache: sets the cache object from which to read prop. The model
@@ -177,6 +242,11 @@ class Renderer(Outputter, MapCanvas):
         self.draw_ontop = draw_ontop
         self.draw_back_to_fore = draw_back_to_fore
 
+        # the frame rendering processes, and the frames sent to them, in
+        # order -- see render_workers
+        self._render_pool = None
+        self._frames = deque()
+
         Outputter.__init__(self,
                            cache,
                            on,
@@ -230,6 +300,8 @@ class Renderer(Outputter, MapCanvas):
         self.grids = []
         self.props = []
 
+        self.render_workers = render_workers
+
     @property
     def delay(self):
         return self._delay if 'gif' in self.formats else -1
@@ -313,6 +385,8 @@ class Renderer(Outputter, MapCanvas):
                                                   self.background_map_name + ftype),
                                      file_type=ftype)
 
+        self._start_render_pool()
+
     def set_timestamp_attrib(self, **kwargs):
         """
         Function to set details of the timestamp's appearance when printed.
@@ -356,11 +430,21 @@ class Renderer(Outputter, MapCanvas):
         :param time: the datetime object representing the timestamp
         :type time: datetime
         """
+        args = self._timestamp_args(time)
+
+        if args is not None:
+            self.fore_image.draw_text(*args)
+
+    def _timestamp_args(self, time):
+        """
+        the arguments to draw_text() to draw the timestamp, or None if it
+        is not drawn
+        """
         d = self.timestamp_attribs
         on = d['on'] if 'on' in d else True
 
         if not on:
-            return
+            return None
 
         dt_format = d.get('format', '%c')
 
@@ -375,8 +459,8 @@ class Renderer(Outputter, MapCanvas):
 
         align = d.get('alignment', 'cb')
 
-        self.fore_image.draw_text(time.strftime(dt_format),
-                                  position, size, color, align, background)
+        return (time.strftime(dt_format),
+                position, size, color, align, background)
 
     def clean_output_files(self):
 
@@ -486,30 +570,50 @@ class Renderer(Outputter, MapCanvas):
 
         :param sc: a SpillContainer object to draw
 
+        """
+        for positions, color, shape in self._element_layers(sc):
+            self.draw_points(positions,
+                             diameter=2,
+                             color=color,
+                             shape=shape)
+
+    def _element_layers(self, sc):
+        """
+        the sets of elements of sc to draw, each with its color and shape
+
+        :returns: list of (positions, color, shape)
         """
         # TODO: add checks for the other status flags!
 
-        if sc.num_released > 0:  # nothing to draw if no elements
-            if sc.uncertain:
-                color = 'uncert_LE'
-            else:
-                color = 'LE'
+        if sc.num_released == 0:  # nothing to draw if no elements
+            return []
 
-            positions = sc['positions']
+        if sc.uncertain:
+            color = 'uncert_LE'
+        else:
+            color = 'LE'
 
-            # which ones are on land?
-            on_land = sc['status_codes'] == oil_status.on_land
-            self.draw_points(positions[on_land],
-                             diameter=2,
-                             color='black',
-                             # color=color,
-                             shape="x")
-            # draw the four pixels for the elements not on land and
-            # not off the map
-            self.draw_points(positions[~on_land],
-                             diameter=2,
-                             color=color,
-                             shape="round")
+        positions = sc['positions']
+
+        # which ones are on land?
+        on_land = sc['status_codes'] == oil_status.on_land
+
+        # on land as black xes, then the four pixels for the elements not
+        # on land and not off the map
+        return [(positions[on_land], 'black', 'x'),
+                (positions[~on_land], color, 'round')]
+
+    def _draw_order(self, scp):
+        """
+        the spill containers of scp, in the order to draw them --
+        self.draw_ontop last, so it is on top
+        """
+        if len(scp) == 1:
+            return [scp[0]]
+        elif self.draw_ontop == 'forecast':
+            return [scp[1], scp[0]]
+        else:
+            return [scp[0], scp[1]]
 
     def draw_raster_map(self):
         """
@@ -586,24 +690,31 @@ class Renderer(Outputter, MapCanvas):
         image_filename = os.path.join(self.output_dir,
                                       self.foreground_filename_format.format(step_num))
 
+        # draw prop for self.draw_ontop second so it draws on top
+        scp = self.cache.load_timestep(step_num).items()
+        time_stamp = scp[0].current_time_stamp
+
+        if self._render_pool is not None:
+            files = []
+            for ftype in self.formats:
+                if ftype != 'gif':
+                    image_filename += ftype
+                    files.append((image_filename, ftype))
+
+            self._submit_frame(scp, time_stamp, files,
+                               'gif' in self.formats)
+            self.last_filename = image_filename
+
+            return {'image_filename': image_filename,
+                    'time_stamp': time_stamp}
+
         self.clear_foreground()
 
         if self.draw_back_to_fore:
             self.copy_back_to_fore()
 
-        # draw prop for self.draw_ontop second so it draws on top
-        scp = self.cache.load_timestep(step_num).items()
-        if len(scp) == 1:
-            self.draw_elements(scp[0])
-        else:
-            if self.draw_ontop == 'forecast':
-                self.draw_elements(scp[1])
-                self.draw_elements(scp[0])
-            else:
-                self.draw_elements(scp[0])
-                self.draw_elements(scp[1])
-
-        time_stamp = scp[0].current_time_stamp
+        for sc in self._draw_order(scp):
+            self.draw_elements(sc)
 
         self.draw_timestamp(time_stamp)
         self.draw_props(time_stamp)
@@ -625,9 +736,94 @@ class Renderer(Outputter, MapCanvas):
         Override this method if a derived class needs to perform
         any actions after a model run is complete (StopIteration triggered)
         """
+        self._finish_frames()
+
         if 'gif' in self.formats:
             self.animation.close_anim()
 
+    def rewind(self):
+        super(Renderer, self).rewind()
+
+        self._stop_render_pool()
+
+    def _start_render_pool(self):
+        """
+        start the frame rendering processes, with a copy of the background
+
+        The processes are spawned rather than forked: the model may have
+        other threads running (the cache writer, the time slice prefetcher),
+        and forking copies any locks they hold. Everything the processes
+        need is passed to them in initargs.
+        """
+        self._stop_render_pool()
+
+        if self.render_workers > 0 and not self.props:
+            palette = [(name, self.fore_image.get_colors()[name])
+                       for name in self.fore_image.get_color_names()]
+
+            context = get_context('spawn')
+            self._render_pool = context.Pool(self.render_workers,
+                                             initializer=_init_frame_worker,
+                                             initargs=(self.back_asarray(),
+                                                       palette,
+                                                       self.draw_back_to_fore))
+
+    def _stop_render_pool(self):
+        if self._render_pool is not None:
+            self._render_pool.terminate()
+            self._render_pool.join()
+            self._render_pool = None
+
+        self._frames.clear()
+
+    def _submit_frame(self, scp, time_stamp, files, add_to_animation):
+        """
+        send a frame to the rendering processes
+
+        scp is the step loaded from the cache, not the model's live
+        spill containers. The elements are projected to pixels here, so
+        the processes only need to draw them, and only the pixel
+        coordinates are sent to them -- not the whole step.
+        """
+        layers = []
+        for sc in self._draw_order(scp):
+            for positions, color, shape in self._element_layers(sc):
+                layers.append((self.projection.to_pixel(positions,
+                                                        asint=True),
+                               color, shape))
+
+        frame = {'layers': layers,
+                 'timestamp': self._timestamp_args(time_stamp),
+                 'files': files,
+                 'return_image': add_to_animation}
+
+        self._frames.append(self._render_pool.apply_async(_render_frame,
+                                                          (frame,)))
+
+        # keep the frames in flight (and their memory) bounded
+        max_frames = 2 * self.render_workers
+        while self._frames and (self._frames[0].ready() or
+                                len(self._frames) > max_frames):
+            self._add_rendered_frame(self._frames.popleft().get())
+
+    def _add_rendered_frame(self, frame):
+        if frame is not None:
+            self.fore_image.set_data(frame)
+            self.animation.add_frame(self.fore_image, self.delay)
+
+    def _finish_frames(self):
+        """
+        wait for all the frames to be rendered, and stop the processes
+        """
+        if self._render_pool is None:
+            return
+
+        try:
+            while self._frames:
+                self._add_rendered_frame(self._frames.popleft().get())
+        finally:
+            self._stop_render_pool()
+
     def _draw(self, step_num):
         """
         create a small function so prop arrays are garbage collected from
@@ -636,15 +832,8 @@ class Renderer(Outputter, MapCanvas):
 
         # draw prop for self.draw_ontop second so it draws on top
         scp = self.cache.load_timestep(step_num).items()
-        if len(scp) == 1:
-            self.draw_elements(scp[0])
-        else:
-            if self.draw_ontop == 'forecast':
-                self.draw_elements(scp[1])
-                self.draw_elements(scp[0])
-            else:
-                self.draw_elements(scp[0])
-                self.draw_elements(scp[1])
+        for sc in self._draw_order(scp):
+            self.draw_elements(sc)
 
         return scp[0].current_time_stamp
 
@@ -8,6 +8,8 @@ set of arrays. The spills themselves provide some of the arrays themselves
 """
 
 import os
+import hashlib
+from contextlib import contextmanager
 
 import numpy as np
 
@@ -23,12 +25,29 @@ from gnome.spills.substance import NonWeatheringSubstance
 
 class FateDataView(AddLogger):
     """
-    need a docstring -- what is this for?
+    The data the weatherers work on: the spill container's data arrays for
+    the elements with a given fate_status (and 'mass' > 0).
+
+    If all the elements match, the data is the spill container's own arrays.
+    Otherwise it is a copy of the requested arrays for the matching
+    elements, which is written back to the spill container by update_sc().
+
+    The indices of the elements for each fate_status, and the arrays copied
+    for them, are kept until 'fate_status' or 'mass' could have changed, so
+    only the first weatherer in a substep pays for the masking and copying.
+    Arrays read directly from the spill container (sc['name']) may be
+    changed by the caller, so they are copied again the next time they are
+    needed. A view that was changed but not written back with update_sc()
+    (e.g. by the ROC Burn and Skim) is copied again too -- only changes
+    that are written back are seen by the next weatherer.
     """
 
     _dicts_ = ('surface_weather', 'subsurf_weather', 'skim', 'burn',
                'disperse', 'non_weather', 'all')
 
+    # if these change, the elements in each view change
+    _mask_arrays = ('fate_status', 'mass')
+
     def __init__(self):
         self.reset()
 
@@ -39,42 +58,104 @@ class FateDataView(AddLogger):
         # properties of old LEs and properties of newly released LEs
         self.all = {}
 
+        # indices into the SC arrays for each fate_status --
+        # None if all elements are included
+        self._indices = {}
+
+        # arrays accessed directly in the SC since they were copied
+        self._accessed = set()
+
+        # views returned by get_data() that haven't been passed to
+        # update_sc() yet
+        self._checked_out = set()
+
+    def array_accessed(self, name=None):
+        '''
+        Called when a data array is accessed directly in the SpillContainer
+        -- it could be changed, so the copy in the view is not valid anymore.
+        The copy is dropped on the next call to get_data(), so changes to the
+        copy made before update_sc() are not lost.
+
+        :param name=None: name of the array. None means all of them.
+        '''
+        self._accessed.add(name)
+
+    def _drop_accessed(self):
+        if len(self._accessed) == 0:
+            return
+
+        if (None in self._accessed or
+                not self._accessed.isdisjoint(self._mask_arrays)):
+            self.reset()
+            return
+
+        for fate in self._dicts_:
+            data = getattr(self, fate)
+            if len(data) > 0 and fate in self._indices:
+                if self._indices[fate] is not None:
+                    for name in self._accessed:
+                        data.pop(name, None)
+
+        self._accessed.clear()
+
     def _get_fate_mask(self, sc, fate):
         '''
         get fate_status mask over SC - only include LEs with 'mass' > 0.0
         '''
+        arrays = sc._data_arrays
+
         if fate == 'all':
             # look at all fate data
-            w_mask = np.asarray([True] * len(sc))
+            w_mask = np.ones((len(sc),), dtype=bool)
         else:
-            w_mask = (sc['fate_status'] & getattr(bt_fate, fate) == getattr(bt_fate, fate))
+            w_mask = (arrays['fate_status'] & getattr(bt_fate, fate) == getattr(bt_fate, fate))
 
-        w_mask = np.logical_and(w_mask, sc['mass'] > 0.0)
+        w_mask = np.logical_and(w_mask, arrays['mass'] > 0.0)
         return w_mask
 
-    def _set_data(self, sc, array_types, fate_mask, fate_status):
+    def _get_indices(self, sc, fate_status):
         '''
-        Set the data arrays in the FateDataView
+        indices of the elements with fate_status -- None if all elements
+        '''
+        try:
+            return self._indices[fate_status]
+        except KeyError:
+            fate_mask = self._get_fate_mask(sc, fate_status)
 
-        fate_mask is the data already masked for the desired 'fate' option
+            if np.all(fate_mask):
+                idx = None
+            else:
+                idx = np.flatnonzero(fate_mask)
+
+            self._indices[fate_status] = idx
+            return idx
+
+    def _set_data(self, sc, array_types, fate_status):
+        '''
+        Set the data arrays in the FateDataView
 
-        fate_status is the status the mask is for ('surface_weather', etc.)
+        Only the arrays that aren't already there are copied.
         '''
         # # return all data associated with substance
         # if 'substance' in sc:
         #     fate_mask = np.logical_and(sc['substance'] == self.substance_id,
         #                                fate_mask)
 
-        if np.all(fate_mask):
+        idx = self._get_indices(sc, fate_status)
+
+        if idx is None:
             # no need to make a copy of array
             setattr(self, fate_status, sc._data_arrays)
         else:
             dict_to_update = getattr(self, fate_status)
+            if dict_to_update is sc._data_arrays:
+                dict_to_update = {}
+
             for at in array_types:
                 array = sc._array_name(at)
 
-                #if array not in dict_to_update:
-                dict_to_update[array] = sc[array][fate_mask]
+                if array not in dict_to_update:
+                    dict_to_update[array] = sc._data_arrays[array][idx]
 
             setattr(self, fate_status, dict_to_update)
 
@@ -86,10 +167,16 @@ class FateDataView(AddLogger):
         Options are: 'all', 'surface_weather', 'subsurf_weather', 'skim', 'non_weather',
         'burn'
         '''
-        self._set_data(sc,
-                       array_types,
-                       self._get_fate_mask(sc, fate_status),
-                       fate_status)
+        if (fate_status in self._checked_out and
+                getattr(self, fate_status) is not sc._data_arrays):
+            # the last caller didn't write its changes back, so they are
+            # dropped -- as they were when each call made new copies
+            setattr(self, fate_status, {})
+
+        self._drop_accessed()
+        self._set_data(sc, array_types, fate_status)
+        self._checked_out.add(fate_status)
+
         return getattr(self, fate_status)
 
     def update_sc(self, sc, fate_status='surface_weather'):
@@ -101,22 +188,32 @@ class FateDataView(AddLogger):
         the end of a weathering step, this ensures zero mass LEs are removed
         from the arrays.
 
+        The copies of the arrays are kept for the next weatherer, unless
+        'fate_status' or 'mass' changed so that the elements in the views
+        are different.
+
         .. note:: the 'id' of each LE corresponds with the index into SC array
                   when it was added. if LEs are removed, then this will not be
-                  the case. Do not rely on this indexing. Instead, get the mask
-                  again - the assumption is that the fate_mask should be the
-                  same between getting the data and resync'ing the original arrays
-                  in the SC
+                  the case. Do not rely on this indexing. Instead, use the
+                  indices found when the data was copied - the assumption is
+                  that the elements don't change between getting the data and
+                  resync'ing the original arrays in the SC
         '''
+        self._checked_out.discard(fate_status)
+
         d_to_sync = getattr(self, fate_status)
 
         if d_to_sync is sc._data_arrays:
+            # the weatherer worked on the SC arrays directly
             self.reset()
             #for fs in self._dicts_:
             #    self._set_data( sc, getattr(self, fs).keys(), self._get_fate_mask(sc, fs), fs)
             return
 
-        w_mask = self._get_fate_mask(sc, fate_status)
+        if len(d_to_sync) == 0:
+            return
+
+        w_idx = self._get_indices(sc, fate_status)
 
         # if 'substance' in sc:
         #     w_mask = np.logical_and(sc['substance'] == self.substance_id,
@@ -130,7 +227,7 @@ class FateDataView(AddLogger):
         # and let it be recreated when the next weatherer asks for data.
         reset_view = False
         if ('fate_status' in d_to_sync and
-                np.any(sc['fate_status'][w_mask] != d_to_sync['fate_status'])):
+                np.any(sc._data_arrays['fate_status'][w_idx] != d_to_sync['fate_status'])):
             reset_view = True
         elif ('mass' in d_to_sync and
               np.any(np.isclose(d_to_sync['mass'], 0))):
@@ -140,23 +237,102 @@ class FateDataView(AddLogger):
                               "reset_view")
 
         for key, val in d_to_sync.items():
-            sc[key][w_mask] = val
+            sc._data_arrays[key][w_idx] = val
 
         if reset_view:
             self.reset()
+        else:
+            # copies in the other views may be out of date now
+            for fate in self._dicts_:
+                if fate != fate_status and fate in self._indices:
+                    if self._indices[fate] is not None:
+                        setattr(self, fate, {})
 
     def _reset_fatedata(self, sc, ix):
         '''
         reset all arrays that contain LE with 'id' = ix
+
+        The number of elements changed, so the indices of every fate_status
+        are found again.
         '''
+        self._indices = {}
+
         for fate in self._dicts_:
             data = getattr(self, fate)
-            if len(data) > 0:
-                idx = np.where(data['id'] == ix)[0]
-                if len(idx) > 0:
-                    self._set_data(sc, data.keys(),
-                                   self._get_fate_mask(sc, fate),
-                                   fate)
+            if len(data) > 0 and data is not sc._data_arrays:
+                setattr(self, fate, {})
+                if np.any(data['id'] == ix):
+                    self._set_data(sc, list(data.keys()), fate)
+
+
+class EnvironmentSamples(object):
+    """
+    Store of the environment values (wind speed, wave values, water
+    properties, ...) sampled at the elements' positions.
+
+    Each weatherer used to sample the environment itself, so the wind was
+    interpolated to the same positions by Evaporation, Emulsification,
+    NaturalDispersion, Dissolution, Langmuir and Waves, for every substep.
+    With this store, a value is computed by the first weatherer that asks
+    for it, and the others get the stored value.
+
+    Values are keyed on a name, the model_time and the positions they were
+    sampled at, so a value is never used for other times or elements. The
+    SpillContainer holds one store, which is cleared with its FateDataView
+    at each time step.
+
+    .. note:: the stored values are shared between weatherers -- they must
+              not be changed in place.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._samples = {}
+
+    def __len__(self):
+        return len(self._samples)
+
+    @staticmethod
+    def _points_key(points):
+        if points is None:
+            return None
+
+        points = np.ascontiguousarray(points)
+        return (points.shape, points.dtype.str,
+                hashlib.sha1(points.view(np.uint8)).digest())
+
+    def get(self, name, points, model_time, compute):
+        '''
+        Return the value stored for name at (points, model_time). If there
+        isn't one, it is computed by calling compute() and stored.
+
+        :param name: hashable name of the value -- should include
+                     anything else the value depends on (the environment
+                     object, units, etc.)
+        :param points: positions the value is sampled at. None if the value
+                       doesn't depend on position.
+        :param model_time: time the value is sampled at. None if the value
+                           doesn't depend on time.
+        :param compute: callable with no arguments that computes the value
+        '''
+        key = (name, model_time, self._points_key(points))
+
+        try:
+            return self._samples[key]
+        except KeyError:
+            value = compute()
+            self._samples[key] = value
+
+            return value
+
+    def get_water(self, water, attr, unit=None):
+        '''
+        Return water.get(attr, unit) -- stored, so the unit conversion is
+        done once per time step.
+        '''
+        return self.get(('water', id(water), attr, unit), None, None,
+                        lambda: water.get(attr, unit))
 
 
 class SpillContainerData(object):
@@ -277,7 +453,9 @@ class SpillContainerData(object):
             'compare dict not including _data_arrays'
             if isinstance(val, dict):
                 val_is_dict.append(key)
-            elif key == '_substances_spills' or key == '_fate_data_view':
+            elif key in ('_substances_spills', '_fate_data_view',
+                         'environment_samples', '_in_water_index',
+                         '_bufs'):
                 '''
                 this is just another view of the data - no need to write extra
                 code to check equality for this
@@ -364,14 +542,59 @@ class SpillContainer(AddLogger, SpillContainerData):
 
     positions = spill_container['positions'] : returns a (num_LEs, 3) array of
     world_point_types
+
+    Each data array is a view of the first len(sc) rows of a larger backing
+    array, that grows geometrically as elements are released, so a
+    continuous release doesn't copy all the data every time it releases
+    elements.
     """
+    # minimum number of elements the backing arrays are made for, and the
+    # factor their size grows by when they are full
+    _min_capacity = 64
+    _growth_factor = 1.5
+    # number of rows moved at a time when removed elements are dropped
+    _compact_chunk = 8192
+
     def __init__(self, uncertain=False):
         super(SpillContainer, self).__init__(uncertain=uncertain)
         self.spills = OrderedCollection(dtype=gnome.spills.spill.Spill)
         self.spills.register_callback(self._spills_changed,
                                       ('add', 'replace', 'remove'))
+
+        # set by shared_in_water_index() while the movers run
+        self._in_water_index = None
+
         self.rewind()
 
+    def __getitem__(self, data_name):
+        """
+        The data array for the LEs
+
+        The array is a view of a backing array that is reused as elements
+        are released and removed, so it is only valid until the elements
+        change: releasing elements may move the data to a new backing
+        array, and model_step_is_done() moves the kept rows forward in place
+        (see _compact()). Get the array again after those, or keep a copy
+        -- the cache and the FateDataView do.
+        """
+        # the caller may change the array, so the FateDataView's copy of it
+        # can't be trusted anymore
+        self._fate_data_view.array_accessed(data_name)
+
+        return self._data_arrays[data_name]
+
+    def __setitem__(self, data_name, array):
+        super(SpillContainer, self).__setitem__(data_name, array)
+
+        self._fate_data_view.array_accessed(data_name)
+
+    @property
+    def data_arrays(self):
+        'Returns a dict of the all the data arrays'
+        self._fate_data_view.array_accessed()
+
+        return self._data_arrays
+
     def _reset_arrays(self):
         '''
         reset _array_types dict so it contains default keys/values
@@ -381,6 +604,9 @@ class SpillContainer(AddLogger, SpillContainerData):
         self._array_types = {}
         self._data_arrays = {}
 
+        # the backing arrays of the data arrays
+        self._bufs = {}
+
 
     def _reset__substances_spills(self):
         ## Most of this not needed
@@ -405,13 +631,17 @@ class SpillContainer(AddLogger, SpillContainerData):
         # define the fate view of the data if 'fate_status' is in data arrays
         # 'fate_status' is included if weathering is on
         self._fate_data_view = FateDataView()
+        self.environment_samples = EnvironmentSamples()
 
     def reset_fate_dataview(self):
         '''
         reset data arrays for each fate_dataviewer. Each substance that is not
         None has a fate_dataviewer object.
+
+        Also clears the environment values sampled by the weatherers.
         '''
         self._fate_data_view.reset()
+        self.environment_samples.reset()
         # for viewer in self._fate_data_list:
         #     viewer.reset()
 
@@ -583,7 +813,50 @@ class SpillContainer(AddLogger, SpillContainerData):
                                             initial_value=tuple([0] * self._oil_comp_array_len))
             else:
                 a_append = atype.initialize(num_released)
-            self._data_arrays[name] = np.r_[self._data_arrays[name], a_append]
+
+            self._append_rows(name, a_append)
+
+    def _reserve(self, name, length):
+        '''
+        the backing array of data array name, with room for at least length
+        elements. The current data is in its first len(sc[name]) rows.
+
+        If the data array is no longer a view of its backing array -- it was
+        replaced, e.g. by __setitem__ or split_element -- a new backing array
+        is made for it.
+        '''
+        arr = self._data_arrays[name]
+        buf = self._bufs.get(name)
+
+        if buf is not None and not (arr.base is buf and
+                                    arr.ctypes.data == buf.ctypes.data and
+                                    arr.strides == buf.strides):
+            buf = None
+
+        if buf is None or len(buf) < length:
+            old_capacity = len(arr) if buf is None else len(buf)
+            capacity = max(length,
+                           int(old_capacity * self._growth_factor),
+                           self._min_capacity)
+
+            buf = np.empty((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            buf[:len(arr)] = arr
+
+            self._bufs[name] = buf
+
+        return buf
+
+    def _append_rows(self, name, rows):
+        '''
+        add rows to the end of data array name
+        '''
+        length = len(self._data_arrays[name])
+        new_length = length + len(rows)
+
+        buf = self._reserve(name, new_length)
+        buf[length:new_length] = rows
+
+        self._data_arrays[name] = buf[:new_length]
 
     # def _set_substance_array(self, subs_idx, num_rel_by_substance):
     #     '''
@@ -657,6 +930,34 @@ class SpillContainer(AddLogger, SpillContainerData):
         #            [view.get_data(self, array_types, fate) for view in
         #             self._fate_data_list])
 
+    def in_water_index(self):
+        '''
+        Indices of the elements that are in the water -- the ones the movers
+        move.
+
+        Inside shared_in_water_index() it is only computed once, and shared
+        by all the movers.
+        '''
+        if self._in_water_index is not None:
+            return self._in_water_index
+        else:
+            return np.flatnonzero(self['status_codes'] ==
+                                  oil_status.in_water)
+
+    @contextmanager
+    def shared_in_water_index(self):
+        '''
+        Context manager for running the movers: the in-water index is
+        computed once on entry, and in_water_index() returns it until exit.
+        The status codes must not change inside it.
+        '''
+        self._in_water_index = None
+        self._in_water_index = self.in_water_index()
+        try:
+            yield self._in_water_index
+        finally:
+            self._in_water_index = None
+
     def update_from_fatedataview(self,
                                  # substance=None,
                                  fate_status='surface_weather'):
@@ -665,6 +966,8 @@ class SpillContainer(AddLogger, SpillContainerData):
         only update if a copy of 'data' exists.
         '''
         self._fate_data_view.update_sc(self, fate_status)
+        self._restore_dtypes()
+
         # if substance is not None:
         #     view = self._get_fatedataview(substance)
         #     view.update_sc(self, fate)
@@ -674,6 +977,28 @@ class SpillContainer(AddLogger, SpillContainerData):
         #     for view in self._fate_data_list:
         #         view.update_sc(self, fate)
 
+    def _restore_dtypes(self):
+        '''
+        A weatherer that works on the data arrays directly can replace them
+        with arrays of another dtype -- e.g. mass computed from float32
+        mass_components. Convert them back to the dtype of their ArrayType,
+        into their backing array if it is still there.
+        '''
+        for name, at in self._array_types.items():
+            arr = self._data_arrays.get(name)
+
+            if arr is None or arr.dtype == at.dtype:
+                continue
+
+            buf = self._bufs.get(name)
+
+            if (buf is not None and buf.dtype == at.dtype and
+                    buf.shape[1:] == arr.shape[1:] and len(buf) >= len(arr)):
+                buf[:len(arr)] = arr
+                self._data_arrays[name] = buf[:len(arr)]
+            else:
+                self._data_arrays[name] = arr.astype(at.dtype)
+
     def get_substances(self, complete=True):
         ##fixme: remove this method??
         """
@@ -938,24 +1263,96 @@ class SpillContainer(AddLogger, SpillContainerData):
             len(l_frac) == num
         :type l_frac: list or tuple or numpy array
         '''
+        self.split_elements([ix], [num],
+                            None if l_frac is None else [l_frac])
+
+    def split_elements(self, ids, counts, fractions=None):
+        '''
+        split many elements at once -- the same as calling
+        split_element(ids[i], counts[i], fractions[i]) for each one, but the
+        data arrays are only rebuilt, and the FateDataView reset, once.
+
+        Each element is replaced, in place, by its new elements. For data
+        like mass, that gets divided, the fractions of the value given to
+        each new element can be provided.
+
+        :param ids: ids of the elements to split -- the first element with
+            each 'id' is split
+        :type ids: sequence of int
+        :param counts: number of elements to split each one into -- at
+            least 2
+        :type counts: int, or sequence of int with len(counts) == len(ids)
+        :param fractions: None to divide the values evenly, or a sequence of
+            the fractions for each element, each with len(fractions[i]) ==
+            counts[i] and summing to 1.0
+        :type fractions: sequence of lists, tuples or numpy arrays
+        '''
+        ids = np.asarray(ids).reshape(-1)
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.int64),
+                                 ids.shape)
+
+        if len(ids) == 0:
+            return
+
+        if np.any(counts < 2):
+            msg = "'num' to split into must be at least 2"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
         # split the first location where 'id' matches
-        try:
-            idx = np.where(self['id'] == ix)[0][0]
-        except IndexError:
-            msg = "no element with id = {0} found".format(ix)
+        sc_ids = self['id']
+        order = np.argsort(sc_ids, kind='stable')
+        sorted_ids = sc_ids[order]
+
+        pos = np.searchsorted(sorted_ids, ids)
+        missing = pos == len(sorted_ids)
+        missing[~missing] = sorted_ids[pos[~missing]] != ids[~missing]
+
+        if np.any(missing):
+            msg = "no element with id = {0} found".format(ids[missing])
             self.logger.warning(msg)
-            raise
+            raise IndexError(msg)
+
+        idx = order[pos]
+        if len(np.unique(idx)) != len(idx):
+            msg = "an element can only be split once in split_elements()"
+            self.logger.error(msg)
+            raise ValueError(msg)
+
+        # the number of elements each element becomes
+        repeats = np.ones((len(self),), dtype=np.int64)
+        repeats[idx] = counts
+
+        # the fraction of its element's value each new element gets
+        row_fracs = np.repeat(1.0 / repeats, repeats)
+
+        if fractions is not None:
+            if (len(fractions) != len(ids) or
+                    any(len(f) != c for f, c in zip(fractions, counts))):
+                msg = "in split_element() len(l_frac) must equal 'num'"
+                self.logger.error(msg)
+                raise ValueError(msg)
 
-        for name, at in self.array_types.items():
-            data = self[name]
-            split_elems = at.split_element(num, self[name][idx], l_frac)
-            data = np.insert(data, idx, split_elems[:-1], 0)
-            data[idx + len(split_elems) - 1] = split_elems[-1]
-            self._data_arrays[name] = data
+            fractions = np.concatenate([np.asarray(f, dtype=np.float64)
+                                        for f in fractions])
+            starts = np.cumsum(counts) - counts
+            if not np.allclose(np.add.reduceat(fractions, starts), 1.0):
+                msg = "sum 'l_frac' must be 1.0"
+                self.logger.error(msg)
+                raise ValueError(msg)
+
+            # rows of the new elements, in the same order as fractions
+            first_rows = np.cumsum(repeats)[idx] - counts
+            rows = (np.repeat(first_rows - starts, counts) +
+                    np.arange(len(fractions)))
+            row_fracs[rows] = fractions
 
-        # update fate_dataview which contains this LE
-        # for now we only have one type of substance
-        self._fate_data_view._reset_fatedata(self, ix)
+        for name, at in self._array_types.items():
+            self._data_arrays[name] = at.split_elements(
+                self._data_arrays[name], repeats, row_fracs)
+
+        # the elements in every view changed
+        self._fate_data_view.reset()
 
     def model_step_is_done(self):
         '''
@@ -966,16 +1363,58 @@ class SpillContainer(AddLogger, SpillContainerData):
             return  # nothing to do - arrays are not yet defined.
 
         # LEs are marked as to_be_removed
-        # C++ might care about this so leave as is
-        to_be_removed = np.where(self['status_codes'] ==
-                                 oil_status.to_be_removed)[0]
-
-        if len(to_be_removed) > 0:
-            for key in self._array_types:
-                self._data_arrays[key] = np.delete(self[key], to_be_removed,
-                                                   axis=0)
+        # C++ might care about this so leave as is -- the uncertain C++
+        # movers drop the same elements in their model_step_is_done(), so
+        # they can't be kept around to be removed later
+        to_be_removed = self['status_codes'] == oil_status.to_be_removed
+
+        if np.any(to_be_removed):
+            self._compact(to_be_removed)
             self._fate_data_view.reset()
 
+    def _compact(self, remove):
+        '''
+        Drop the elements marked in remove, keeping the rest in order, so
+        they stay in the order they were released.
+
+        The kept elements are moved forward in place in their backing
+        arrays, a chunk of rows at a time, so the only temporary copies
+        made are chunk sized.
+
+        This changes the data of arrays handed out before by sc[name] (which
+        np.delete() didn't), so nothing may hold on to them across it:
+
+        - the FateDataView is reset right after
+        - the cache saves a copy of each step (in both copy_on_write modes),
+          and the outputters (e.g. the Renderer's frames) work on steps
+          loaded from the cache
+        - the movers get the arrays again in prepare_data_for_get_move()
+          and model_step_is_done()
+
+        :param remove: bool array, True for the elements to drop
+        '''
+        num_elements = len(self)
+        num_kept = num_elements - np.count_nonzero(remove)
+
+        # the elements before the first one removed stay where they are
+        start = int(np.argmax(remove))
+        chunk = self._compact_chunk
+
+        for name in self._array_types:
+            buf = self._reserve(name, num_kept)
+
+            # a kept row only moves towards the front, and each chunk of
+            # kept rows is copied out before it is written, so no row is
+            # overwritten before it is moved
+            dest = start
+            for i in range(start, num_elements, chunk):
+                stop = min(i + chunk, num_elements)
+                rows = buf[i:stop][~remove[i:stop]]
+                buf[dest:dest + len(rows)] = rows
+                dest += len(rows)
+
+            self._data_arrays[name] = buf[:num_kept]
+
     def __str__(self):
         return ('gnome.spill_container.SpillContainer\n'
                 'spill LE attributes: {0}'
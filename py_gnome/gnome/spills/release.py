@@ -735,6 +735,8 @@ class SpatialRelease(Release):
         self._release_ts = None
         self._tris = None
         self._weights = None
+        self._tri_coords = None
+        self._cum_weights = None
         #self._pos_ts = None
 
     def get_polys_as_tris(self, polys, weights=None):
@@ -795,6 +797,11 @@ class SpatialRelease(Release):
             weights = self.weights
         self._tris, self._weights = self.get_polys_as_tris(self.polygons, weights)
 
+        # triangle vertices and cumulative weights as arrays, so elements can
+        # be placed without looping over them in initialize_LEs
+        self._tri_coords = geo_routines.tris_to_array(self._tris)
+        self._cum_weights = np.cumsum(self._weights)
+
         self._prepared = True
 
     def initialize_LEs(self, to_rel, data, current_time, time_step):
@@ -806,10 +813,12 @@ class SpatialRelease(Release):
         """
 
         sl = slice(-to_rel, None, 1)
-        pts = [geo_routines.random_pt_in_tri(s) for s in np.random.choice(self._tris, to_rel, p=self._weights)]
-        pts = [np.append(pt, 0) for pt in pts] #add Z coordinate
-        
-        data['positions'][sl] = pts
+        positions = data['positions'][sl]
+
+        positions[:, :2] = geo_routines.random_pts_in_tris(self._tri_coords,
+                                                           self._cum_weights,
+                                                           to_rel)
+        positions[:, 2] = 0.0
 
         data['mass'][sl] = self._mass_per_le
         data['init_mass'][sl] = self._mass_per_le
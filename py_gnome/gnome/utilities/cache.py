@@ -12,6 +12,8 @@ import tempfile
 import shutil
 import copy
 from multiprocessing import Lock
+import threading
+import queue
 import atexit
 
 import numpy as np
@@ -61,6 +63,147 @@ def clean_up_cache(dir_name=_cache_dir):
 atexit.register(clean_up_cache)
 
 
+class _BackgroundWriter(object):
+    """
+    Writes cache files in a background thread, so the model can carry on
+    stepping while the data goes to disk.
+
+    The queue is bounded: if it is full, write() blocks until the thread has
+    caught up. Any error raised while writing is held onto, and re-raised
+    as a CacheError on the next call to write() or flush().
+
+    Note: this holds no reference to the ElementCache, so the cache can
+    still be cleaned up by __del__ while the thread is alive.
+    """
+    def __init__(self, queue_depth):
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._error = None
+
+        self._thread = threading.Thread(target=self._run,
+                                        name='ElementCacheWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+
+                if self._error is None:
+                    func, args = item
+                    func(*args)
+            except Exception as excp:
+                self._error = excp
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            excp, self._error = self._error, None
+            raise CacheError('Error writing to the cache: {0!r}'
+                             .format(excp))
+
+    def write(self, func, *args):
+        """
+        queue a call to func(*args) to write data -- blocks if the queue
+        is full
+
+        the data must not be changed after it is passed in
+        """
+        self._raise_error()
+        self._queue.put((func, args))
+
+    def flush(self):
+        'block until everything queued has been written'
+        self._queue.join()
+        self._raise_error()
+
+    def stop(self):
+        'finish any queued writes and stop the thread'
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def _save_npz(filename, data):
+    np.savez(filename, **data)
+
+
+class _ColumnarStore(object):
+    """
+    Append-only columnar storage for the element cache.
+
+    Each data array is appended to its own flat binary file, and an index
+    holds the offset, dtype and shape of every step. Loading a step is then
+    a set of copy-on-write np.memmap slices, so only the bytes needed are
+    read, and nothing is unpickled. The loaded arrays can be changed like
+    the ones loaded from .npz files -- the changes stay in memory, and are
+    never written back to the files.
+
+    Anything that can't be stored as raw bytes (0-d arrays like the
+    mass_balance values, or object arrays like current_time_stamp) is small,
+    so it is kept in the index itself.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+        # {(step_num, uncertain): {name: (offset, dtype, shape) or array}}
+        self.index = {}
+
+    def _make_filename(self, name, uncertain=False):
+        if uncertain:
+            return os.path.join(self.cache_dir, '{0}_uncert.dat'.format(name))
+        else:
+            return os.path.join(self.cache_dir, '{0}.dat'.format(name))
+
+    def append(self, step_num, uncertain, data):
+        'add the data arrays for one step to the end of the files'
+        step_index = {}
+
+        for name, arr in data.items():
+            if arr.ndim == 0 or arr.dtype.hasobject:
+                step_index[name] = arr
+                continue
+
+            arr = np.ascontiguousarray(arr)
+            with open(self._make_filename(name, uncertain), 'ab') as fp:
+                offset = fp.tell()
+                fp.write(arr.tobytes())
+
+            step_index[name] = (offset, arr.dtype, arr.shape)
+
+        # only added once all the data is written
+        self.index[(step_num, uncertain)] = step_index
+
+    def load(self, step_num, uncertain=False):
+        """
+        Returns a dict of the arrays for the step
+
+        :raises KeyError: if the step is not in the store
+        """
+        data = {}
+
+        for name, item in self.index[(step_num, uncertain)].items():
+            if isinstance(item, np.ndarray):
+                # a copy, so the index can't be changed through it
+                data[name] = item.copy()
+                continue
+
+            offset, dtype, shape = item
+            if np.prod(shape) == 0:
+                # can't memmap zero bytes
+                arr = np.empty(shape, dtype=dtype)
+            else:
+                arr = np.memmap(self._make_filename(name, uncertain),
+                                dtype=dtype, mode='c',
+                                offset=offset, shape=shape)
+            data[name] = arr
+
+        return data
+
+
 class ElementCache(object):
     """
     Cache for element data -- i.e. the data associated with the particles.
@@ -72,7 +215,14 @@ class ElementCache(object):
           the _cache_dir at the whim of the GC.
           We may want to manage this differently.
     """
-    def __init__(self, cache_dir=None, enabled=True):
+    _storage_formats = ('npz', 'columnar')
+
+    def __init__(self,
+                 cache_dir=None,
+                 enabled=True,
+                 copy_on_write=False,
+                 write_queue_depth=0,
+                 storage='npz'):
         """
         initialize a new cache object
 
@@ -80,7 +230,31 @@ class ElementCache(object):
                                should be stored.
                                If not provided, a temp dir will be created by
                                the python tempfile module
+
+        :param copy_on_write=False: If True, each step is stored as a single
+                                    read-only snapshot that is shared by
+                                    everything that loads it, rather than
+                                    being deep-copied on save and again on
+                                    every load. Arrays returned by
+                                    load_timestep() are then read-only --
+                                    pass ``writable=True`` to get copies.
+
+        :param write_queue_depth=0: If greater than 0, files are written to
+                                    the disk cache by a background thread, with
+                                    up to this many steps waiting to be
+                                    written. If the queue is full,
+                                    save_timestep() waits for the writer to
+                                    catch up. If 0, files are written
+                                    synchronously.
+
+        :param storage='npz': format of the disk cache. 'npz' writes one .npz
+                              file per step. 'columnar' appends each data
+                              array to a single flat file, with an index of
+                              where each step is, and loads steps as
+                              copy-on-write memory-mapped slices.
         """
+        self.storage = storage
+
         self.create_new_dir(cache_dir)
 
         # dict to hold recent data so we don't need to pull from the
@@ -90,14 +264,84 @@ class ElementCache(object):
         # flag for whether to enable disk cache
         self.enabled = enabled
 
+        # flag for sharing read-only snapshots rather than copies
+        self.copy_on_write = copy_on_write
+
+        # background writer for the disk cache -- started on first write
+        self._writer = None
+        self.write_queue_depth = write_queue_depth
+
         self.lock = Lock()
 
     def __del__(self):
         'Clear out the cache when this object is deleted'
+        self._stop_writer()
+
         with self.lock:
             if os.path.isdir(self._cache_dir):
                 shutil.rmtree(self._cache_dir)
 
+    @property
+    def storage(self):
+        '''
+        format of the disk cache: 'npz' or 'columnar'. Changing it doesn't
+        convert steps that are already cached -- rewind the cache after.
+        '''
+        return self._storage
+
+    @storage.setter
+    def storage(self, storage):
+        if storage not in self._storage_formats:
+            raise ValueError('storage must be one of: {0}'
+                             .format(self._storage_formats))
+        self._storage = storage
+
+    @property
+    def write_queue_depth(self):
+        '''
+        Number of steps that can be waiting to be written to disk by the
+        background writer. 0 means write synchronously.
+        '''
+        return self._write_queue_depth
+
+    @write_queue_depth.setter
+    def write_queue_depth(self, depth):
+        if depth < 0:
+            raise ValueError('write_queue_depth must be >= 0')
+
+        # finish with the old writer -- a new one is started as needed
+        self._stop_writer()
+        self._write_queue_depth = int(depth)
+
+    def _stop_writer(self):
+        writer = getattr(self, '_writer', None)
+        if writer is not None:
+            self._writer = None
+            writer.stop()
+
+    def flush(self):
+        """
+        Wait for all queued steps to be written to the disk cache
+
+        Raises a CacheError if any of the writes failed.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _write(self, step_num, uncertain, data):
+        if self.storage == 'columnar':
+            func, args = self._columnar.append, (step_num, uncertain, data)
+        else:
+            func, args = _save_npz, (self._make_filename(step_num, uncertain),
+                                     data)
+
+        if self.write_queue_depth > 0:
+            if self._writer is None:
+                self._writer = _BackgroundWriter(self.write_queue_depth)
+            self._writer.write(func, *args)
+        else:
+            func(*args)
+
     def _make_filename(self, step_num, uncertain=False):
         """
         Returns a filename of the temp file generated from step_num
@@ -118,6 +362,8 @@ class ElementCache(object):
             self._cache_dir = tempfile.mkdtemp(dir=_cache_dir)
         else:
             self._cache_dir = cache_dir
+
+        self._columnar = _ColumnarStore(self._cache_dir)
         return True
 
     def save_timestep(self, step_num, spill_container_pair):
@@ -128,13 +374,24 @@ class ElementCache(object):
         :param spill_container: the spill container at this step
         """
         for sc in spill_container_pair.items():
-            data = copy.deepcopy(sc.data_arrays)
+            if self.copy_on_write:
+                # one copy here -- the SpillContainer arrays keep changing
+                # in place. After that, the snapshot is never copied again
+                # unless someone asks for a writable version
+                data = {name: np.array(arr)
+                        for name, arr in sc.data_arrays.items()}
+            else:
+                data = copy.deepcopy(sc.data_arrays)
 
             self._set_weathering_data(sc, data)
 
             if sc.current_time_stamp:
                 data['current_time_stamp'] = np.array(sc.current_time_stamp)
 
+            if self.copy_on_write:
+                for arr in data.values():
+                    arr.flags.writeable = False
+
             # # note: this assumes that the certain SC will be first!
 
             if sc.uncertain:
@@ -144,24 +401,37 @@ class ElementCache(object):
                 self.recent = {step_num: [data, None]}
 
             # write the data if enabled
-            # could be threaded -- data is a copy, so doesn't need to be
-            #                      re-used by anything
+            # may be threaded -- data is a copy, so doesn't need to be
+            #                    re-used by anything
             if self.enabled:
-                filename = self._make_filename(step_num, sc.uncertain)
-                np.savez(filename, **data)
+                self._write(step_num, sc.uncertain, data)
 
-    def load_timestep(self, step_num):
+    def load_timestep(self, step_num, writable=False):
         """
         Returns a SpillContainer with the data arrays cached on disk
 
         :param step_num: the step number you want to load.
+
+        :param writable=False: only used if copy_on_write is True, and the
+                               step is in memory. By default the arrays are
+                               read-only views of the shared snapshot -- set
+                               to True to get copies that can be changed.
         """
         # look first in in-memory cache.
         try:
+            recent = self.recent[step_num]
+        except KeyError:
+            recent = None
+
+        if recent is not None and self.copy_on_write:
+            # a new dict, sharing the snapshot arrays
+            (data_arrays, u_data_arrays) = [self._from_snapshot(d, writable)
+                                            for d in recent]
+        elif recent is not None:
             # make a copy because we pop out the current_time_stamp
             # make these changes to the copy so the self.recent does not change
 
-            (data_arrays, u_data_arrays) = copy.deepcopy(self.recent[step_num])
+            (data_arrays, u_data_arrays) = copy.deepcopy(recent)
 
             # copy.deepcopy(self.recent[step_num]) converts
             # 'current_time_stamp' to datetime object
@@ -173,8 +443,17 @@ class ElementCache(object):
                 if u_data_arrays:
                     u_data_arrays['current_time_stamp'] = \
                         np.array(u_data_arrays['current_time_stamp'])
-        except KeyError:
+        elif self.storage == 'columnar':
+            # not in the recent dict: load from the columnar files
+            # make sure it's not still waiting to be written
+            self.flush()
+
+            (data_arrays, u_data_arrays) = self._load_columnar(step_num)
+        else:
             # not in the recent dict: try to load from disk
+            # make sure it's not still waiting to be written
+            self.flush()
+
             try:
                 data_arrays = dict(np.load(self._make_filename(step_num),
                                            allow_pickle=True))
@@ -189,6 +468,45 @@ class ElementCache(object):
             except IOError:
                 u_data_arrays = None
 
+        return self._make_pair(data_arrays, u_data_arrays)
+
+    def _load_columnar(self, step_num):
+        'load the certain and uncertain data from the columnar store'
+        try:
+            data_arrays = self._columnar.load(step_num)
+        except (KeyError, IOError):
+            raise CacheError('step: {0} is not in the cache'
+                             .format(step_num))
+
+        try:
+            u_data_arrays = self._columnar.load(step_num, True)
+        except KeyError:
+            u_data_arrays = None
+
+        return (data_arrays, u_data_arrays)
+
+    def _from_snapshot(self, data, writable=False):
+        """
+        Returns a new dict of the arrays in a copy_on_write snapshot
+
+        The dict is new, so keys can be popped out without changing the
+        snapshot. The arrays are shared and read-only, unless writable is
+        True, in which case they are copied.
+        """
+        if data is None:
+            return None
+        elif writable:
+            return {name: arr.copy() for name, arr in data.items()}
+        else:
+            return dict(data)
+
+    def _make_pair(self, data_arrays, u_data_arrays):
+        """
+        Builds a SpillContainerPairData from the cached dicts of data arrays
+
+        Note: pops the current_time_stamp and mass_balance data out of the
+        dicts passed in.
+        """
         # HOWEVER, loading numpy arrays
         #     data_arrays = dict(np.load(self._make_filename(step_num)))
         # converts current_time_stamp to numpy.ndarray objects
@@ -242,10 +560,14 @@ class ElementCache(object):
 
     def rewind(self):
         'Rewinds the cache -- clearing out everything'
-        # clean out the in-memory cache
-        self.recent = {}
+        try:
+            # let the writer finish before the files are removed
+            self.flush()
+        finally:
+            # clean out the in-memory cache
+            self.recent = {}
 
-        # clean out the disk cache
-        if os.path.isdir(self._cache_dir):
-            shutil.rmtree(self._cache_dir)
-        self.create_new_dir()
+            # clean out the disk cache
+            if os.path.isdir(self._cache_dir):
+                shutil.rmtree(self._cache_dir)
+            self.create_new_dir()
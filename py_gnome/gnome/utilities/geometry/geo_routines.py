@@ -105,6 +105,46 @@ def random_pt_in_tri(tri):
     RPP = A + R*AB + S*AC
     return RPP
 
+def tris_to_array(tris):
+    '''
+    :param tris: iterable of shapely.Polygon triangles,
+                 or of (3, 2) sequences of vertex coordinates
+
+    :return: (N, 3, 2) numpy array of the triangle vertices
+    '''
+    coords = [t.exterior.coords if isinstance(t, Polygon) else t
+              for t in tris]
+    return np.array([np.asarray(c)[:3, :2] for c in coords],
+                    dtype=np.float64).reshape(-1, 3, 2)
+
+def random_pts_in_tris(tri_coords, cum_weights, num):
+    '''
+    Vectorized version of random_pt_in_tri: chooses num triangles,
+    weighted by probability, and a random point in each
+
+    :param tri_coords: (N, 3, 2) array of triangle vertices
+    :param cum_weights: (N,) cumulative sum of the probability of
+                        choosing each triangle -- the last value should be 1
+    :param num: number of points
+
+    :return: (num, 2) array of points
+    '''
+    idx = np.searchsorted(cum_weights, np.random.uniform(0, cum_weights[-1], num),
+                          side='right')
+    # in case of round-off at the top end
+    np.minimum(idx, len(tri_coords) - 1, out=idx)
+    tris = tri_coords[idx]
+
+    # reflect points that fall in the other half of the parallelogram
+    RS = np.random.random((num, 2))
+    flip = RS.sum(axis=1) >= 1
+    RS[flip] = 1 - RS[flip]
+
+    A = tris[:, 0]
+    AB = tris[:, 1] - A
+    AC = tris[:, 2] - A
+    return A + RS[:, :1] * AB + RS[:, 1:] * AC
+
 def get_shapefile_args(filename):
     """
     :param filename: string path of a zipped shapefile
@@ -360,7 +360,7 @@ class FlatEarthProjection(GeoProjection):
     """
 
     @staticmethod
-    def meters_to_lonlat(meters, ref_positions):
+    def meters_to_lonlat(meters, ref_positions, out=None):
         """
         Converts from delta meters to delta latitude-longitude,
         using the Flat-Earth projection.
@@ -377,17 +377,24 @@ class FlatEarthProjection(GeoProjection):
         :param ref_positions: Reference positions in degrees
         :type ref_positions: NX3, numpy array (Only lat is used here)
 
+        :param out=None: NX2 or NX3 float64 array to put the result in,
+                         instead of a new array. It can be meters itself.
+
         :returns delta_lon_lat: Differential (delta) positional values
                                 Nx3 numpy array of (delta-lon, delta-lat, delta-z)
         """
-
-        # make a copy -- don't change meters
-        delta_lon_lat = np.array(meters, dtype=np.float64)
-        if len(delta_lon_lat.shape) == 1:
-            if delta_lon_lat.shape[0] == 2:
-                delta_lon_lat = delta_lon_lat.reshape(1, 2)
-            else:
-                delta_lon_lat = delta_lon_lat.reshape(1, 3)
+        if out is None:
+            # make a copy -- don't change meters
+            delta_lon_lat = np.array(meters, dtype=np.float64)
+            if len(delta_lon_lat.shape) == 1:
+                if delta_lon_lat.shape[0] == 2:
+                    delta_lon_lat = delta_lon_lat.reshape(1, 2)
+                else:
+                    delta_lon_lat = delta_lon_lat.reshape(1, 3)
+        else:
+            delta_lon_lat = out
+            if out is not meters:
+                delta_lon_lat[:] = meters
         # reference is possible for reference positions
         ref_positions = np.asarray(ref_positions,
                                    dtype=np.float64)
@@ -0,0 +1,168 @@
+'''
+step_timer.py
+
+Low overhead timing of the parts of a model step, so a run can report where
+its time goes without a profiler.
+
+The Model uses a StepTimer when it is created with step_timing=True. Each
+call the model makes to its components -- prepare_for_model_step(),
+get_move(), beach_elements(), weather_elements(), model_step_is_done(),
+write_output(), and saving the step to the cache -- is timed, and the time
+added up by phase and object name. Objects with the same name (e.g. two
+unnamed RandomMovers) are told apart by adding the id of the object to the
+name of all but the first one. The times for the step are put in the
+dict returned by Model.step(), and the totals for the run are in
+Model.run_timing.
+'''
+
+import time
+from contextlib import nullcontext
+
+# what is used in place of the timing of a call when timing is off
+NO_TIMING = nullcontext()
+
+
+class _TimedCall(object):
+    '''
+    context manager that adds the time spent in it to a dict
+    '''
+    __slots__ = ('times', 'name', 'start')
+
+    def __init__(self, times, name):
+        self.times = times
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        self.times[self.name] = self.times.get(self.name, 0.0) + elapsed
+
+
+class StepTimer(object):
+    '''
+    Adds up the wall time of the calls made in each model step, by phase
+    and object.
+    '''
+    def __init__(self):
+        self.step_times = {}
+        self.totals = {'num_steps': 0,
+                       'wall_time': 0.0,
+                       'calls': {},
+                       'max_num_elements': {},
+                       'cache_bytes': 0}
+
+        self._step_start = None
+
+        # name the times of each object are under: {object id: name}
+        self._names = {}
+        # {name: object id}
+        self._name_ids = {}
+
+    def _name(self, obj):
+        '''
+        the name the times of obj are added up under
+        '''
+        try:
+            return self._names[obj.id]
+        except KeyError:
+            name = obj.name
+            if name in self._name_ids:
+                name = '{0} ({1})'.format(obj.name, obj.id)
+
+            self._names[obj.id] = name
+            self._name_ids[name] = obj.id
+
+            return name
+
+    def start_step(self):
+        '''
+        start timing a new step
+        '''
+        self.step_times = {}
+        self._step_start = time.perf_counter()
+
+    def time(self, phase, obj):
+        '''
+        time a call
+
+        :param phase: name of what is being done -- e.g. 'get_move'
+        :param obj: the object being called -- its name is used -- or a
+                    string to use as the name.
+
+        :returns: a context manager to do the call in
+        '''
+        name = obj if isinstance(obj, str) else self._name(obj)
+
+        return _TimedCall(self.step_times.setdefault(phase, {}), name)
+
+    def end_step(self, num_elements, cache_bytes):
+        '''
+        finish the step, and add it to the totals
+
+        :param num_elements: dict of the number of elements in each spill
+                             container: {'certain': n, 'uncertain': n}
+        :param cache_bytes: the size of the data saved to the cache in the
+                            step
+
+        :returns: dict of the timing of the step:
+                  {'wall_time': seconds for the whole step,
+                   'calls': {phase: {object name: seconds}},
+                   'num_elements': num_elements,
+                   'cache_bytes': cache_bytes}
+        '''
+        wall_time = time.perf_counter() - self._step_start
+
+        totals = self.totals
+        totals['num_steps'] += 1
+        totals['wall_time'] += wall_time
+        totals['cache_bytes'] += cache_bytes
+
+        for phase, times in self.step_times.items():
+            total_times = totals['calls'].setdefault(phase, {})
+            for name, seconds in times.items():
+                total_times[name] = total_times.get(name, 0.0) + seconds
+
+        max_num = totals['max_num_elements']
+        for key, num in num_elements.items():
+            max_num[key] = max(max_num.get(key, 0), num)
+
+        return {'wall_time': wall_time,
+                'calls': self.step_times,
+                'num_elements': num_elements,
+                'cache_bytes': cache_bytes}
+
+    def hot_spots(self, num=10):
+        '''
+        the calls that took the most time over the run
+
+        :returns: list of (seconds, phase, object name), slowest first
+        '''
+        spots = [(seconds, phase, name)
+                 for phase, times in self.totals['calls'].items()
+                 for name, seconds in times.items()]
+
+        return sorted(spots, reverse=True)[:num]
+
+    def report(self, num=10):
+        '''
+        a printable summary of the totals for the run
+        '''
+        totals = self.totals
+        wall_time = totals['wall_time']
+
+        num_elements = ', '.join('{0} {1}'.format(num, key) for key, num
+                                 in sorted(totals['max_num_elements'].items()))
+
+        lines = ['{0} steps in {1:.3f} s, up to {2} elements, '
+                 '{3:.1f} MB cached'
+                 .format(totals['num_steps'], wall_time, num_elements,
+                         totals['cache_bytes'] / 1e6)]
+
+        for seconds, phase, name in self.hot_spots(num):
+            percent = 100.0 * seconds / wall_time if wall_time else 0.0
+            lines.append('{0:10.3f} s {1:5.1f}%  {2}: {3}'
+                         .format(seconds, percent, phase, name))
+
+        return '\n'.join(lines)
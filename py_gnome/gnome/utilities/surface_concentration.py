@@ -5,6 +5,19 @@ Code to compute surface surface_concentration from particles
 
 Ultimatley, there may be multiple versions of this
 -- with Cython optimizationas and all that.
+
+Two algorithms are available:
+
+"kde": scipy's gaussian_kde -- evaluates the kernel of every particle at
+       every other particle, so the cost goes up with the square of the
+       number of particles.
+
+"kde_fft": the same Gaussian kernel (the same bandwidth, computed the same
+           way as gaussian_kde does), but the mass is binned onto a grid
+           that covers the particles, in coordinates in which the kernel
+           is round, convolved with the kernel with an FFT, and
+           interpolated back to the particles. The cost goes up about
+           linearly with the number of particles.
 """
 
 
@@ -15,6 +28,15 @@ import warnings
 import numpy as np
 from scipy.stats import gaussian_kde
 
+# maximum number of grid cells along each side of the "kde_fft" grid
+MAX_GRID_CELLS = 512
+
+# "kde_fft" grid cells per standard deviation of the kernel
+CELLS_PER_SIGMA = 4
+
+# the "kde_fft" kernel is cut off at this many standard deviations
+KERNEL_CUTOFF = 4
+
 
 def compute_surface_concentration(sc, algorithm):
     """
@@ -23,15 +45,17 @@ def compute_surface_concentration(sc, algorithm):
     :param sc: spill container -- data in it wil be usd, and the results will
                be put in a "surface_concentration" array
 
-    :param algorithm: algorithm to use -- currently only "kde" is supported
+    :param algorithm: algorithm to use -- "kde" or "kde_fft"
     """
     if sc['positions'].shape[0] == 0 or not algorithm:  # nothing to be done
         return
     if algorithm == 'kde':
         surface_conc_kde(sc)
+    elif algorithm == 'kde_fft':
+        surface_conc_kde_fft(sc)
     else:
-        raise ValueError('the only surface concentration algorithm currently supported'
-                         'is "kde"')
+        raise ValueError('the surface concentration algorithms currently '
+                         'supported are "kde" and "kde_fft"')
 
 
 def surface_conc_kde(sc):
@@ -46,8 +70,41 @@ def surface_conc_kde(sc):
 
     :param sc: spill container that you want the concentrations computed on
     """
+    _surface_conc_by_age(sc, _scipy_kde)
+
+
+def surface_conc_kde_fft(sc):
+    """
+    Computes the surface concentration with a grid binned Kernel Density
+    Estimator, using an FFT for the convolution
+
+    The results are close to those of surface_conc_kde(), but it is much
+    faster for large numbers of particles.
+
+    a "surface_concentration" array will be added to the spill container
+
+    :param sc: spill container that you want the concentrations computed on
+    """
+    _surface_conc_by_age(sc, binned_kde)
+
+
+def _surface_conc_by_age(sc, kde):
+    """
+    compute the surface concentration of each spill, in 1 hour age bins
+
+    :param kde: function called as kde(xy, weights, eval_idx), that returns
+                the density (integrates to 1) of the points xy at
+                xy[:, eval_idx]
+    """
     spill_num = sc['spill_num']
-    sc['surface_concentration'] = np.zeros(spill_num.shape[0],)
+
+    # keep the dtype of an existing array -- it may be float32
+    conc = sc['surface_concentration'] if 'surface_concentration' in sc else None
+    if conc is not None and len(conc) == len(spill_num) and conc.flags.writeable:
+        conc[:] = 0.0
+    else:
+        dtype = np.float64 if conc is None else conc.dtype
+        sc['surface_concentration'] = np.zeros(spill_num.shape[0], dtype=dtype)
     for s in np.unique(spill_num):
         sid = np.where(spill_num==s)
         positions = sc['positions'][sid]
@@ -77,15 +134,133 @@ def surface_conc_kde(sc):
                     y = (lat_for_kernel - lat0) * 111325
                     xy = np.vstack([x, y])
                     if len(np.unique(mass_for_kernel)) > 1:
-                        kernel = gaussian_kde(xy,weights=mass_for_kernel/mass_for_kernel.sum())
+                        weights = mass_for_kernel / mass_for_kernel.sum()
                     else:
-                        kernel = gaussian_kde(xy)
+                        weights = None
                     if mass_for_kernel.sum() > 0:
-                        c[id[id_bin]] = kernel(xy[:,id_bin]) * mass_for_kernel.sum()
+                        c[id[id_bin]] = kde(xy, weights, id_bin) * mass_for_kernel.sum()
                     else:
-                        c[id[id_bin]] = kernel(xy[:,id_bin]) * len(mass_for_kernel)
+                        c[id[id_bin]] = kde(xy, weights, id_bin) * len(mass_for_kernel)
                 except np.linalg.LinAlgError:
                     warnings.warn("LinAlg error occurred in surface concentration calculations.")
             t = t + bin_length
 
         sc['surface_concentration'][sid] = c
+
+
+def _scipy_kde(xy, weights, eval_idx):
+    kernel = gaussian_kde(xy, weights=weights)
+
+    return kernel(xy[:, eval_idx])
+
+
+def _kernel_covariance(xy, weights):
+    """
+    The covariance of the Gaussian kernel, using Scott's rule for the
+    bandwidth -- the same as scipy's gaussian_kde
+    """
+    n_eff = 1.0 / (weights ** 2).sum()
+    factor = n_eff ** (-1. / 6)
+
+    data_cov = np.cov(xy, rowvar=True, bias=False, aweights=weights)
+
+    return data_cov * factor ** 2
+
+
+def binned_kde(xy, weights, eval_idx, max_cells=MAX_GRID_CELLS):
+    """
+    Gaussian kernel density estimate of the points xy, evaluated at the
+    points xy[:, eval_idx]
+
+    The points are transformed to coordinates in which the kernel is a
+    standard normal -- the same width in every direction, so the grid
+    resolves it however the particles are lined up (e.g. a long, thin plume
+    drifting to the NE). The weights are linearly binned onto a regular grid
+    covering the points in those coordinates, convolved with the kernel by
+    FFT, and the result bilinearly interpolated back to the points.
+
+    :param xy: (2, N) array of the point coordinates
+    :param weights: N weights that sum to 1, or None for equal weights
+    :param eval_idx: the indexes of the points to evaluate the density at
+
+    :param max_cells=MAX_GRID_CELLS: maximum number of grid cells along each
+                                     side of the grid. Sets an upper bound on
+                                     the work and memory used when the
+                                     particles are spread out over many
+                                     kernel widths.
+
+    :returns: density at each of the evaluation points
+
+    raises np.linalg.LinAlgError if the kernel covariance is singular
+    """
+    num_points = xy.shape[1]
+    if weights is None:
+        weights = np.full((num_points,), 1.0 / num_points)
+
+    # cov = L L^T -- in the coordinates L^-1 xy the kernel covariance is
+    # the identity. cholesky() raises LinAlgError if cov is singular
+    chol = np.linalg.cholesky(_kernel_covariance(xy, weights))
+    uv = np.linalg.solve(chol, xy)
+
+    # the grid is fine enough to resolve the kernel, unless that would take
+    # more than max_cells
+    origin = uv.min(axis=1)
+    extent = uv.max(axis=1) - origin
+    spacing = max(1.0 / CELLS_PER_SIGMA, extent.max() / max_cells)
+    num_nodes = np.floor(extent / spacing).astype(np.int64) + 2
+
+    # linear binning: each weight is split between the four nodes of its
+    # cell
+    loc = (uv - origin[:, None]) / spacing
+    cell = np.minimum(np.floor(loc).astype(np.int64),
+                      (num_nodes - 2)[:, None])
+    frac = loc - cell
+
+    grid = np.zeros(num_nodes)
+    for di in (0, 1):
+        wx = frac[0] if di else 1.0 - frac[0]
+        for dj in (0, 1):
+            wy = frac[1] if dj else 1.0 - frac[1]
+            np.add.at(grid, (cell[0] + di, cell[1] + dj), weights * wx * wy)
+
+    # the kernel on the grid offsets -- no wider than the grid itself
+    half_width = np.minimum(np.ceil(KERNEL_CUTOFF / spacing),
+                            num_nodes - 1).astype(np.int64)
+    du = np.arange(-half_width[0], half_width[0] + 1) * spacing
+    dv = np.arange(-half_width[1], half_width[1] + 1) * spacing
+
+    kernel = np.outer(np.exp(-0.5 * du * du), np.exp(-0.5 * dv * dv))
+    # normalized on the grid, so no mass is lost if the kernel is not
+    # well resolved
+    kernel /= kernel.sum() * spacing * spacing
+
+    # back to a density in xy: divide by the area scale of the transform
+    density = (_fft_convolve(grid, kernel, half_width) /
+               np.prod(np.diag(chol)))
+
+    # bilinear interpolation back to the evaluation points
+    cell = cell[:, eval_idx]
+    frac = frac[:, eval_idx]
+    result = np.zeros((len(eval_idx),))
+    for di in (0, 1):
+        wx = frac[0] if di else 1.0 - frac[0]
+        for dj in (0, 1):
+            wy = frac[1] if dj else 1.0 - frac[1]
+            result += density[cell[0] + di, cell[1] + dj] * wx * wy
+
+    # a negative density can come out of the FFT round off
+    return np.maximum(result, 0.0)
+
+
+def _fft_convolve(grid, kernel, half_width):
+    """
+    convolve grid with the (centered) kernel, the result is the same shape
+    as grid
+    """
+    shape = [int(n) for n in np.array(grid.shape) + np.array(kernel.shape) - 1]
+
+    result = np.fft.irfft2(np.fft.rfft2(grid, shape) *
+                           np.fft.rfft2(kernel, shape), shape)
+
+    return result[half_width[0]:half_width[0] + grid.shape[0],
+                  half_width[1]:half_width[1] + grid.shape[1]]
@@ -86,6 +86,11 @@ class Weatherer(Process):
 
         Some objects do not implement this since they update arrays like 'area'
         in model_step_is_done()
+
+        Weatherers that can be run in the Model's fuse_weathering pass also
+        define weather_data(sc, substance, data, time_step, model_time). It
+        does the work on the data of one substance, and keeps 'mass' up to
+        date, but does not write the data back to sc.
         '''
         pass
 
@@ -105,10 +110,22 @@ class Weatherer(Process):
         return mass_remain
 
     def get_wind_speed(self, points, model_time,
-                       coord_sys='r', fill_value=1.0):
+                       coord_sys='r', fill_value=1.0, samples=None):
         '''
             Wrapper for the weatherers so they can get wind speeds
+
+            :param samples=None: the spill container's EnvironmentSamples.
+                                 If given, the wind speed is sampled once
+                                 for all weatherers using the same wind.
         '''
+        if samples is not None:
+            return samples.get(('wind_speed', id(self.wind),
+                                coord_sys, fill_value),
+                               points, model_time,
+                               lambda: self.get_wind_speed(points, model_time,
+                                                           coord_sys,
+                                                           fill_value))
+
         retval = self.wind.at(points, model_time, coord_sys=coord_sys)
 
         if isinstance(retval, np.ma.MaskedArray):
@@ -150,6 +150,7 @@ class Dissolution(Weatherer):
         '''
         model_time = kwargs.get('model_time')
         time_step = kwargs.get('time_step')
+        samples = kwargs.get('samples')
 
         fmasses = data['mass_components']
         droplet_avg_sizes = data['droplet_avg_size']
@@ -179,7 +180,12 @@ class Dissolution(Weatherer):
         #        .format(substance.get_density(self.waves.water
         #                                      .get('temperature'))))
         # print 'avg_rhos = ', avg_rhos
-        water_rhos = np.zeros(avg_rhos.shape) + self.waves.water.get('density')
+        if samples is None:
+            water_rho = self.waves.water.get('density')
+        else:
+            water_rho = samples.get_water(self.waves.water, 'density')
+
+        water_rhos = np.zeros(avg_rhos.shape) + water_rho
 
         k_w_i = Stokes.water_phase_xfer_velocity(water_rhos - avg_rhos,
                                                  droplet_avg_sizes)
@@ -187,11 +193,13 @@ class Dissolution(Weatherer):
 
         total_volumes = self.oil_total_volume(fmasses, rho)
 
-        f_wc_i = self.water_column_time_fraction(points,model_time, k_w_i)
+        f_wc_i = self.water_column_time_fraction(points, model_time, k_w_i,
+                                                 samples=samples)
         T_wc_i = f_wc_i * time_step
         # print 'T_wc_i = ', T_wc_i
 
-        T_calm_i = self.calm_between_wave_breaks(points,model_time, time_step, T_wc_i)
+        T_calm_i = self.calm_between_wave_breaks(points, model_time, time_step,
+                                                 T_wc_i, samples=samples)
         # print 'T_calm_i = ', T_calm_i
 
         assert np.alltrue(T_calm_i <= float(time_step))
@@ -225,7 +233,8 @@ class Dissolution(Weatherer):
                                                      oil_concentrations,
                                                      K_ow_comp,
                                                      areas,
-                                                     arom_mask)
+                                                     arom_mask,
+                                                     samples=samples)
         # with printoptions(precision=2):
         #     print 'N_s_i = ', N_s_i
 
@@ -301,9 +310,13 @@ class Dissolution(Weatherer):
     def water_column_time_fraction(self,
                                    points,
                                    model_time,
-                                   water_phase_xfer_velocity):
-        wave_height = self.waves.get_value(points, model_time)[0]
-        wind_speed = np.clip(self.get_wind_speed(points, model_time), 0.01, None)
+                                   water_phase_xfer_velocity,
+                                   samples=None):
+        wave_height = self.waves.get_value(points, model_time,
+                                           samples=samples)[0]
+        wind_speed = np.clip(self.get_wind_speed(points, model_time,
+                                                 samples=samples),
+                             0.01, None)
         wave_period = PiersonMoskowitz.peak_wave_period(wind_speed)
 
         f_bw = DelvigneSweeney.breaking_waves_frac(wind_speed, wave_period)
@@ -317,9 +330,12 @@ class Dissolution(Weatherer):
                                  points,
                                  model_time,
                                  time_step,
-                                 time_spent_in_wc=0.0):
+                                 time_spent_in_wc=0.0,
+                                 samples=None):
         #wind_speed = max(.1, self.waves.wind.get_value(model_time)[0])
-        wind_speed = np.clip(self.get_wind_speed(points, model_time), 0.01, None)
+        wind_speed = np.clip(self.get_wind_speed(points, model_time,
+                                                 samples=samples),
+                             0.01, None)
         wave_period = PiersonMoskowitz.peak_wave_period(wind_speed)
 
         f_bw = DelvigneSweeney.breaking_waves_frac(wind_speed, wave_period)
@@ -422,7 +438,8 @@ class Dissolution(Weatherer):
                                         oil_concentration,
                                         partition_coeff,
                                         slick_area,
-                                        arom_mask):
+                                        arom_mask,
+                                        samples=None):
         '''
             Here we are implementing something similar to equation 1.21
             of our dissolution document.
@@ -439,7 +456,9 @@ class Dissolution(Weatherer):
         assert len(partition_coeff.shape) == 1  # single dimension
 
         #U_10 = max(.1, self.waves.wind.get_value(model_time)[0])
-        U_10 = np.clip(self.get_wind_speed(points, model_time), 0.01, None).reshape(-1,1)
+        U_10 = np.clip(self.get_wind_speed(points, model_time,
+                                           samples=samples),
+                       0.01, None).reshape(-1, 1)
         c_oil = oil_concentration
         k_ow = partition_coeff
 
@@ -481,27 +500,41 @@ class Dissolution(Weatherer):
                 # data does not contain any surface_weathering LEs
                 return
 
-            # print ('dissolution: mass_components = {}'
-            #        .format(data['mass_components'].sum(1)))
-            diss = self.dissolve_oil(model_time=model_time,
-                                     time_step=time_step,
-                                     data=data,
-                                     substance=substance)
+            self.weather_data(sc, substance, data, time_step, model_time)
 
-            # print 'diss = ', diss
+            data['mass'] = data['mass_components'].sum(1)
 
-            # TODO: We should probably only modify the floating LEs
-            data['mass_components'] -= diss
+        sc.update_from_fatedataview()
 
-            sc.mass_balance['dissolution'] += diss.sum()
+    def weather_data(self, sc, substance, data, time_step, model_time):
+        '''
+        dissolve the elements in data over time_step
 
-            data['mass'] = data['mass_components'].sum(1)
+        Updates 'mass_components', and 'dissolution' in sc.mass_balance.
+        'mass' is reduced by the mass dissolved, rather than summed from
+        'mass_components' again.
+        '''
+        # print ('dissolution: mass_components = {}'
+        #        .format(data['mass_components'].sum(1)))
+        diss = self.dissolve_oil(model_time=model_time,
+                                 time_step=time_step,
+                                 data=data,
+                                 substance=substance,
+                                 samples=sc.environment_samples)
 
-            self.logger.debug('{0} Amount dissolved for {1}: {2}'
-                              .format(self._pid,
-                                      substance.name,
-                                      sc.mass_balance['dissolution']))
-            # print ('dissolution: mass_components = {}'
-            #        .format(data['mass_components'].sum(1)))
-        sc.update_from_fatedataview()
+        # print 'diss = ', diss
+
+        # TODO: We should probably only modify the floating LEs
+        data['mass_components'] -= diss
+
+        sc.mass_balance['dissolution'] += diss.sum()
+
+        data['mass'] = data['mass'] - diss.sum(1)
+
+        self.logger.debug('{0} Amount dissolved for {1}: {2}'
+                          .format(self._pid,
+                                  substance.name,
+                                  sc.mass_balance['dissolution']))
+        # print ('dissolution: mass_components = {}'
+        #        .format(data['mass_components'].sum(1)))
 
@@ -261,47 +261,66 @@ class Emulsification(Weatherer):
             if len(data['age']) == 0:
                 return
 
-            points = data['positions']
-            k_emul = self._water_uptake_coeff(points, model_time, substance)
-
-            emul_time = substance.bullwinkle_time
-
-            emul_constant = substance.bullwinkle_fraction
-
-            # max water content fraction - get from database
-            Y_max = substance.get('emulsion_water_fraction_max')
-
             # doesn't emulsify, avoid the nans
-            if Y_max <= 0:
+            if not self.weather_data(sc, substance, data, time_step,
+                                     model_time):
                 return
-            S_max = (6. / constants.drop_min) * (Y_max / (1.0 - Y_max))
 
-            emulsify_oil(time_step,
-                         data['frac_water'],
-                         data['interfacial_area'],
-                         data['frac_evap'],
-                         data['age'],
-                         data['bulltime'],
-                         k_emul,
-                         emul_time,
-                         emul_constant,
-                         S_max,
-                         Y_max,
-                         constants.drop_max)
+        sc.update_from_fatedataview()
 
-            #sc.mass_balance['water_content'] += \
-                #np.sum(data['frac_water'][:]) / sc.num_released
-            # just average the water fraction each time - it is not per time
-            # step value but at a certain time value
-            # todo: probably should be weighted avg
-            if data['mass'].sum() > 0:
-                sc.mass_balance['water_content'] = \
-                    np.sum(data['mass']/data['mass'].sum() * data['frac_water'])
+    def weather_data(self, sc, substance, data, time_step, model_time):
+        '''
+        emulsify the elements in data over time_step
 
-            self.logger.debug(self._pid + 'water_content for {0}: {1}'.
-                              format(substance.name,
-                                     sc.mass_balance['water_content']))
-        sc.update_from_fatedataview()
+        Updates 'frac_water', 'interfacial_area' and 'bulltime', and
+        'water_content' in sc.mass_balance.
+
+        :returns: False if the substance doesn't emulsify, so nothing was
+                  done.
+        '''
+        points = data['positions']
+        k_emul = self._water_uptake_coeff(points, model_time, substance,
+                                          sc.environment_samples)
+
+        emul_time = substance.bullwinkle_time
+
+        emul_constant = substance.bullwinkle_fraction
+
+        # max water content fraction - get from database
+        Y_max = substance.get('emulsion_water_fraction_max')
+
+        # doesn't emulsify, avoid the nans
+        if Y_max <= 0:
+            return False
+        S_max = (6. / constants.drop_min) * (Y_max / (1.0 - Y_max))
+
+        emulsify_oil(time_step,
+                     data['frac_water'],
+                     data['interfacial_area'],
+                     data['frac_evap'],
+                     data['age'],
+                     data['bulltime'],
+                     k_emul,
+                     emul_time,
+                     emul_constant,
+                     S_max,
+                     Y_max,
+                     constants.drop_max)
+
+        #sc.mass_balance['water_content'] += \
+            #np.sum(data['frac_water'][:]) / sc.num_released
+        # just average the water fraction each time - it is not per time
+        # step value but at a certain time value
+        # todo: probably should be weighted avg
+        if data['mass'].sum() > 0:
+            sc.mass_balance['water_content'] = \
+                np.sum(data['mass']/data['mass'].sum() * data['frac_water'])
+
+        self.logger.debug(self._pid + 'water_content for {0}: {1}'.
+                          format(substance.name,
+                                 sc.mass_balance['water_content']))
+
+        return True
 
     def weather_elements(self, sc, time_step, model_time):
         '''
@@ -391,7 +410,8 @@ class Emulsification(Weatherer):
 
         return Bw
 
-    def _water_uptake_coeff(self, points, model_time, substance):
+    def _water_uptake_coeff(self, points, model_time, substance,
+                            samples=None):
         '''
         Use higher of wind or pseudo wind corresponding to wave height
 
@@ -403,7 +423,8 @@ class Emulsification(Weatherer):
         '''
 
         ## higher of real or psuedo wind
-        wind_speed = self.waves.get_emulsification_wind(points, model_time)
+        wind_speed = self.waves.get_emulsification_wind(points, model_time,
+                                                        samples=samples)
 
         # water uptake rate constant - get this from database
         #K0Y = substance.get('k0y')
@@ -80,7 +80,7 @@ class Evaporation(Weatherer):
             msg = ("{0._pid} init 'evaporated' key to 0.0").format(self)
             self.logger.debug(msg)
 
-    def _mass_transport_coeff(self, points, model_time):
+    def _mass_transport_coeff(self, points, model_time, samples=None):
         '''
         Is wind a function of only model_time? How about time_step?
         at present yes since wind only contains timeseries data
@@ -93,18 +93,25 @@ class Evaporation(Weatherer):
 
         .. note:: wind speed is at least 1 m/s.
         '''
-        wind_speed = self.get_wind_speed(points, model_time, fill_value=1.0).reshape(-1)
-        wind_speed[wind_speed < 1.0] = 1.0
+        wind_speed = self.get_wind_speed(points, model_time, fill_value=1.0,
+                                         samples=samples).reshape(-1)
+        # not in place -- the wind speed may be shared with other weatherers
+        wind_speed = np.maximum(wind_speed, 1.0)
         c_evap = 0.0025     # if wind_speed in m/s
         return c_evap * wind_speed ** 0.78
 #         return np.where(wind_speed <= 10.0,
 #                         c_evap * wind_speed ** 0.78,
 #                         0.06 * c_evap * wind_speed ** 2)
 
-    def _set_evap_decay_constant(self, points, model_time, data, substance, time_step):
+    def _set_evap_decay_constant(self, points, model_time, data, substance,
+                                 time_step, samples=None):
         # used to compute the evaporation decay constant
-        K = self._mass_transport_coeff(points, model_time)
-        water_temp = self.water.get('temperature', 'K')
+        K = self._mass_transport_coeff(points, model_time, samples)
+
+        if samples is None:
+            water_temp = self.water.get('temperature', 'K')
+        else:
+            water_temp = samples.get_water(self.water, 'temperature', 'K')
 
         f_diff = 1.0
         if 'frac_water' in data:
@@ -194,29 +201,40 @@ class Evaporation(Weatherer):
             if len(data['mass']) == 0:
                 continue
 
-            points = data['positions']
-            # set evap_decay_constant array
-            self._set_evap_decay_constant(points, model_time, data,
-                                          substance, time_step)
-            mass_remain = self._exp_decay(data['mass_components'], data['evap_decay_constant'], time_step)
-
-            sc.mass_balance['evaporated'] += \
-                np.sum(data['mass_components'][:, :] - mass_remain[:, :])
-
-            # log amount evaporated at each step
-            self.logger.debug(self._pid + 'amount evaporated for {0}: {1}'.
-                              format(substance.name,
-                                     np.sum(data['mass_components'][:, :] -
-                                            mass_remain[:, :])))
+            self.weather_data(sc, substance, data, time_step, model_time)
 
-            data['frac_evap'][:] += ((data['mass_components'][:, :] - mass_remain[:, :]).sum(1)/data['init_mass'])
-            data['mass_components'][:] = mass_remain
             data['mass'][:] = data['mass_components'].sum(1)
 
             # add frac_lost
             data['frac_lost'][:] = 1 - data['mass']/data['init_mass']
         sc.update_from_fatedataview()
 
+    def weather_data(self, sc, substance, data, time_step, model_time):
+        '''
+        evaporate the elements in data over time_step
+
+        Updates 'mass_components', 'frac_evap' and 'evaporated' in
+        sc.mass_balance. 'mass' is reduced by the mass evaporated, rather
+        than summed from 'mass_components' again.
+        '''
+        points = data['positions']
+        # set evap_decay_constant array
+        self._set_evap_decay_constant(points, model_time, data,
+                                      substance, time_step,
+                                      samples=sc.environment_samples)
+        mass_remain = self._exp_decay(data['mass_components'], data['evap_decay_constant'], time_step)
+
+        evaporated = (data['mass_components'] - mass_remain).sum(1)
+        sc.mass_balance['evaporated'] += np.sum(evaporated)
+
+        # log amount evaporated at each step
+        self.logger.debug(self._pid + 'amount evaporated for {0}: {1}'.
+                          format(substance.name, np.sum(evaporated)))
+
+        data['frac_evap'][:] += evaporated/data['init_mass']
+        data['mass_components'][:] = mass_remain
+        data['mass'][:] -= evaporated
+
 
 class BlobEvaporation(Evaporation):
     '''
@@ -90,86 +90,101 @@ class NaturalDispersion(Weatherer):
             if len(data['mass']) == 0:
                 # substance does not contain any surface_weathering LEs
                 continue
-            points = data['positions']
-            # from the waves module
-            waves_values = self.waves.get_value(points, model_time)
-            wave_height = waves_values[0]
-            frac_breaking_waves = waves_values[2]
-            disp_wave_energy = waves_values[3]
-
-            visc_w = self.waves.water.kinematic_viscosity
-            rho_w = self.waves.water.density
-
-            # web has different units
-            sediment = self.waves.water.get('sediment', unit='kg/m^3')
-            V_entrain = constants.volume_entrained
-            ka = constants.ka  # oil sticking term
-
-            disp = np.zeros((len(data['mass'])), dtype=np.float64)
-            sed = np.zeros((len(data['mass'])), dtype=np.float64)
-            droplet_avg_size = data['droplet_avg_size']
-
-            # print ('dispersion: mass_components = {}'
-            #        .format(data['mass_components'].sum(1)))
-            try:
-                disperse_oil(time_step,
-                            data['frac_water'],
-                            data['mass'],
-                            data['viscosity'],
-                            data['density'],
-                            data['area'],
-                            disp,
-                            sed,
-                            droplet_avg_size,
-                            frac_breaking_waves,
-                            disp_wave_energy,
-                            wave_height,
-                            visc_w,
-                            rho_w,
-                            sediment,
-                            V_entrain,
-                            ka)
-            except:
-                import pdb
-                pdb.post_mortem()
-
-            sc.mass_balance['natural_dispersion'] += np.sum(disp[:])
-
-            if data['mass'].sum() > 0:
-                disp_mass_frac = np.sum(disp[:]) / data['mass'].sum()
-
-                if disp_mass_frac > 1:
-                    disp_mass_frac = 1
-            else:
-                disp_mass_frac = 0
-
-            data['mass_components'] = ((1 - disp_mass_frac) *
-                                       data['mass_components'])
-            data['mass'] = data['mass_components'].sum(1)
-
-            sc.mass_balance['sedimentation'] += np.sum(sed[:])
 
-            if data['mass'].sum() > 0:
-                sed_mass_frac = np.sum(sed[:]) / data['mass'].sum()
+            self.weather_data(sc, substance, data, time_step, model_time)
 
-                if sed_mass_frac > 1:
-                    sed_mass_frac = 1
-            else:
-                sed_mass_frac = 0
-
-            data['mass_components'] = ((1 - sed_mass_frac) *
-                                       data['mass_components'])
             data['mass'] = data['mass_components'].sum(1)
 
-            self.logger.debug('{0} Amount Dispersed for {1}: {2}'
-                              .format(self._pid,
-                                      substance.name,
-                                      sc.mass_balance['natural_dispersion']))
-            # print ('dispersion: mass_components = {}'
-            #        .format(data['mass_components'].sum(1)))
-
         sc.update_from_fatedataview()
 
+    def weather_data(self, sc, substance, data, time_step, model_time):
+        '''
+        disperse and sediment the elements in data over time_step
+
+        Updates 'mass_components', and 'natural_dispersion' and
+        'sedimentation' in sc.mass_balance. 'mass' is scaled by the fraction
+        left, rather than summed from 'mass_components' again.
+        '''
+        points = data['positions']
+        # from the waves module
+        waves_values = self.waves.get_value(
+            points, model_time, samples=sc.environment_samples)
+        wave_height = waves_values[0]
+        frac_breaking_waves = waves_values[2]
+        disp_wave_energy = waves_values[3]
+
+        visc_w = self.waves.water.kinematic_viscosity
+        rho_w = self.waves.water.density
+
+        # web has different units
+        sediment = sc.environment_samples.get_water(self.waves.water,
+                                                    'sediment', 'kg/m^3')
+        V_entrain = constants.volume_entrained
+        ka = constants.ka  # oil sticking term
+
+        disp = np.zeros((len(data['mass'])), dtype=np.float64)
+        sed = np.zeros((len(data['mass'])), dtype=np.float64)
+        droplet_avg_size = data['droplet_avg_size']
+
+        # print ('dispersion: mass_components = {}'
+        #        .format(data['mass_components'].sum(1)))
+        try:
+            disperse_oil(time_step,
+                        data['frac_water'],
+                        data['mass'],
+                        data['viscosity'],
+                        data['density'],
+                        data['area'],
+                        disp,
+                        sed,
+                        droplet_avg_size,
+                        frac_breaking_waves,
+                        disp_wave_energy,
+                        wave_height,
+                        visc_w,
+                        rho_w,
+                        sediment,
+                        V_entrain,
+                        ka)
+        except:
+            import pdb
+            pdb.post_mortem()
+
+        sc.mass_balance['natural_dispersion'] += np.sum(disp[:])
+
+        if data['mass'].sum() > 0:
+            disp_mass_frac = np.sum(disp[:]) / data['mass'].sum()
+
+            if disp_mass_frac > 1:
+                disp_mass_frac = 1
+        else:
+            disp_mass_frac = 0
+
+        data['mass_components'] = ((1 - disp_mass_frac) *
+                                   data['mass_components'])
+        data['mass'] = (1 - disp_mass_frac) * data['mass']
+
+        sc.mass_balance['sedimentation'] += np.sum(sed[:])
+
+        if data['mass'].sum() > 0:
+            sed_mass_frac = np.sum(sed[:]) / data['mass'].sum()
+
+            if sed_mass_frac > 1:
+                sed_mass_frac = 1
+        else:
+            sed_mass_frac = 0
+
+        data['mass_components'] = ((1 - sed_mass_frac) *
+                                   data['mass_components'])
+        data['mass'] = (1 - sed_mass_frac) * data['mass']
+
+        self.logger.debug('{0} Amount Dispersed for {1}: {2}'
+                          .format(self._pid,
+                                  substance.name,
+                                  sc.mass_balance['natural_dispersion']))
+        # print ('dispersion: mass_components = {}'
+        #        .format(data['mass_components'].sum(1)))
+
     def disperse_oil(self, time_step,
                      frac_water,
                      mass,
@@ -5,8 +5,6 @@ Include the Langmuir process here as well
 
 import numpy as np
 
-from functools import lru_cache
-
 from colander import SchemaNode, Float, drop
 
 from gnome.array_types import gat
@@ -25,6 +23,35 @@ PI = np.pi
 PISQUARED = np.pi ** 2
 
 
+def _blobs(*keys):
+    '''
+    group the elements into blobs of oil -- the elements with the same
+    values of all the keys, e.g. (spill_num, age) -- with one sort
+
+    :param keys: numpy arrays the same size, one value per element
+
+    :returns: (blob of each element, index of the first element of each
+               blob, number of elements in each blob)
+    '''
+    # lexsort is stable, so the first element of each blob in sorted order
+    # is also its first element in the arrays
+    order = np.lexsort(keys[::-1])
+
+    starts = np.zeros(len(order), dtype=bool)
+    starts[:1] = True
+    for key in keys:
+        key = key[order]
+        starts[1:] |= key[1:] != key[:-1]
+
+    blob = np.empty(len(order), dtype=np.intp)
+    blob[order] = np.cumsum(starts) - 1
+
+    first = np.flatnonzero(starts)
+    counts = np.diff(np.append(first, len(order)))
+
+    return blob, order[first], counts
+
+
 class FayGravityViscousSchema(WeathererSchema):
     thickness_limit = SchemaNode(Float(), missing=drop, save=True, update=True)
     water = WaterSchema(save=True, update=True)
@@ -71,15 +98,14 @@ class FayGravityViscous(Weatherer):
         # self.is_first_step = True
 
     @staticmethod
-    @lru_cache(10)
     def _gravity_spreading_t0(water_viscosity,
                               relative_buoyancy,
                               blob_init_vol,
                               spreading_const):
         '''
         time for the initial transient phase of spreading to complete. This
-        depends on blob volume, but is on the order of minutes. Cache up to 10
-        inputs - don't expect 10 or more spills in one scenario.
+        depends on blob volume, but is on the order of minutes. blob_init_vol
+        can be an array of the volumes of the blobs.
         '''
         # time to reach a0
         t0 = ((spreading_const[1] / spreading_const[0]) ** 4.0 *
@@ -162,7 +188,8 @@ class FayGravityViscous(Weatherer):
                     relative_buoyancy,
                     blob_init_volume,
                     area,
-                    age):
+                    age,
+                    blobs=None):
         '''
         update area array in place, also return area array
         each blob is defined by its age. This updates the area of each blob,
@@ -195,52 +222,23 @@ class FayGravityViscous(Weatherer):
             viscosity of oil. This is used by Langmuir since the process acts
             on particles after spreading completes.
         :type at_max_area: numpy array of bools
+        :param blobs=None: (blob of each LE, index of the first LE of each
+            blob, number of LEs in each blob) from _blobs(), to group the LEs
+            by more than age -- e.g. _blobs(spill_num, age) to update the
+            blobs of all spills at once. If None, the LEs with the same age
+            belong to the same blob.
 
         :returns: (updated 'area' array, updated 'at_max_area' array).
             It also changes the input 'area' array and the 'at_max_area' bool
             array inplace. However, the input arrays could be copies so best
             to also return the updates.
         '''
-        if np.any(age == 0):
-            msg = "use init_area for age == 0"
-            raise ValueError(msg)
-
-        # update area for each blob of LEs
-        for b_age in np.unique(age):
-            # within each age blob_init_volume should also be the same
-            m_age = b_age == age
-            t0 = self._gravity_spreading_t0(water_viscosity,
-                                            relative_buoyancy,
-                                            blob_init_volume[m_age][0],
-                                            self.spreading_const)
-
-            if b_age <= t0:
-                '''
-                only update initial area, A_0, if age is past the transient
-                phase. Expect this to be the case since t0 is on the order of
-                minutes; but do a check in case we want to experiment with
-                smaller timesteps.
-                '''
-                continue
-
-            # now update area of old LEs - only update till max area is reached
-            max_area = blob_init_volume[m_age][0] / self.thickness_limit
-            if area[m_age].sum() < max_area:
-                # update area
-                blob_area = self._update_blob_area(water_viscosity,
-                                                   relative_buoyancy,
-                                                   blob_init_volume[m_age][0],
-                                                   age[m_age][0])
-
-                if blob_area >= max_area:
-                    area[m_age] = max_area / m_age.sum()
-                else:
-                    area[m_age] = blob_area / m_age.sum()
-
-                self.logger.debug('{0}\tarea after update: {1}'
-                                  .format(self._pid, blob_area))
-
-        return area
+        return self._update_blobs(water_viscosity, relative_buoyancy,
+                                  blob_init_volume, area, age, blobs,
+                                  lambda init_vol, b_age, b_area:
+                                  self._update_blob_area(water_viscosity,
+                                                         relative_buoyancy,
+                                                         init_vol, b_age))
 
     def update_area2(self,
                      water_viscosity,
@@ -248,7 +246,8 @@ class FayGravityViscous(Weatherer):
                      blob_init_volume,
                      area,
                      time_step,
-                     age):
+                     age,
+                     blobs=None):
         '''
         update area array in place, also return area array
         each blob is defined by its age. This updates the area of each blob,
@@ -281,65 +280,104 @@ class FayGravityViscous(Weatherer):
             viscosity of oil. This is used by Langmuir since the process acts
             on particles after spreading completes.
         :type at_max_area: numpy array of bools
+        :param blobs=None: (blob of each LE, index of the first LE of each
+            blob, number of LEs in each blob) from _blobs(), to group the LEs
+            by more than age -- e.g. _blobs(spill_num, age) to update the
+            blobs of all spills at once. If None, the LEs with the same age
+            belong to the same blob.
 
         :returns: (updated 'area' array, updated 'at_max_area' array).
             It also changes the input 'area' array and the 'at_max_area' bool
             array inplace. However, the input arrays could be copies so best
             to also return the updates.
         '''
+        return self._update_blobs(water_viscosity, relative_buoyancy,
+                                  blob_init_volume, area, age, blobs,
+                                  lambda init_vol, b_age, b_area:
+                                  self._blob_area_after_step(water_viscosity,
+                                                             relative_buoyancy,
+                                                             init_vol, b_area,
+                                                             time_step))
+
+    def _blob_area_after_step(self, water_viscosity, relative_buoyancy,
+                              blob_init_volume, blob_area, time_step):
+        '''
+        area of blobs of oil after spreading for time_step: gravity-viscous
+        spreading plus diffusion. blob_init_volume and blob_area are arrays,
+        one value per blob.
+        '''
+        C = (PI *
+             # correct k_nu, Spreading Law coefficient -- Eq.(6.14), 11/23/2021
+             #self.spreading_const[1] ** 2 *
+             self.spreading_const[2] ** 2 *
+             (blob_init_volume ** 2 *
+              constants.gravity *
+              relative_buoyancy /
+              np.sqrt(water_viscosity)) ** (1. / 3.))
+
+        blob_area_fgv = .5 * (C**2 / blob_area) * time_step	# make sure area > 0
+
+        K = 4 * PI * 2 * .033
+
+        blob_area_diffusion = ((7. / 6.) * K * (blob_area / K) ** (1. / 7.)) * time_step
+
+        return blob_area + blob_area_fgv + blob_area_diffusion
+
+    def _update_blobs(self, water_viscosity, relative_buoyancy,
+                      blob_init_volume, area, age, blobs, new_blob_area):
+        '''
+        update area array in place for update_area() and update_area2(), also
+        return area array
+
+        :param blobs: (blob of each element, index of the first element of
+            each blob, number of elements in each blob) from _blobs(). If None,
+            the elements with the same age are a blob.
+        :param new_blob_area: function(blob_init_volume, age, blob_area) that
+            returns the updated area of the blobs, given arrays with one value
+            per blob.
+        '''
         if np.any(age == 0):
             msg = "use init_area for age == 0"
             raise ValueError(msg)
 
-        # update area for each blob of LEs
-        for b_age in np.unique(age):
-            # within each age blob_init_volume should also be the same
-            m_age = b_age == age
-            t0 = self._gravity_spreading_t0(water_viscosity,
-                                            relative_buoyancy,
-                                            blob_init_volume[m_age][0],
-                                            self.spreading_const)
-
-            if b_age <= t0:
-                '''
-                only update initial area, A_0, if age is past the transient
-                phase. Expect this to be the case since t0 is on the order of
-                minutes; but do a check in case we want to experiment with
-                smaller timesteps.
-                '''
-                continue
+        if blobs is None:
+            blobs = _blobs(age)
 
-            # now update area of old LEs - only update till max area is reached
-            max_area = blob_init_volume[m_age][0] / self.thickness_limit
-            if area[m_age].sum() < max_area:
+        blob, first, counts = blobs
 
-                C = (PI *
-                    # correct k_nu, Spreading Law coefficient -- Eq.(6.14), 11/23/2021
-                    #self.spreading_const[1] ** 2 *
-                    self.spreading_const[2] ** 2 *
-                    (blob_init_volume[m_age][0] ** 2 *
-                    constants.gravity *
-                    relative_buoyancy /
-                    np.sqrt(water_viscosity)) ** (1. / 3.))
+        # within each blob, blob_init_volume and age should be the same
+        init_vol = blob_init_volume[first]
+        b_age = age[first]
+        b_area = np.bincount(blob, weights=area, minlength=len(first))
 
-                #blob_area_fgv = area[m_age].sum() + .5 * (C**2 / area[m_age].sum()) * time_step	# make sure area > 0
-                blob_area_fgv = .5 * (C**2 / area[m_age].sum()) * time_step	# make sure area > 0
+        t0 = self._gravity_spreading_t0(water_viscosity,
+                                        relative_buoyancy,
+                                        init_vol,
+                                        self.spreading_const)
+        max_area = init_vol / self.thickness_limit
 
-                K = 4 * PI * 2 * .033
+        # only update initial area, A_0, if age is past the transient phase.
+        # Expect this to be the case since t0 is on the order of minutes; but
+        # do a check in case we want to experiment with smaller timesteps.
+        # Then only update till max area is reached
+        update = (b_age > t0) & (b_area < max_area)
+        if not update.any():
+            return area
 
-                #blob_area_diffusion = area[m_age].sum() + ((7 / 6) * K * (area[m_age].sum() / K) ** (1 / 7)) * time_step
-                blob_area_diffusion = ((7. / 6.) * K * (area[m_age].sum() / K) ** (1. / 7.)) * time_step
+        upd = np.flatnonzero(update)
+        new_area = np.minimum(new_blob_area(init_vol[upd], b_age[upd],
+                                            b_area[upd]),
+                              max_area[upd])
 
-                #blob_area = blob_area_fgv + blob_area_diffusion
-                blob_area = area[m_age].sum() + blob_area_fgv + blob_area_diffusion
+        self.logger.debug('{0}\tarea updated for {1} blobs'
+                          .format(self._pid, len(upd)))
 
-                if blob_area >= max_area:
-                    area[m_age] = max_area / m_age.sum()
-                else:
-                    area[m_age] = blob_area / m_age.sum()
+        # divide the blob area equally between its elements
+        le_area = np.zeros_like(b_area)
+        le_area[upd] = new_area / counts[upd]
 
-                self.logger.debug('{0}\tarea after update: {1}'
-                                  .format(self._pid, blob_area))
+        in_update = update[blob]
+        area[in_update] = le_area[blob[in_update]]
 
         return area
 
@@ -464,22 +502,20 @@ class FayGravityViscous(Weatherer):
             if len(data['fay_area']) == 0:
                 continue
 
-            for s_num in np.unique(data['spill_num']):
-                s_mask = data['spill_num'] == s_num
-                data['fay_area'][s_mask] = \
-                    self.update_area2(water_kvis,
-                                     self._init_relative_buoyancy,
-                                     data['bulk_init_volume'][s_mask],
-                                     data['fay_area'][s_mask],
-                                     time_step,
-                                     data['age'][s_mask] + time_step)
-    #                     self.update_area(water_kvis,
-    #                                      self._init_relative_buoyancy,
-    #                                      data['bulk_init_volume'][s_mask],
-    #                                      data['fay_area'][s_mask],
-    #                                      data['age'][s_mask] + time_step)
-
-                data['area'][s_mask] = data['fay_area'][s_mask]
+            # a blob is the elements of a spill released at the same time.
+            # Update the blobs of all the spills at once
+            age = data['age'] + time_step
+            blobs = _blobs(data['spill_num'], age)
+
+            data['fay_area'][:] = self.update_area2(water_kvis,
+                                                    self._init_relative_buoyancy,
+                                                    data['bulk_init_volume'],
+                                                    data['fay_area'],
+                                                    time_step,
+                                                    age,
+                                                    blobs=blobs)
+
+            data['area'][:] = data['fay_area']
 
         sc.update_from_fatedataview()
 
@@ -572,10 +608,13 @@ class Langmuir(Weatherer):
                                  'density': gat('density')})
 
 
-    def _get_frac_coverage(self, points, model_time, rel_buoy, thickness):
+    def _get_frac_coverage(self, points, model_time, rel_buoy, thickness,
+                           samples=None):
         '''
         return fractional coverage for a blob of oil with inputs;
-        relative_buoyancy, and thickness
+        relative_buoyancy, and thickness. thickness is a scalar, or an array
+        the same size as rel_buoy -- the thickness of the blob each element
+        is in.
 
         Assumes the thickness is the minimum oil thickness associated with
         max area achievable by Fay Spreading
@@ -586,7 +625,8 @@ class Langmuir(Weatherer):
         '''
         # fixme: sometimes get v_max of zero
         #        probably shouldn't
-        v_max = np.max(self.get_wind_speed(points, model_time) * .005)
+        v_max = np.max(self.get_wind_speed(points, model_time,
+                                           samples=samples) * .005)
 
         # cr_k = (v_max ** 2 *
         #         4 *
@@ -603,12 +643,13 @@ class Langmuir(Weatherer):
         #        are kind of annoying -- can we catch this sooner?
         #        and is this doing the right thing for a "sinking" oil?
         mask = rel_buoy == 0
+        thickness = np.broadcast_to(thickness, rel_buoy.shape)
         frac_cov = np.empty_like(rel_buoy)
         frac_cov[mask] = .1
         frac_cov[~mask] = (v_max ** 2 *
                            4 *
                            PISQUARED /
-                           (thickness * rel_buoy[~mask] * gravity)) ** (-0.3333333333333333)
+                           (thickness[~mask] * rel_buoy[~mask] * gravity)) ** (-0.3333333333333333)
         # due to oil density > water density
         frac_cov[np.isnan(frac_cov)] = 0.1
 
@@ -640,7 +681,8 @@ class Langmuir(Weatherer):
             return
 
         #return
-        rho_h2o = self.water.get('density', 'kg/m^3')
+        rho_h2o = sc.environment_samples.get_water(self.water, 'density',
+                                                   'kg/m^3')
         for _, data in sc.itersubstancedata(self.array_types):
             #if len(data['area']) == 0:
             if len(data['fay_area']) == 0:
@@ -648,24 +690,26 @@ class Langmuir(Weatherer):
 
             points = data['positions']
 
-            for s_num in np.unique(data['spill_num']):
-                s_mask = data['spill_num'] == s_num
-                # thickness for blob of oil released together - need per spill
-                # Use the 'bulk_init_volume' and the 'fay_area' of the
-                # blob of oil. Each LE used to model the blob will have the
-                # same thickness. In order to get the 'fay_area' for the blob
-                # of oil released at same time, from same spill, sum
-                # the 'fay_area' array for elements that belong to same oil
-                # blob.
-                thickness = (data['bulk_init_volume'][s_mask][0] /
-                             data['fay_area'][s_mask].sum())
-
-                # assume only one type of oil is modeled so thickness_limit is
-                # already set and constant for all
-
-                rel_buoy = (rho_h2o - data['density'][s_mask]) / rho_h2o
-                data['frac_coverage'][s_mask] = \
-                    self._get_frac_coverage(points, model_time, rel_buoy, thickness)
+            # thickness for blob of oil released together - need per spill
+            # Use the 'bulk_init_volume' and the 'fay_area' of the
+            # blob of oil. Each LE used to model the blob will have the
+            # same thickness. In order to get the 'fay_area' for the blob
+            # of oil released at same time, from same spill, sum
+            # the 'fay_area' array for elements that belong to same oil
+            # blob -- for all the spills at once.
+            blob, first, _counts = _blobs(data['spill_num'])
+            thickness = (data['bulk_init_volume'][first] /
+                         np.bincount(blob, weights=data['fay_area'],
+                                     minlength=len(first)))
+
+            # assume only one type of oil is modeled so thickness_limit is
+            # already set and constant for all
+
+            rel_buoy = (rho_h2o - data['density']) / rho_h2o
+            data['frac_coverage'][:] = \
+                self._get_frac_coverage(points, model_time, rel_buoy,
+                                        thickness[blob],
+                                        samples=sc.environment_samples)
 
             # update 'area'
             data['area'][:] = data['fay_area'] * data['frac_coverage']
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+
+"""
+Benchmark cases for the core of PyGNOME
+
+The cases follow the asv conventions: a class has a setup() method,
+optional ``params`` and ``param_names``, and time_*() methods that are
+timed. setup() is called with the parameter values of the case, and is not
+timed.
+
+Run them with run_benchmarks.py in this dir.
+
+The models are set up like the ones in scripts/testing_scripts, but only use
+the sample data that comes with the tests, so they don't need anything to
+be downloaded.
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from gnome.model import Model
+from gnome.maps import MapFromBNA
+from gnome.environment import Water, Waves, constant_wind
+from gnome.movers import RandomMover, WindMover
+from gnome.spills import surface_point_line_spill
+from gnome.spills.gnome_oil import GnomeOil
+from gnome.weatherers import standard_weatherering_sets, weatherers_by_name
+from gnome.outputters import NetCDFOutput, Renderer, KMZOutput
+
+
+sample_data = os.path.join(os.path.dirname(__file__),
+                           '..', 'unit_tests', 'sample_data')
+
+mapfile = os.path.join(sample_data, 'MapBounds_Island.bna')
+
+start_time = datetime(2015, 5, 14, 0, 0)
+start_position = (-127.1, 47.93, 0.0)
+
+# the oil used in the unit tests
+test_oil = 'oil_ans_mp'
+
+
+def make_model(num_elements,
+               weathering=False,
+               duration=timedelta(days=3),
+               time_step=900):
+    '''
+    a model with a land map, a random mover and a wind mover, and a spill
+    that releases all its elements at the start
+
+    :param weathering=False: if True, the spill is oil, and the environment
+                             objects that the weatherers need are added --
+                             but no weatherers.
+    '''
+    model = Model(start_time=start_time,
+                  duration=duration,
+                  time_step=time_step,
+                  map=MapFromBNA(mapfile, refloat_halflife=6),
+                  uncertain=False,
+                  cache_enabled=False)
+
+    wind = constant_wind(10, 270, 'knots')
+
+    model.movers += RandomMover(diffusion_coef=100000)
+    model.movers += WindMover(wind)
+
+    if weathering:
+        substance = GnomeOil(test_oil)
+        model.environment += [wind, Water(), Waves()]
+    else:
+        substance = None
+
+    model.spills += surface_point_line_spill(num_elements,
+                                             start_position,
+                                             start_time,
+                                             substance=substance,
+                                             amount=1000,
+                                             units='bbl')
+
+    return model
+
+
+def run_steps(model, num_steps):
+    '''
+    run the model through its first num_steps steps
+    '''
+    for _i in range(num_steps):
+        model.step()
+
+
+class ModelStep(object):
+    '''
+    One step of a model -- moving, beaching, and writing to the cache
+    '''
+    params = [1000, 100000, 1000000]
+    param_names = ['num_elements']
+
+    def setup(self, num_elements):
+        # long enough that it doesn't run out of steps
+        self.model = make_model(num_elements, duration=timedelta(days=30))
+        run_steps(self.model, 2)
+
+    def time_step(self, num_elements):
+        self.model.step()
+
+
+class BeachElements(object):
+    '''
+    The land check of the moves of one step
+    '''
+    params = [1000, 100000, 1000000]
+    param_names = ['num_elements']
+
+    def setup(self, num_elements):
+        self.model = make_model(num_elements)
+        run_steps(self.model, 1)
+
+        self.sc = self.model.spills.items()[0]
+
+        # moves of up to 5km, so some of them hit the land
+        rand = np.random.RandomState(0)
+        moves = rand.uniform(-0.05, 0.05, (num_elements, 3))
+        moves[:, 2] = 0.0
+
+        self.next_positions = self.sc['positions'] + moves
+        self.status_codes = self.sc['status_codes'].copy()
+        self.last_water_positions = self.sc['last_water_positions'].copy()
+
+    def time_beach_elements(self, num_elements):
+        self.sc['next_positions'][:] = self.next_positions
+        self.sc['status_codes'][:] = self.status_codes
+        self.sc['last_water_positions'][:] = self.last_water_positions
+
+        self.model.map.beach_elements(self.sc, self.model.model_time)
+
+
+class Weatherers(object):
+    '''
+    One time step of each of the standard weatherers
+    '''
+    params = [list(standard_weatherering_sets['standard']),
+              [1000, 100000]]
+    param_names = ['weatherer', 'num_elements']
+
+    def setup(self, weatherer, num_elements):
+        self.model = make_model(num_elements, weathering=True)
+        self.model.add_weathering([weatherer])
+        run_steps(self.model, 2)
+
+        self.sc = self.model.spills.items()[0]
+
+        # the model adds the weatherers it needs (WeatheringData, spreading)
+        # as well as the one asked for
+        self.weatherer = [w for w in self.model.weatherers
+                          if isinstance(w, weatherers_by_name[weatherer])][0]
+
+    def time_weather_elements(self, weatherer, num_elements):
+        time_step = self.model.time_step
+        model_time = self.model.model_time
+
+        self.sc.reset_fate_dataview()
+        self.weatherer.prepare_for_model_step(self.sc, time_step, model_time)
+        self.weatherer.weather_elements(self.sc, time_step, model_time)
+
+
+class Outputters(object):
+    '''
+    write_output for one step
+    '''
+    params = [['NetCDFOutput', 'Renderer', 'KMZOutput'],
+              [1000, 100000]]
+    param_names = ['outputter', 'num_elements']
+
+    def setup(self, outputter, num_elements):
+        self.output_dir = tempfile.mkdtemp(prefix='gnome_bench_')
+
+        if outputter == 'NetCDFOutput':
+            self.outputter = NetCDFOutput(os.path.join(self.output_dir,
+                                                       'bench.nc'),
+                                          which_data='standard')
+        elif outputter == 'Renderer':
+            self.outputter = Renderer(mapfile,
+                                      output_dir=self.output_dir,
+                                      image_size=(800, 600))
+        else:
+            self.outputter = KMZOutput(os.path.join(self.output_dir,
+                                                    'bench.kmz'))
+
+        self.model = make_model(num_elements)
+        self.model.outputters += self.outputter
+        run_steps(self.model, 2)
+
+    def teardown(self, outputter, num_elements):
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def time_write_output(self, outputter, num_elements):
+        self.outputter.prepare_for_model_step(self.model.time_step,
+                                              self.model.model_time)
+        self.outputter.write_output(self.model.current_time_step)
+
+
+class SaveLoad(object):
+    '''
+    Saving a model to a save file, and loading it
+    '''
+    params = [1000, 100000]
+    param_names = ['num_elements']
+
+    def setup(self, num_elements):
+        self.save_dir = tempfile.mkdtemp(prefix='gnome_bench_')
+        self.savefile = os.path.join(self.save_dir, 'bench.gnome')
+
+        # saved part way through a run, so the element data is saved too
+        self.model = make_model(num_elements, weathering=True)
+        self.model.add_weathering()
+        run_steps(self.model, 2)
+
+        self.model.save(self.savefile)
+
+    def teardown(self, num_elements):
+        shutil.rmtree(self.save_dir, ignore_errors=True)
+
+    def time_save(self, num_elements):
+        self.model.save(self.savefile)
+
+    def time_load(self, num_elements):
+        Model.load_savefile(self.savefile)
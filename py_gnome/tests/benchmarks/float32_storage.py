@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""
+Reports the memory saved, and the change in the results, when the oil
+component arrays are stored as float32 -- see Model(float32_arrays=...)
+
+The weathering model of benchmarks.py is run to the end twice, with all
+float64 arrays and with float32 ones, and the size of the element data and
+the largest differences in the mass balance and the positions are printed:
+
+    python float32_storage.py
+
+    python float32_storage.py --num_elements 100000 mass_components
+"""
+
+import sys
+import argparse
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks import make_model
+
+default_arrays = ['mass_components', 'evap_decay_constant']
+
+
+def run(num_elements, float32_arrays, duration):
+    '''
+    run the model to the end
+
+    :returns: (bytes of element data, mass balance of the last step,
+               positions of the last step)
+    '''
+    model = make_model(num_elements, weathering=True, duration=duration)
+    model.add_weathering()
+    model.float32_arrays = float32_arrays
+
+    for _step in model:
+        pass
+
+    sc = model.spills.items()[0]
+    nbytes = sum(arr.nbytes for arr in sc.data_arrays.values())
+
+    return nbytes, dict(sc.mass_balance), sc['positions'].copy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('arrays', nargs='*', default=default_arrays,
+                        help='the arrays to store as float32 (default: {0})'
+                        .format(' '.join(default_arrays)))
+    parser.add_argument('--num_elements', type=int, default=10000)
+    parser.add_argument('--hours', type=int, default=24,
+                        help='duration of the run')
+    args = parser.parse_args(argv)
+
+    duration = timedelta(hours=args.hours)
+
+    nbytes64, balance64, pos64 = run(args.num_elements, [], duration)
+    nbytes32, balance32, pos32 = run(args.num_elements, args.arrays, duration)
+
+    print('{0} elements, {1} hours, float32: {2}'
+          .format(args.num_elements, args.hours, ', '.join(args.arrays)))
+    print('element data: {0:.1f} MB float64, {1:.1f} MB float32 ({2:.0f}%)'
+          .format(nbytes64 / 1e6, nbytes32 / 1e6,
+                  100.0 * nbytes32 / nbytes64))
+
+    print('largest difference in positions: {0:.3g} degrees'
+          .format(np.abs(pos32 - pos64).max()))
+
+    for key, val in sorted(balance64.items()):
+        if isinstance(val, float) and val != 0.0:
+            print('  {0:20s} {1:14.6g} {2:11.3g} relative difference'
+                  .format(key, val, abs(balance32[key] - val) / abs(val)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
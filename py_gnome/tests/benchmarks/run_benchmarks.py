@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+
+"""
+Runs the benchmarks in benchmarks.py, and keeps the results so the
+timings of different commits can be compared.
+
+The results of each run are saved in results/<commit>.json, and compared
+with the results of the closest earlier commit (in git log) that has been
+run on this machine:
+
+    python run_benchmarks.py
+
+only run the cases whose names match a regular expression:
+
+    python run_benchmarks.py -b "ModelStep|Weatherers"
+
+compare two commits that have already been run:
+
+    python run_benchmarks.py --compare 1a2b3c4 5d6e7f8
+
+Cases that are slower than the old ones by more than --factor (default 1.2)
+are flagged, and the exit status is 1.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import itertools
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'results')
+
+# each sample is at least this long -- the function is called as many
+# times as it needs
+min_sample_time = 0.05
+
+
+def git(*args):
+    return subprocess.check_output(('git',) + args,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)),
+                                   universal_newlines=True).strip()
+
+
+def current_commit():
+    commit = git('rev-parse', '--short', 'HEAD')
+
+    if git('status', '--porcelain', '--untracked-files=no'):
+        commit += '-dirty'
+
+    return commit
+
+
+def machine_info():
+    return {'machine': platform.machine(),
+            'node': platform.node(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__}
+
+
+def param_sets(klass):
+    '''
+    all the combinations of the params of a benchmark class
+    '''
+    params = getattr(klass, 'params', None)
+    if params is None:
+        return [()]
+
+    names = getattr(klass, 'param_names', ())
+    if len(names) <= 1 and not isinstance(params[0], (list, tuple)):
+        # a single parameter
+        params = [params]
+
+    return list(itertools.product(*params))
+
+
+def case_name(klass, method_name, param_set):
+    names = getattr(klass, 'param_names', ())
+    args = ', '.join('{0}={1}'.format(n, v) for n, v in zip(names, param_set))
+
+    return '{0}.{1}({2})'.format(klass.__name__, method_name, args)
+
+
+def benchmark_cases(module, pattern=None):
+    '''
+    (name, class, method name, params) of all the cases in module
+    '''
+    cases = []
+    for _name, klass in inspect.getmembers(module, inspect.isclass):
+        if klass.__module__ != module.__name__:
+            continue
+
+        methods = sorted(m for m in dir(klass) if m.startswith('time_'))
+        for method_name in methods:
+            for param_set in param_sets(klass):
+                name = case_name(klass, method_name, param_set)
+
+                if pattern is None or re.search(pattern, name):
+                    cases.append((name, klass, method_name, param_set))
+
+    return cases
+
+
+def time_case(klass, method_name, param_set, repeat):
+    '''
+    time one case
+
+    :returns: dict of the results -- seconds per call
+    '''
+    bench = klass()
+
+    if hasattr(bench, 'setup'):
+        bench.setup(*param_set)
+
+    try:
+        func = getattr(bench, method_name)
+
+        # the first call is a warm up -- and tells us how many calls make
+        # a sample
+        start = time.perf_counter()
+        func(*param_set)
+        first = time.perf_counter() - start
+
+        number = getattr(bench, 'number',
+                         max(1, int(min_sample_time / max(first, 1e-9))))
+
+        samples = []
+        for _i in range(repeat):
+            start = time.perf_counter()
+            for _j in range(number):
+                func(*param_set)
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if hasattr(bench, 'teardown'):
+            bench.teardown(*param_set)
+
+    return {'min': min(samples),
+            'median': float(np.median(samples)),
+            'number': number,
+            'samples': samples}
+
+
+def results_file(commit):
+    return os.path.join(results_dir, commit + '.json')
+
+
+def load_results(commit):
+    with open(results_file(commit)) as infile:
+        return json.load(infile)
+
+
+def save_results(results):
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+
+    with open(results_file(results['commit']), 'w') as outfile:
+        json.dump(results, outfile, indent=2, sort_keys=True)
+
+
+def previous_commit(commit):
+    '''
+    the closest earlier commit that has results saved
+    '''
+    for old in git('log', '--format=%h', '-n', '200').split():
+        if old != commit and os.path.exists(results_file(old)):
+            return old
+
+    return None
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{0:.3f} {1}'.format(seconds / scale, unit)
+
+    return '{0:.3f} ns'.format(seconds / 1e-9)
+
+
+def compare(old, new, factor):
+    '''
+    print a table comparing the min times of two sets of results
+
+    :returns: list of the names of the cases that are slower by more than
+              factor
+    '''
+    print('\ncomparing {0} (old) with {1} (new)\n'.format(old['commit'],
+                                                          new['commit']))
+
+    if old['machine'] != new['machine']:
+        print('WARNING: the results are from different machines\n')
+
+    regressions = []
+    for name in sorted(new['results']):
+        new_time = new['results'][name]['min']
+
+        if name not in old['results']:
+            print('{0:>12} {1:>12} {2:>8}  {3}'.format('', format_time(new_time),
+                                                      '', name))
+            continue
+
+        old_time = old['results'][name]['min']
+        ratio = new_time / old_time
+
+        if ratio > factor:
+            flag = '+'
+            regressions.append(name)
+        elif ratio < 1.0 / factor:
+            flag = '-'
+        else:
+            flag = ' '
+
+        print('{0:>12} {1:>12} {2:>7.2f}{3}  {4}'.format(format_time(old_time),
+                                                        format_time(new_time),
+                                                        ratio, flag, name))
+
+    if regressions:
+        print('\n{0} case(s) slower by more than a factor of {1}'
+              .format(len(regressions), factor))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-b', '--bench', default=None,
+                        help='only run the cases that match this regex')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='number of samples of each case')
+    parser.add_argument('--factor', type=float, default=1.2,
+                        help='slow down that is flagged as a regression')
+    parser.add_argument('--no-save', action='store_true',
+                        help="don't save the results")
+    parser.add_argument('--compare', nargs='+', metavar='COMMIT',
+                        help='compare saved results instead of running: '
+                             'OLD [NEW]. NEW defaults to the current commit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        old = load_results(args.compare[0])
+        new = load_results(args.compare[1] if len(args.compare) > 1
+                           else current_commit())
+
+        return 1 if compare(old, new, args.factor) else 0
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import benchmarks
+
+    commit = current_commit()
+    results = {'commit': commit,
+               'date': datetime.now().isoformat(),
+               'machine': machine_info(),
+               'results': {}}
+
+    for name, klass, method_name, param_set in benchmark_cases(benchmarks,
+                                                               args.bench):
+        result = time_case(klass, method_name, param_set, args.repeat)
+        results['results'][name] = result
+
+        print('{0:>12}  {1}'.format(format_time(result['min']), name))
+        sys.stdout.flush()
+
+    if not args.no_save:
+        save_results(results)
+
+    old_commit = previous_commit(commit)
+    if old_commit is not None:
+        return 1 if compare(load_results(old_commit), results,
+                            args.factor) else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
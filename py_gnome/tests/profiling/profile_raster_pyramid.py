@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+"""
+benchmark for building the multi-resolution land rasters of a RasterMap
+
+compares the vectorized gnome.maps.map.coarsen_raster with the python
+loop that it replaced, on the BNA maps that come with the tests.
+
+run from this dir:
+
+    python profile_raster_pyramid.py
+"""
+
+import os
+import math
+import time
+
+import numpy as np
+
+from gnome.maps import MapFromBNA
+from gnome.maps.map import coarsen_raster
+
+sample_data = os.path.join(os.path.dirname(__file__),
+                           '..', 'unit_tests', 'sample_data')
+
+map_files = ['florida_with_lake_small.bna',
+             'MapBounds_2Spillable2Islands2Lakes.bna',
+             'MapBounds_Island.bna']
+
+raster_size = 4096 * 4096
+
+
+def loop_coarsen_raster(raster, ratio):
+    """
+    the original python loop version
+    """
+    base_w, base_h = raster.shape
+    layer = np.zeros((int(math.ceil(float(base_w) / ratio)),
+                      int(math.ceil(float(base_h) / ratio))),
+                     dtype=np.uint8, order='C')
+
+    for j in range(0, layer.shape[1]):
+        for i in range(0, layer.shape[0]):
+            layer[i, j] = np.any(raster[i * ratio:(i + 1) * ratio,
+                                        j * ratio:(j + 1) * ratio])
+    return layer
+
+
+def time_it(func, raster, ratios):
+    start = time.perf_counter()
+    layers = [func(raster, r) for r in ratios[:-1]]
+    return time.perf_counter() - start, layers
+
+
+if __name__ == '__main__':
+    for filename in map_files:
+        gmap = MapFromBNA(os.path.join(sample_data, filename),
+                          raster_size=raster_size)
+        raster = gmap.raster
+        ratios = gmap.ratios
+
+        loop_time, loop_layers = time_it(loop_coarsen_raster, raster, ratios)
+        vec_time, vec_layers = time_it(coarsen_raster, raster, ratios)
+
+        assert all(np.array_equal(a, b)
+                   for a, b in zip(loop_layers, vec_layers))
+
+        print('{0}: raster {1}, ratios {2}'.format(filename, raster.shape,
+                                                   tuple(ratios)))
+        print('    loop:       {0:.4f} s'.format(loop_time))
+        print('    vectorized: {0:.4f} s  ({1:.0f}x faster)'
+              .format(vec_time, loop_time / vec_time))
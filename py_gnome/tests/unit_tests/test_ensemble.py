@@ -0,0 +1,114 @@
+"""
+tests for the ensemble runner
+"""
+
+import numpy as np
+
+import pytest
+
+from gnome.weatherers import Evaporation
+from gnome.ensemble import (EnsembleRunner, set_attributes,
+                            _BlockWriter, _read_shared)
+
+from .conftest import sample_model_weathering, test_oil
+
+
+@pytest.fixture(scope='function')
+def model(sample_model_fcn):
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.weatherers += Evaporation()
+
+    return model
+
+
+def test_set_attributes(model):
+    set_attributes(model, {'spills.0.amount': 200.0,
+                           'environment.1.temperature': 280.0,
+                           'time_step': 600})
+
+    assert model.spills[0].amount == 200.0
+    assert model.environment[1].temperature == 280.0
+    assert model.time_step == 600
+
+
+@pytest.mark.slow
+def test_run(model):
+    members = [{'spills.0.amount': 100.0},
+               {'spills.0.amount': 200.0},
+               {'spills.0.amount': 100.0}]
+
+    with EnsembleRunner(model, workers=2,
+                        array_names=('positions', 'mass', 'id')) as runner:
+        results = runner.run(members)
+
+        # the pool is reused
+        assert runner.run(members[:1])[0].params == members[0]
+
+    # run the first member here to compare
+    expected = {'mass': [], 'positions': [], 'evaporated': []}
+    for _output in model:
+        sc = model.spills.items()[0]
+
+        expected['mass'].append(sc['mass'].copy())
+        expected['positions'].append(sc['positions'].copy())
+        expected['evaporated'].append(sc.mass_balance['evaporated'])
+
+    for member, result in zip(members, results):
+        assert result.params == member
+        assert len(result) == model.num_time_steps
+        assert result.particle_count.sum() == len(result.arrays['id'])
+
+    for result in (results[0], results[2]):
+        for ix in range(len(result)):
+            step = result.step(ix)
+
+            assert np.array_equal(step['mass'], expected['mass'][ix])
+            assert np.array_equal(step['positions'],
+                                  expected['positions'][ix])
+
+        assert np.array_equal(result.mass_balance['evaporated'],
+                              expected['evaporated'])
+
+    assert results[1].arrays['mass'].sum() > results[0].arrays['mass'].sum()
+    assert results[0].uncertain is None
+
+
+@pytest.mark.slow
+def test_run_uncertain(model):
+    with EnsembleRunner(model, workers=1,
+                        array_names=('positions', 'mass')) as runner:
+        result = runner.run([{'uncertain': True}])[0]
+
+    assert result.uncertain is not None
+    assert len(result.uncertain) == len(result)
+    assert (result.uncertain.particle_count.sum() ==
+            len(result.uncertain.arrays['mass']))
+    assert 'evaporated' in result.uncertain.mass_balance
+
+
+def test_shared_blocks():
+    """
+    the steps are written to a new block each time block_size bytes have
+    been collected, and read back as one array
+    """
+    writer = _BlockWriter(block_size=1000)
+
+    expected = []
+    for ix in range(20):
+        positions = np.random.random((ix * 3, 3))
+        expected.append(positions)
+
+        writer.append({'positions': positions,
+                       'particle_count': np.array([len(positions)])})
+
+    writer.append({'mass_balance/evaporated': np.arange(20.0)})
+    writer.flush()
+
+    assert len(writer.blocks) > 1
+
+    arrays = _read_shared(writer.blocks)
+
+    assert np.array_equal(arrays['positions'], np.concatenate(expected))
+    assert np.array_equal(arrays['particle_count'],
+                          [len(p) for p in expected])
+    assert np.array_equal(arrays['mass_balance/evaporated'], np.arange(20.0))
@@ -1,5 +1,6 @@
 
 import os
+import functools
 import datetime as dt
 
 import pytest
@@ -471,6 +472,94 @@ class TestGridVectorProp(object):
     #     assert np.all(np.isclose(gvp.at(points, time)[:, 1],
     #                           np.cos(points[:, 0] / 2) / 2).T)
 
+    def test_at_cell_memo(self, tmpdir, monkeypatch):
+        """
+        the cells and alphas are memoized on the points only, so they are
+        reused by queries at the same points at other times -- and the
+        values are still those of the time asked for
+        """
+        from gnome.environment import GridCurrent
+        from .gen_analytical_datasets import gen_vortex_3D
+
+        # the vortex current changes with time
+        filename = str(tmpdir.join('vortex.nc'))
+        gen_vortex_3D(filename=filename)
+
+        def vortex():
+            return GridCurrent.from_netCDF(filename=filename,
+                                           varnames=['tvx', 'tvy'],
+                                           grid_topology={'node_lon': 'x',
+                                                          'node_lat': 'y'})
+
+        points = np.array([[-10.0, -10.0, 0.0],
+                           [5.5, 2.0, 0.0],
+                           [20.0, -3.3, 0.0]])
+        # between the time slices, so both slices are interpolated
+        times = [dt.datetime(2001, 1, 1, 0, 30),
+                 dt.datetime(2001, 1, 1, 2, 30)]
+
+        # each from a new object, so nothing is memoized across times
+        expected = [vortex().at(points, t, memoize=False) for t in times]
+        assert not np.allclose(expected[0], expected[1])
+
+        gc = vortex()
+
+        hashes = []
+        interpolate = type(gc.grid).interpolate_var_to_points
+
+        # wrapped, so the grid is still seen to take _hash and _memo
+        @functools.wraps(interpolate)
+        def recording_interpolate(grid, *args, **kwargs):
+            hashes.append(kwargs['_hash'])
+            return interpolate(grid, *args, **kwargs)
+
+        monkeypatch.setattr(type(gc.grid), 'interpolate_var_to_points',
+                            recording_interpolate)
+
+        values = [gc.at(points, t) for t in times]
+
+        # u and v, two time slices, two times
+        assert len(hashes) >= 8
+        assert len(set(hashes)) == 1
+
+        for value, exp in zip(values, expected):
+            assert np.allclose(value, exp)
+
+        gc.at(points + 0.1, times[0])
+        assert len(set(hashes)) == 2
+
+    def test_at_no_cell_memo(self, tmpdir, monkeypatch):
+        """
+        gridded's own interpolation is used if the grid can't memoize on the
+        _hash it is given
+        """
+        from gnome.environment import GridCurrent
+        from gnome.environment import gridded_objects_base
+        from .gen_analytical_datasets import gen_vortex_3D
+
+        filename = str(tmpdir.join('vortex.nc'))
+        gen_vortex_3D(filename=filename)
+
+        def vortex():
+            return GridCurrent.from_netCDF(filename=filename,
+                                           varnames=['tvx', 'tvy'],
+                                           grid_topology={'node_lon': 'x',
+                                                          'node_lat': 'y'})
+
+        points = np.array([[-10.0, -10.0, 0.0],
+                           [5.5, 2.0, 0.0],
+                           [20.0, -3.3, 0.0]])
+        time = dt.datetime(2001, 1, 1, 0, 30)
+
+        gc = vortex()
+        assert gridded_objects_base._grid_memo_supported(gc.grid)
+        expected = gc.at(points, time)
+
+        monkeypatch.setitem(gridded_objects_base._grid_memo_support,
+                            type(gc.grid), False)
+
+        assert np.allclose(vortex().at(points, time), expected)
+
     def test_gen_varnames(self):
         import netCDF4 as nc4
         from gnome.environment import GridCurrent, GridWind, IceVelocity
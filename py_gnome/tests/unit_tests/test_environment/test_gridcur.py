@@ -226,6 +226,49 @@ def test_mover_get_move():
     assert np.array_equal(deltas[2], [0.0, 0.0, 0.0])
 
 
+def test_mover_get_move_in_water_only(monkeypatch):
+    """
+    the current is only computed for the elements in the water
+    """
+    current = gridcur.from_gridcur(filename=test_data_dir / NODE_EXAMPLE)
+    mover = PyCurrentMover(current=current, default_num_method='RK4')
+
+    model_time_datetime = datetime(2020, 7, 14, 12)
+    time_step = gs.minutes(30).total_seconds()
+    positions = np.array([(-88.0, 29.0, 0.0),
+                          (-87.0, 29.5, 0.0),
+                          (-87.5, 29.2, 0.0),
+                          ])
+    in_water = {'positions': positions,
+                'status_codes': np.array([oil_status.in_water] * 3)}
+    expected = mover.get_move(in_water, time_step, model_time_datetime)
+
+    sampled = []
+    current_at = current.at
+
+    def recording_at(points, *args, **kwargs):
+        sampled.append(len(points))
+        return current_at(points, *args, **kwargs)
+
+    monkeypatch.setattr(current, 'at', recording_at)
+
+    sc = {'positions': positions,
+          'status_codes': np.array([oil_status.in_water,
+                                    oil_status.on_land,
+                                    oil_status.in_water])}
+    deltas = mover.get_move(sc, time_step, model_time_datetime)
+
+    # RK4 -- four evaluations, each on the two elements in the water
+    assert sampled == [2, 2, 2, 2]
+
+    assert np.array_equal(deltas[1], [0.0, 0.0, 0.0])
+    assert np.array_equal(deltas[[0, 2]], expected[[0, 2]])
+
+    sc['status_codes'][:] = oil_status.on_land
+    assert np.all(mover.get_move(sc, time_step, model_time_datetime) == 0.0)
+    assert len(sampled) == 4
+
+
 def test_cell_not_supported():
     with pytest.raises(NotImplementedError):
         current = gridcur.from_gridcur(filename=test_data_dir / CELL_EXAMPLE)
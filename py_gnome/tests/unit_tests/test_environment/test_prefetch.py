@@ -0,0 +1,112 @@
+"""
+tests for the time slice prefetcher
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from gnome.model import Model
+from gnome.environment import GridCurrent, Water
+from gnome.environment.prefetch import (TimeSlicePrefetcher,
+                                        PrefetchedData,
+                                        gridded_variables)
+
+from .gen_analytical_datasets import gen_vortex_3D
+
+
+@pytest.fixture(scope='module')
+def current(tmpdir_factory):
+    filename = str(tmpdir_factory.mktemp('prefetch').join('vortex.nc'))
+    gen_vortex_3D(filename=filename)
+
+    return GridCurrent.from_netCDF(filename=filename,
+                                   varnames=['tvx', 'tvy'],
+                                   grid_topology={'node_lon': 'x',
+                                                  'node_lat': 'y'})
+
+
+def test_gridded_variables(current):
+    variables = gridded_variables([Water(), current])
+
+    assert len(variables) == 2
+    assert all(any(v is var for var in current.variables)
+               for v in variables)
+
+
+def test_prefetch(current):
+    start_time = datetime(2001, 1, 1, 0, 0)
+    time_step = 900
+    duration = timedelta(hours=8)
+
+    points = np.array([[-10.0, -10.0, 0.0],
+                       [5.5, 2.0, 0.0],
+                       [20.0, -3.3, 0.0]])
+    times = [start_time + timedelta(seconds=time_step * i)
+             for i in range(int(duration.total_seconds() / time_step) + 1)]
+
+    expected = [current.at(points, t, memoize=False) for t in times]
+
+    prefetcher = TimeSlicePrefetcher(gridded_variables([current]),
+                                     start_time, time_step, duration,
+                                     num_slices=2)
+    assert len(prefetcher.variables) == 2
+    # 8 hours of hourly data
+    assert prefetcher._plans[0] == list(range(9))
+
+    prefetcher.start()
+    try:
+        assert isinstance(current.u.data, PrefetchedData)
+
+        # the background thread reads from its own handle of the file
+        for proxy in prefetcher._proxies:
+            assert proxy.own_data is not None
+            assert proxy.own_data.group() is not proxy._data.group()
+
+        # give the background thread time to read the first slices
+        for _i in range(500):
+            if all(len(p.slices) == 3 for p in prefetcher._proxies):
+                break
+            time.sleep(0.01)
+
+        for t, value in zip(times, expected):
+            assert np.all(current.at(points, t, memoize=False) == value)
+
+            for proxy in prefetcher._proxies:
+                assert len(proxy.slices) <= prefetcher.num_slices + 2
+    finally:
+        prefetcher.stop()
+
+    assert not isinstance(current.u.data, PrefetchedData)
+    assert prefetcher.hits > 0
+    assert prefetcher._datasets == []
+
+
+def test_model_step_error(current, monkeypatch):
+    """
+    the model stops the prefetcher if a step fails
+    """
+    model = Model(start_time=datetime(2001, 1, 1, 0, 0),
+                  time_step=900,
+                  duration=timedelta(hours=8),
+                  prefetch_time_slices=2)
+    model.environment += current
+
+    model.rewind()
+    model.step()
+
+    assert model._prefetcher is not None
+    assert isinstance(current.u.data, PrefetchedData)
+
+    def move_elements():
+        raise RuntimeError('mover failed')
+
+    monkeypatch.setattr(model, 'move_elements', move_elements)
+
+    with pytest.raises(RuntimeError):
+        model.step()
+
+    assert model._prefetcher is None
+    assert not isinstance(current.u.data, PrefetchedData)
@@ -273,6 +273,32 @@ class Test_RasterMap:
         assert rmap._off_raster((-1000, -2000))
         assert rmap._off_raster((1000, 2000))
 
+    @pytest.mark.parametrize('ratio', [1, 2, 3, 5, 16])
+    def test_coarser_rasters(self, ratio):
+        """
+        each cell of the coarse layer is land if any cell in its block is
+        -- including partial blocks on the edges
+        """
+        rmap = RasterMap(refloat_halflife=6,
+                         raster=self.raster,
+                         map_bounds=((-50, -30), (-50, 30),
+                                     (50, 30), (50, -30)),
+                         projection=NoProjection())
+        rmap.ratios = (ratio, 1)
+
+        layer = rmap.layers[0]
+        assert layer.dtype == np.uint8
+        assert layer.flags['C_CONTIGUOUS']
+        assert layer.shape == (-(-self.w // ratio), -(-self.h // ratio))
+
+        for i in range(layer.shape[0]):
+            for j in range(layer.shape[1]):
+                block = self.raster[i * ratio:(i + 1) * ratio,
+                                    j * ratio:(j + 1) * ratio]
+                assert layer[i, j] == np.any(block)
+
+        assert rmap.layers[-1] is rmap.raster
+
     def test_save_as_image(self, dump_folder):
         """
         only tests that it doesn't crash -- you need to look at the
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+"""
+Tests of the on-disk raster cache for maps
+
+Designed to be run with py.test
+"""
+
+import os
+import shutil
+
+import pytest
+import numpy as np
+
+from gnome.maps import MapFromBNA, RasterMap
+from gnome.maps import raster_cache
+from gnome.utilities.file_tools import haz_files
+from gnome.utilities.projections import NoProjection
+from gnome.maps.raster_cache import RasterCache, get_raster_cache
+
+basedir = os.path.dirname(__file__)
+basedir = os.path.split(basedir)[0]
+datadir = os.path.normpath(os.path.join(basedir, "sample_data"))
+testbnamap = os.path.join(datadir, 'MapBounds_Island.bna')
+
+
+def test_no_cache_by_default():
+    assert get_raster_cache() is None
+
+
+def test_default_cache_dir(tmpdir):
+    cache_dir = str(tmpdir.join('raster_cache'))
+    raster_cache.set_default_cache_dir(cache_dir)
+    try:
+        assert get_raster_cache().cache_dir == cache_dir
+        assert os.path.isdir(cache_dir)
+    finally:
+        raster_cache.set_default_cache_dir(None)
+
+
+def test_key_changes(tmpdir):
+    bna = str(tmpdir.join('map.bna'))
+    shutil.copy(testbnamap, bna)
+
+    key = RasterCache.make_key(bna, raster_size=1000, shift_lons=0,
+                               map_bounds=None)
+
+    assert key == RasterCache.make_key(bna, raster_size=1000, shift_lons=0,
+                                       map_bounds=None)
+    assert key != RasterCache.make_key(bna, raster_size=2000, shift_lons=0,
+                                       map_bounds=None)
+    assert key != RasterCache.make_key(bna, raster_size=1000, shift_lons=180,
+                                       map_bounds=None)
+    assert key != RasterCache.make_key(bna, raster_size=1000, shift_lons=0,
+                                       map_bounds=((-10, 10), (10, 10),
+                                                   (10, -10), (-10, -10)))
+
+    # change the file contents
+    with open(bna, 'a') as outfile:
+        outfile.write('\n')
+
+    assert key != RasterCache.make_key(bna, raster_size=1000, shift_lons=0,
+                                       map_bounds=None)
+
+
+def test_load_not_there(tmpdir):
+    assert RasterCache(str(tmpdir)).load('not_a_key') is None
+
+
+def test_raster_map_not_cached(tmpdir):
+    '''
+    a plain RasterMap isn't built from a file, so it isn't cached
+    '''
+    rmap = RasterMap(raster=np.zeros((20, 12), dtype=np.uint8),
+                     projection=NoProjection())
+    rmap.raster_cache_dir = str(tmpdir)
+
+    assert rmap._raster_cache_key() is None
+    assert rmap._load_cached_raster() is None
+
+    rmap._save_cached_raster()
+    assert os.listdir(str(tmpdir)) == []
+
+
+@pytest.mark.parametrize('raster_size', [500 * 500, 2000 * 2000])
+def test_map_from_cache(tmpdir, monkeypatch, raster_size):
+    cache_dir = str(tmpdir)
+
+    map1 = MapFromBNA(testbnamap, raster_size=raster_size,
+                      raster_cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # a cache hit doesn't read the file until the land polygons are needed
+    read_bna = haz_files.ReadBNA
+    num_reads = []
+
+    def counted_read_bna(*args, **kwargs):
+        num_reads.append(1)
+        return read_bna(*args, **kwargs)
+
+    monkeypatch.setattr(haz_files, 'ReadBNA', counted_read_bna)
+
+    map2 = MapFromBNA(testbnamap, raster_size=raster_size,
+                      raster_cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    assert len(num_reads) == 0
+
+    assert np.array_equal(map1.map_bounds, map2.map_bounds)
+    assert len(map1.spillable_area) == len(map2.spillable_area)
+    for poly1, poly2 in zip(map1.spillable_area, map2.spillable_area):
+        assert np.array_equal(poly1, poly2)
+
+    assert len(map1.land_polys) == len(map2.land_polys)
+    assert len(num_reads) == 1
+    for poly1, poly2 in zip(map1.land_polys, map2.land_polys):
+        assert np.array_equal(poly1, poly2)
+        assert poly1.metadata == poly2.metadata
+
+    # this one came from the cache
+    assert isinstance(map2.raster, np.memmap)
+
+    assert np.array_equal(map1.raster, map2.raster)
+    assert map1.projection == map2.projection
+    assert np.array_equal(map1.ratios, map2.ratios)
+    assert len(map1.layers) == len(map2.layers)
+    for layer1, layer2 in zip(map1.layers, map2.layers):
+        assert np.array_equal(layer1, layer2)
+
+    pts = np.array([(-127.2, 48.3, 0.0), (-126.5, 47.5, 0.0)])
+    assert np.array_equal(map1.projection.to_pixel(pts),
+                          map2.projection.to_pixel(pts))
+
+
+def test_raster_size_change_uses_cache(tmpdir):
+    cache_dir = str(tmpdir)
+
+    gmap = MapFromBNA(testbnamap, raster_size=500 * 500,
+                      raster_cache_dir=cache_dir)
+    gmap.raster_size = 600 * 600
+    assert len(os.listdir(cache_dir)) == 2
+
+    ref_map = MapFromBNA(testbnamap, raster_size=600 * 600)
+
+    assert np.array_equal(gmap.raster, ref_map.raster)
+    assert gmap.projection == ref_map.projection
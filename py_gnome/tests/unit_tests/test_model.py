@@ -34,8 +34,11 @@ from gnome.weatherers import (HalfLifeWeatherer,
                               ChemicalDispersion,
                               Burn,
                               Skimmer,
-                              Emulsification)
-from gnome.outputters import Renderer, TrajectoryGeoJsonOutput
+                              Emulsification,
+                              Dissolution,
+                              WeatheringData)
+from gnome.outputters import Outputter, Renderer, TrajectoryGeoJsonOutput
+from gnome.utilities.surface_concentration import compute_surface_concentration
 
 from .conftest import sample_model_weathering, testdata, test_oil
 from gnome.spills.substance import NonWeatheringSubstance
@@ -962,6 +965,189 @@ def test_setup_model_run(model):
     assert not exp_keys.intersection(model.spills.LE_data)
 
 
+def test_step_timing(sample_model_fcn):
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.add_weathering()
+
+    for _step in model:
+        assert 'timing' not in _step
+    assert model.run_timing is None
+
+    model.step_timing = True
+    output = model.full_run()
+
+    for step in output:
+        timing = step['timing']
+
+        assert timing['wall_time'] > 0.0
+        assert 'cache' in timing['calls']['save_timestep']
+        assert 0 <= timing['num_elements']['certain'] <= 10
+
+    assert (output[-1]['timing']['num_elements']['certain'] ==
+            len(model.spills.items()[0]))
+    assert output[-1]['timing']['cache_bytes'] > 0
+
+    # step 0 only releases and outputs -- the others do it all
+    moved = output[-1]['timing']['calls']
+    assert set(moved['get_move']) == {m.name for m in model.movers}
+    assert set(moved['weather_elements']) == {w.name
+                                              for w in model.weatherers}
+    assert model.map.name in moved['beach_elements']
+
+    totals = model.run_timing
+    assert totals['num_steps'] == len(output)
+    assert np.isclose(totals['wall_time'],
+                      sum(step['timing']['wall_time'] for step in output))
+    assert totals['max_num_elements']['certain'] == 10
+
+
+def test_step_timing_same_names(sample_model_fcn):
+    '''
+    movers with the same name are timed separately
+    '''
+    model = sample_model_fcn['model']
+    model.movers += [RandomMover(), RandomMover()]
+    model.step_timing = True
+
+    names = [m.name for m in model.movers if isinstance(m, RandomMover)]
+    assert names[0] == names[1]
+
+    model.full_run()
+
+    times = model.run_timing['calls']['get_move']
+    assert len(times) == len(model.movers)
+    assert names[0] in times
+    assert '{0} ({1})'.format(names[1], model.movers[-1].id) in times
+
+
+def test_float32_arrays(sample_model_fcn):
+    '''
+    storing the oil component arrays as float32 gives about the same mass
+    balance as float64
+    '''
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.add_weathering()
+
+    with raises(ValueError):
+        model.float32_arrays = ['positions']
+
+    mass_balance = []
+    for names in ([], ['mass_components', 'evap_decay_constant']):
+        model.float32_arrays = names
+        model.rewind()
+
+        balance = []
+        for _step in model:
+            balance.append(dict(model.spills.items()[0].mass_balance))
+
+        mass_balance.append(balance)
+
+    sc = model.spills.items()[0]
+    assert sc['mass_components'].dtype == np.float32
+    assert sc['evap_decay_constant'].dtype == np.float32
+    assert sc['mass'].dtype == np.float64
+    assert sc['positions'].dtype == np.float64
+
+    for default, f32 in zip(*mass_balance):
+        for key, val in default.items():
+            if isinstance(val, float):
+                assert np.isclose(val, f32[key], rtol=1e-4)
+
+
+def test_float32_surface_concentration(sample_model_fcn):
+    '''
+    the surface concentration can be stored as float32, and the arrays
+    weathering makes float64 are put back in their backing arrays
+    '''
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.add_weathering()
+    model.outputters += Outputter(surface_conc='kde_fft')
+    model.float32_arrays = ['surface_concentration', 'mass_components']
+
+    for _step in model:
+        pass
+
+    sc = model.spills.items()[0]
+    assert sc['surface_concentration'].dtype == np.float32
+    assert sc['mass'].dtype == np.float64
+    assert sc['mass'].base is sc._bufs['mass']
+
+    compute_surface_concentration(sc, 'kde_fft')
+
+    assert sc['surface_concentration'].dtype == np.float32
+    assert sc['surface_concentration'].base is sc._bufs['surface_concentration']
+    assert np.any(sc['surface_concentration'] > 0)
+
+
+def test_cache_options(sample_model_fcn):
+    '''
+    the element cache options can be set on the model, and are saved
+    '''
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.cache_enabled = True
+    model.cache_copy_on_write = True
+    model.cache_write_queue_depth = 2
+    model.cache_storage = 'columnar'
+
+    assert model._cache.copy_on_write
+    assert model._cache.write_queue_depth == 2
+    assert model._cache.storage == 'columnar'
+
+    with raises(ValueError):
+        model.cache_storage = 'hdf5'
+
+    model.full_run()
+
+    sc = model._cache.load_timestep(model.current_time_step).items()[0]
+    assert not sc['positions'].flags.writeable
+
+    assert Model(cache_copy_on_write=True).cache_copy_on_write
+    assert model.serialize()['cache_copy_on_write'] is True
+
+    assert Model(cache_write_queue_depth=3).cache_write_queue_depth == 3
+    assert model.serialize()['cache_write_queue_depth'] == 2
+
+    assert Model(cache_storage='columnar').cache_storage == 'columnar'
+    assert model.serialize()['cache_storage'] == 'columnar'
+
+
+def test_fuse_weathering(sample_model_fcn):
+    '''
+    fused weathering gives the same mass balance as the default
+    '''
+    model = sample_model_weathering(sample_model_fcn, test_oil)
+    model.add_weathering()
+    model.weatherers += Dissolution()
+    model.weatherers += burn_obj(model.spills[0])
+
+    mass_balance = []
+    for fuse in (False, True):
+        model.fuse_weathering = fuse
+        model.rewind()
+
+        balance = []
+        for _step in model:
+            balance.append(dict(model.spills.items()[0].mass_balance))
+
+        mass_balance.append(balance)
+
+    # the weathering processes and the WeatheringData update are run together
+    fused = [run for run in model._weatherer_runs() if len(run) > 1]
+    assert len(fused) == 1
+    assert ({type(w) for w in fused[0]} ==
+            {Evaporation, NaturalDispersion, Dissolution, Emulsification,
+             WeatheringData})
+
+    assert len(mass_balance[0]) == len(mass_balance[1])
+
+    for default, fused in zip(*mass_balance):
+        assert set(default) == set(fused)
+
+        for key, val in default.items():
+            if isinstance(val, float):
+                assert np.isclose(val, fused[key], rtol=1e-6)
+
+
 def test_contains_object(sample_model_fcn):
     '''
     Test that we can find all contained object types with a model.
@@ -467,6 +467,30 @@ class TestWindMover(object):
 
         self.wm.model_step_is_done()
 
+    def test_accumulate_move(self):
+        """
+        accumulate_move(...) adds the same move as get_move(...) returns,
+        reusing its array of deltas
+        """
+        self.wm.prepare_for_model_step(self.sc, self.time_step,
+                                       self.model_time)
+
+        delta = self.wm.get_move(self.sc, self.time_step, self.model_time)
+        start = self.sc['positions'].copy()
+
+        delta_bufs = []
+        for _ix in range(2):
+            out = start.copy()
+            self.wm.accumulate_move(self.sc, self.time_step,
+                                    self.model_time, out)
+
+            assert np.all(out == start + delta)
+            delta_bufs.append(self.wm._delta_buf)
+
+        assert delta_bufs[0] is delta_bufs[1]
+
+        self.wm.model_step_is_done()
+
     def test_get_move_exceptions(self):
         curr_time = sec_to_date(date_to_sec(self.model_time) + self.time_step)
         tmp_windages = self.sc._data_arrays['windages']
@@ -19,7 +19,7 @@ from gnome.spill_container import SpillContainerPair
 from gnome.weatherers import Evaporation
 from gnome.environment import Water
 from gnome.movers import RandomMover, constant_wind_mover
-from gnome.outputters import NetCDFOutput
+from gnome.outputters import NetCDFOutput, NetCDFTrajectoryReader
 from gnome.model import Model
 from ..conftest import test_oil
 
@@ -730,6 +730,160 @@ def test_surface_concentration_output(model):
             assert not np.all(surface_conc[:] == 0.0)
 
 
+def _read_all_variables(filename):
+    with nc.Dataset(filename) as data:
+        values = {name: var[:] for name, var in data.variables.items()}
+
+        if 'mass_balance' in data.groups:
+            for name, var in data.groups['mass_balance'].variables.items():
+                values['mass_balance/' + name] = var[:]
+
+    return values
+
+
+@pytest.mark.parametrize("write_buffer_size", [1, 2 ** 12, 2 ** 30])
+def test_write_buffer(model, output_filename, write_buffer_size):
+    """
+    files written with the steps buffered are the same as files written a
+    step at a time
+    """
+    o_put = [model.outputters[outputter.id] for outputter in
+             model.outputters if isinstance(outputter, NetCDFOutput)][0]
+
+    name, ext = os.path.splitext(output_filename)
+    b_put = NetCDFOutput(name + '_buffered' + ext,
+                         write_buffer_size=write_buffer_size)
+    model.outputters += b_put
+
+    model.rewind()
+    _run_model(model)
+
+    # all written and closed
+    assert b_put._datasets == {}
+
+    for file_, b_file in ((o_put.filename, b_put.filename),
+                          (o_put._u_filename, b_put._u_filename)):
+        expected = _read_all_variables(file_)
+        values = _read_all_variables(b_file)
+
+        assert set(values) == set(expected)
+        for var_name, val in values.items():
+            assert np.array_equal(val, expected[var_name])
+
+
+def test_write_buffer_rewind(model):
+    """
+    buffered steps are written and the files closed on rewind
+    """
+    o_put = [model.outputters[outputter.id] for outputter in
+             model.outputters if isinstance(outputter, NetCDFOutput)][0]
+    o_put.write_buffer_size = 2 ** 30
+
+    model.rewind()
+    for _i in range(3):
+        model.step()
+
+    assert len(o_put._datasets) > 0
+
+    model.rewind()
+
+    assert o_put._datasets == {}
+    with nc.Dataset(o_put.filename) as data:
+        assert len(data.variables['time']) == 3
+
+
+def test_write_buffer_step_error(model, monkeypatch):
+    """
+    buffered steps are written and the files closed if a step fails
+    """
+    o_put = [model.outputters[outputter.id] for outputter in
+             model.outputters if isinstance(outputter, NetCDFOutput)][0]
+    o_put.write_buffer_size = 2 ** 30
+
+    model.rewind()
+    for _i in range(3):
+        model.step()
+
+    def move_elements():
+        raise RuntimeError('mover failed')
+
+    monkeypatch.setattr(model, 'move_elements', move_elements)
+
+    with pytest.raises(RuntimeError):
+        model.step()
+
+    assert o_put._datasets == {}
+    with nc.Dataset(o_put.filename) as data:
+        assert len(data.variables['time']) == 3
+
+
+def test_write_buffer_size_negative():
+    with pytest.raises(ValueError):
+        NetCDFOutput('junk.nc', write_buffer_size=-1)
+
+    o_put = NetCDFOutput('junk.nc')
+    with pytest.raises(ValueError):
+        o_put.write_buffer_size = -10
+
+    assert o_put.write_buffer_size == 0
+
+
+def test_trajectory_reader(model):
+    """
+    the reader returns the same data as read_data, one step at a time,
+    a slab of steps at a time, and one particle at a time
+    """
+    o_put = [model.outputters[outputter.id] for outputter in
+             model.outputters if isinstance(outputter, NetCDFOutput)][0]
+
+    _run_model(model)
+
+    with NetCDFTrajectoryReader(o_put.filename) as reader:
+        assert len(reader) == model.num_time_steps
+
+        by_step = [reader.read_step(index=ix) for ix in range(len(reader))]
+
+        for ix, (data, mb) in enumerate(by_step):
+            (nc_data, nc_mb) = NetCDFOutput.read_data(o_put.filename,
+                                                      index=ix)
+            assert mb == nc_mb
+            assert set(data) == set(nc_data)
+            for key, val in data.items():
+                assert np.all(val == nc_data[key])
+
+        iterated = list(reader.iter_steps(steps_per_read=3))
+        assert len(iterated) == len(by_step)
+
+        for (data, mb), (s_data, s_mb) in zip(iterated, by_step):
+            assert mb == s_mb
+            assert set(data) == set(s_data)
+            for key, val in data.items():
+                assert np.all(val == s_data[key])
+
+        # the last element released is in the last step only
+        last_id = by_step[-1][0]['id'].max()
+        for particle_id in (0, last_id):
+            traj = reader.trajectory(particle_id)
+
+            assert len(traj['step']) > 0
+            for ix, step in enumerate(traj['step']):
+                data = by_step[step][0]
+                row = np.flatnonzero(data['id'] == particle_id)[0]
+
+                assert traj['id'][ix] == particle_id
+                assert np.all(traj['positions'][ix] == data['positions'][row])
+                assert traj['mass'][ix] == data['mass'][row]
+                assert (traj['current_time_stamp'][ix] ==
+                        data['current_time_stamp'].item())
+
+        assert len(reader.trajectory(last_id + 1)['step']) == 0
+
+
+def test_trajectory_reader_file_not_found():
+    with raises(IOError):
+        NetCDFTrajectoryReader('junk_not_a_file.nc')
+
+
 def _run_model(model):
     'helper function'
     while True:
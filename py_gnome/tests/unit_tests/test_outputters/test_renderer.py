@@ -431,6 +431,39 @@ def test_animation_in_model(output_dir):
 
     model.full_run()
 
+
+def test_render_workers(output_dir):
+    """
+    frames rendered in other processes are the same as the ones rendered
+    in write_output()
+    """
+    files = {}
+    for workers in (0, 2):
+        model = gs.Model(time_step=3600, duration=gs.hours(6))
+        model.movers += gs.RandomMover()
+        model.spills += gs.surface_point_line_spill(
+            num_elements=100,
+            start_position=(0, 0),
+            release_time=model.start_time)
+
+        odir = os.path.join(output_dir, "render_workers_{}".format(workers))
+        model.outputters += Renderer(output_dir=odir,
+                                     image_size=(400, 400),
+                                     viewport=(((-0.02, -0.02),
+                                                (0.02, 0.02))),
+                                     formats=['png', 'gif'],
+                                     render_workers=workers)
+        model.full_run()
+
+        files[workers] = {}
+        for name in sorted(os.listdir(odir)):
+            with open(os.path.join(odir, name), 'rb') as infile:
+                files[workers][name] = infile.read()
+
+    assert len([name for name in files[0]
+                if name.startswith('foreground')]) == 7
+    assert files[0] == files[2]
+
 #    assert False
 
 # # if __name__ == '__main__':
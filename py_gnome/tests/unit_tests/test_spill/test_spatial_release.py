@@ -86,6 +86,31 @@ class TestSpatialRelease(object):
         sr = SpatialRelease(filename=sample_shapefile)
         sr.prepare_for_model_run(900)
 
+    def test_initialize_LEs(self):
+        sr = SpatialRelease(polygons=simplePolys, weights=weights)
+        sr.prepare_for_model_run(900)
+        assert sr._tri_coords.shape == (len(sr._tris), 3, 2)
+        assert np.isclose(sr._cum_weights[-1], 1.0)
+
+        num_old, to_rel = 10, 10000
+        data = {'positions': np.full((num_old + to_rel, 3), -1.0),
+                'mass': np.zeros((num_old + to_rel,)),
+                'init_mass': np.zeros((num_old + to_rel,))}
+
+        sr.initialize_LEs(to_rel, data, sr.release_time, 900)
+
+        # the elements already there are untouched
+        assert np.all(data['positions'][:num_old] == -1.0)
+
+        new_pos = data['positions'][num_old:]
+        assert np.all(new_pos[:, 2] == 0.0)
+
+        # all in the polygons, and split between them by weight
+        in_first = ((new_pos[:, 0] <= 3) & (new_pos[:, 1] <= 3))
+        assert np.all(in_first | (new_pos[:, 0] >= 4) | (new_pos[:, 1] >= 4))
+        assert np.all((new_pos[:, :2] >= 0) & (new_pos[:, :2] <= 5))
+        assert np.isclose(in_first.mean(), 0.75, atol=0.02)
+
     def test_feature_update(self):
         #polygons, weights, and thicknesses can be updated from the web client by passing
         #a new FeatureCollection through the feature attribute.
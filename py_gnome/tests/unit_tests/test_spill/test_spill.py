@@ -1,10 +1,14 @@
 
 from datetime import datetime, timedelta
 
+import numpy as np
+
 from gnome.spills.spill import Spill
 from gnome.spills.substance import NonWeatheringSubstance
 from gnome.spills.release import PointLineRelease
-from gnome.spill_container import SpillContainer
+from gnome.basic_types import oil_status
+from gnome.spill_container import SpillContainer, SpillContainerPairData
+from gnome.utilities.cache import ElementCache
 
 import pytest
 
@@ -93,6 +97,128 @@ class TestSpill:
             else:
                 assert to_rel == 0
 
+    def test_release_grows_arrays(self):
+        '''
+        the data arrays are views of backing arrays that only get
+        reallocated once in a while, and removing elements compacts them
+        '''
+        end_time = self.rel_time + timedelta(hours=50)
+        release = PointLineRelease(self.rel_time,
+                                   self.pos,
+                                   num_per_timestep=10,
+                                   end_release_time=end_time)
+        sp = Spill(release=release, amount=5000)
+        sc = SpillContainer()
+        sc.spills += sp
+        sc.prepare_for_model_run(array_types=sp.array_types)
+        sp.prepare_for_model_run(900)
+
+        buffers = []
+        for ix in range(200):
+            model_time = self.rel_time + timedelta(seconds=900 * ix)
+            sp.release_elements(sc, model_time, 900)
+            sc['positions'][-10:, 0] = ix
+
+            if not any(b is sc._bufs['positions'] for b in buffers):
+                buffers.append(sc._bufs['positions'])
+
+        assert len(sc) == 2000
+        assert len(buffers) < 15
+        assert sc['positions'].base is sc._bufs['positions']
+        assert np.all(sc['positions'][:, 0] == np.repeat(np.arange(200), 10))
+
+        # remove every other element
+        sc['status_codes'][::2] = oil_status.to_be_removed
+        sc.model_step_is_done()
+
+        assert len(sc) == 1000
+        assert sc['positions'].base is buffers[-1]
+        assert np.all(sc['positions'][:, 0] == np.repeat(np.arange(200), 5))
+        assert np.all(sc['status_codes'] != oil_status.to_be_removed)
+
+        # the rows are moved a chunk at a time -- remove some elements
+        # with a chunk smaller than the runs of kept rows
+        sc._compact_chunk = 7
+        sc['positions'][:, 1] = np.arange(1000)
+        remove = (np.arange(1000) % 13 == 5) | (np.arange(1000) < 3)
+        sc['status_codes'][remove] = oil_status.to_be_removed
+        sc.model_step_is_done()
+
+        assert len(sc) == 1000 - remove.sum()
+        assert sc['positions'].base is buffers[-1]
+        assert np.all(sc['positions'][:, 1] == np.flatnonzero(~remove))
+
+    @pytest.mark.parametrize('copy_on_write', [False, True])
+    def test_compact_views(self, copy_on_write):
+        '''
+        removing elements moves the kept rows in place, so an array from
+        sc[name] from before model_step_is_done() is changed by it -- the
+        FateDataView and the cache (and the outputters, which use the
+        cache) don't rely on those arrays
+        '''
+        release = PointLineRelease(self.rel_time, self.pos, num_elements=100)
+        sp = Spill(release=release, amount=5000)
+        sc = SpillContainer()
+        sc.spills += sp
+        sc.prepare_for_model_run(array_types=sp.array_types)
+        sp.prepare_for_model_run(900)
+        sp.release_elements(sc, self.rel_time, 900)
+
+        sc['mass'][:] = np.arange(1.0, 101.0)
+        held = sc['mass']
+        expected = held.copy()
+
+        # all the elements match, so the view holds the SC's own arrays
+        view = sc.itersubstancedata(['mass'], fate_status='all')[0][1]
+        assert view['mass'] is held
+
+        cache = ElementCache(enabled=False, copy_on_write=copy_on_write)
+        cache.save_timestep(0, SpillContainerPairData(sc))
+
+        remove = np.arange(100) % 3 == 0
+        sc['status_codes'][remove] = oil_status.to_be_removed
+        sc.model_step_is_done()
+
+        # the caller's array was changed under it
+        assert held.base is sc['mass'].base
+        assert np.all(held[:len(sc)] == expected[~remove])
+        assert not np.array_equal(held, expected)
+
+        # the view is of the compacted elements
+        view = sc.itersubstancedata(['mass'], fate_status='all')[0][1]
+        assert np.all(view['mass'] == expected[~remove])
+
+        # the cached step is as it was when it was saved
+        cached = cache.load_timestep(0).items()[0]
+        assert np.all(cached['mass'] == expected)
+
+    def test_split_elements(self):
+        release = PointLineRelease(self.rel_time, self.pos, num_elements=10)
+        sp = Spill(release=release, amount=5000)
+        sc = SpillContainer()
+        sc.spills += sp
+        sc.prepare_for_model_run(array_types=sp.array_types)
+        sp.prepare_for_model_run(900)
+        sp.release_elements(sc, self.rel_time, 900)
+
+        mass = sc['mass'].copy()
+        sc['age'][:] = np.arange(10)
+
+        sc.split_elements([7, 2], [3, 2], [(0.2, 0.3, 0.5), (0.5, 0.5)])
+
+        assert len(sc) == 13
+        assert np.all(sc['id'] == [0, 1, 2, 2, 3, 4, 5, 6, 7, 7, 7, 8, 9])
+        assert np.all(sc['age'] == sc['id'])
+        assert np.allclose(sc['mass'][8:11], mass[7] * np.array([.2, .3, .5]))
+        assert np.allclose(sc['mass'][2:4], mass[2] / 2)
+        assert np.isclose(sc['mass'].sum(), mass.sum())
+
+        with pytest.raises(IndexError):
+            sc.split_elements([42], [2])
+
+        with pytest.raises(ValueError):
+            sc.split_elements([1], [2], [(0.2, 0.3)])
+
     def test_amount(self, sp):
         assert sp.amount == 0
         assert sp.release.release_mass == 0
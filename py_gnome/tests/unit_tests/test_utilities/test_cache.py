@@ -358,6 +358,163 @@ def test_rewind():
     c.save_timestep(0, scp)
 
 
+def test_copy_on_write_shared_snapshot():
+    """
+    with copy_on_write, every load shares one read-only snapshot
+    """
+    c = cache.ElementCache(copy_on_write=True)
+
+    sc = sample_sc_release(num_elements=10, start_pos=(3.14, 2.72, 1.2))
+    sc.current_time_stamp = dt
+    scp = SpillContainerPairData(sc)
+
+    pos0 = sc['positions'].copy()
+    c.save_timestep(0, scp)
+
+    # changing the spill container does not change the snapshot
+    sc['positions'] += 1.1
+
+    scp1 = c.load_timestep(0)
+    scp2 = c.load_timestep(0)
+    pos = scp1._spill_container['positions']
+
+    assert np.array_equal(pos, pos0)
+    assert scp1._spill_container.current_time_stamp == dt
+    assert np.shares_memory(pos, scp2._spill_container['positions'])
+    assert not pos.flags.writeable
+
+    with pytest.raises(ValueError):
+        pos += 1.0
+
+    # loading again still gets the timestamp -- it isn't popped from the
+    # snapshot itself
+    assert c.load_timestep(0)._spill_container.current_time_stamp == dt
+
+
+def test_copy_on_write_writable():
+    """
+    asking for writable arrays gets a copy, leaving the snapshot alone
+    """
+    c = cache.ElementCache(copy_on_write=True)
+
+    sc = sample_sc_release(num_elements=10, start_pos=(3.14, 2.72, 1.2))
+    u_sc = sample_sc_release(num_elements=10, start_pos=(4.14, 3.72, 2.2),
+                             uncertain=True)
+    scp = SpillContainerPairData(sc, u_sc)
+
+    pos0 = sc['positions'].copy()
+    u_pos0 = u_sc['positions'].copy()
+    c.save_timestep(0, scp)
+
+    scp1 = c.load_timestep(0, writable=True)
+    pos = scp1._spill_container['positions']
+    assert pos.flags.writeable
+    pos += 1.0
+
+    scp2 = c.load_timestep(0)
+    assert np.array_equal(scp2._spill_container['positions'], pos0)
+    assert np.array_equal(scp2._u_spill_container['positions'], u_pos0)
+
+
+def test_background_write_and_read_back():
+    """
+    write to the disk cache with the background writer, and read back
+    """
+    c = cache.ElementCache(write_queue_depth=2)
+
+    sc = sample_sc_release(num_elements=10, start_pos=(3.14, 2.72, 1.2))
+    sc.current_time_stamp = dt
+    scp = SpillContainerPairData(sc)
+
+    positions = []
+    for step in range(5):
+        positions.append(sc['positions'].copy())
+        c.save_timestep(step, scp)
+        sc['positions'] += 1.1
+
+    c.flush()
+    for step in range(5):
+        assert os.path.isfile(c._make_filename(step))
+
+    # clear the in-memory cache so these have to come from disk
+    c.recent = {}
+    for step, pos in enumerate(positions):
+        scp_ = c.load_timestep(step)
+        assert np.array_equal(scp_._spill_container['positions'], pos)
+
+
+def test_background_write_error():
+    """
+    an error in the background writer is raised on flush()
+    """
+    c = cache.ElementCache(write_queue_depth=2)
+
+    sc = sample_sc_release(num_elements=10, start_pos=(3.14, 2.72, 1.2))
+    scp = SpillContainerPairData(sc)
+
+    # point the cache at a dir that isn't there (private API...)
+    c._cache_dir = os.path.join(c._cache_dir, 'not_a_dir')
+    c.save_timestep(0, scp)
+
+    with pytest.raises(cache.CacheError):
+        c.flush()
+
+    # error has been reported -- doesn't get raised again
+    c.flush()
+
+
+@pytest.mark.parametrize('write_queue_depth', [0, 2])
+def test_columnar_write_and_read_back(write_queue_depth):
+    """
+    columnar storage: one file per array, loaded as memory-mapped slices
+    """
+    c = cache.ElementCache(storage='columnar',
+                           write_queue_depth=write_queue_depth)
+
+    sc = sample_sc_release(num_elements=10, start_pos=(3.14, 2.72, 1.2))
+    u_sc = sample_sc_release(num_elements=10, start_pos=(4.14, 3.72, 2.2),
+                             uncertain=True)
+    sc.current_time_stamp = dt
+    scp = SpillContainerPairData(sc, u_sc)
+
+    positions = []
+    for step in range(5):
+        positions.append(sc['positions'].copy())
+        sc.current_time_stamp = dt + tdelta * step
+        c.save_timestep(step, scp)
+        sc['positions'] += 1.1
+
+    c.flush()
+    assert os.path.isfile(os.path.join(c._cache_dir, 'positions.dat'))
+    assert os.path.isfile(os.path.join(c._cache_dir, 'positions_uncert.dat'))
+
+    # clear the in-memory cache so these have to come from disk
+    c.recent = {}
+    for step, pos in reversed(list(enumerate(positions))):
+        scp_ = c.load_timestep(step)
+        assert np.array_equal(scp_._spill_container['positions'], pos)
+        assert scp_._spill_container.current_time_stamp == dt + tdelta * step
+        assert scp_._u_spill_container is not None
+
+    # the loaded arrays can be changed, like the ones loaded from .npz
+    # files, but the changes don't get into the files
+    scp_ = c.load_timestep(2)
+    scp_._spill_container['positions'] += 1.0
+    assert np.array_equal(scp_._spill_container['positions'],
+                          positions[2] + 1.0)
+    assert np.array_equal(c.load_timestep(2)._spill_container['positions'],
+                          positions[2])
+
+    c.rewind()
+    with pytest.raises(cache.CacheError):
+        c.load_timestep(0)
+
+
+def test_bad_storage():
+    with pytest.raises(ValueError):
+        cache.ElementCache(storage='not_a_format')
+
+
 #    assert False
 
 if __name__ == '__main__':
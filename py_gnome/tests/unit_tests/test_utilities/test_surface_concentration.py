@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+tests for the surface concentration code
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from scipy.stats import gaussian_kde
+
+from gnome.model import Model
+from gnome.movers import RandomMover, WindMover
+from gnome.environment import constant_wind
+from gnome.spills import surface_point_line_spill
+
+from gnome.utilities.surface_concentration import (compute_surface_concentration,
+                                                   surface_conc_kde,
+                                                   surface_conc_kde_fft,
+                                                   binned_kde)
+
+
+def make_sc(num_elements=300, seed=0):
+    '''
+    a dict that looks enough like a spill container -- two spills, spread
+    out over three hours of release
+    '''
+    rng = np.random.default_rng(seed)
+
+    positions = np.zeros((num_elements, 3), dtype=np.float64)
+    positions[:, 0] = -70.0 + rng.normal(0.0, 0.01, num_elements)
+    positions[:, 1] = (42.0 + 0.5 * (positions[:, 0] + 70.0) +
+                       rng.normal(0.0, 0.003, num_elements))
+
+    return {'positions': positions,
+            'mass': rng.uniform(1.0, 2.0, num_elements),
+            'age': rng.integers(0, 3 * 3600, num_elements).astype(np.float64),
+            'spill_num': (np.arange(num_elements) % 2).astype(np.int32),
+            }
+
+
+def test_kde_fft_matches_kde():
+    sc_kde = make_sc()
+    sc_fft = make_sc()
+
+    surface_conc_kde(sc_kde)
+    surface_conc_kde_fft(sc_fft)
+
+    expected = sc_kde['surface_concentration']
+    result = sc_fft['surface_concentration']
+
+    assert np.all(expected > 0)
+    assert np.allclose(result, expected, rtol=0.02, atol=0.0)
+
+
+def script_case_steps():
+    '''
+    the element data at each step of the model in
+    scripts/testing_scripts/script_surface_concentration, without its
+    outputters
+    '''
+    start_time = datetime(2013, 3, 12, 10, 0)
+    model = Model(time_step=60 * 60,
+                  start_time=start_time,
+                  duration=timedelta(days=1),
+                  uncertain=False)
+
+    model.movers += RandomMover(diffusion_coef=100000)
+    model.movers += WindMover(constant_wind(5, 270, 'm/s'))
+
+    model.spills += surface_point_line_spill(num_elements=100,
+                                             amount=10000,
+                                             units='gal',
+                                             start_position=(-70.0, 42, 0.0),
+                                             release_time=start_time,
+                                             end_release_time=(start_time +
+                                                               timedelta(hours=12)))
+
+    for _step in model:
+        sc = model.spills.items()[0]
+        yield {name: sc[name].copy()
+               for name in ('positions', 'mass', 'age', 'spill_num')}
+
+
+def test_kde_fft_matches_kde_script_case():
+    num_checked = 0
+    for data in script_case_steps():
+        sc_kde = {name: arr.copy() for name, arr in data.items()}
+        sc_fft = {name: arr.copy() for name, arr in data.items()}
+
+        surface_conc_kde(sc_kde)
+        surface_conc_kde_fft(sc_fft)
+
+        expected = sc_kde['surface_concentration']
+        result = sc_fft['surface_concentration']
+
+        # no kde for the age bins with too few particles
+        computed = expected > 0
+        assert np.array_equal(computed, result > 0)
+
+        if computed.any():
+            rel = (np.abs(result[computed] - expected[computed]) /
+                   expected[computed])
+            assert np.median(rel) < 0.02
+            assert rel.max() < 0.05
+            num_checked += 1
+
+    assert num_checked > 10
+
+
+def test_binned_kde_diagonal_plume():
+    '''
+    a long, thin plume that isn't lined up with the x or y axis -- the
+    kernel is much narrower across the plume than along x or y
+    '''
+    rng = np.random.default_rng(2)
+    num = 1000
+
+    # 5 km long, 20 m wide, at 45 degrees
+    along = rng.uniform(0.0, 5000.0, num)
+    across = rng.normal(0.0, 20.0, num)
+    xy = np.vstack([along - across, along + across]) / np.sqrt(2.0)
+    weights = rng.uniform(1.0, 2.0, num)
+    weights /= weights.sum()
+
+    expected = gaussian_kde(xy, weights=weights)(xy)
+    result = binned_kde(xy, weights, np.arange(num))
+
+    rel = np.abs(result - expected) / expected
+    assert np.median(rel) < 0.01
+    assert rel.max() < 0.05
+
+
+def test_binned_kde_normal_density():
+    rng = np.random.default_rng(1)
+    xy = rng.normal(0.0, 1000.0, (2, 2000))
+    weights = np.full((2000,), 1.0 / 2000)
+
+    density = binned_kde(xy, weights, np.arange(2000))
+
+    # the mean of the density at the points estimates the integral of
+    # the density squared -- for a normal distribution 1 / (4 pi sigma^2)
+    # (a bit less, as the kernel smooths it out)
+    assert 0.8 < density.mean() * 4 * np.pi * 1000.0 ** 2 < 1.0
+
+
+def test_binned_kde_singular():
+    xy = np.vstack([np.arange(10.0), 2 * np.arange(10.0)])
+
+    with pytest.raises(np.linalg.LinAlgError):
+        binned_kde(xy, None, np.arange(10))
+
+
+@pytest.mark.parametrize('algorithm', ['kde', 'kde_fft'])
+def test_compute_surface_concentration(algorithm):
+    sc = make_sc()
+
+    compute_surface_concentration(sc, algorithm)
+
+    assert sc['surface_concentration'].shape == (300,)
+    assert np.all(sc['surface_concentration'] > 0)
+
+
+def test_compute_surface_concentration_bad_algorithm():
+    with pytest.raises(ValueError):
+        compute_surface_concentration(make_sc(), 'not_an_algorithm')
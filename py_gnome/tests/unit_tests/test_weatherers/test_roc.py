@@ -582,6 +582,30 @@ class TestRocSkim(ROCTests):
         self.model.step()
         self.model.step()
 
+    def test_removal_not_written_back(self, sample_model_fcn2):
+        '''
+        Skim removes mass from its copy of the data, but doesn't write it
+        back to the elements -- the weatherers after it mustn't write it back
+        either, so the elements weather as they do without the Skim
+        '''
+        self.sc, self.model = ROCTests.mk_objs(sample_model_fcn2)
+
+        results = []
+        for skim in (None, Skim.deserialize(TestRocSkim.skim.serialize())):
+            if skim is not None:
+                self.model.weatherers.append(skim)
+
+            self.model.full_run()
+
+            sc = self.model.spills.items()[0]
+            results.append((sc['mass'].sum(),
+                            sc.mass_balance['evaporated'],
+                            sc.mass_balance.get('skimmed', 0.0)))
+
+        assert results[1][2] > 0.0
+        assert np.isclose(results[0][0], results[1][0])
+        assert np.isclose(results[0][1], results[1][1])
+
     def test_serialization(self):
         s = TestRocSkim.skim
 
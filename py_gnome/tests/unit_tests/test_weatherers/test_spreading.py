@@ -16,6 +16,7 @@ import pytest
 from gnome import constants
 from gnome.environment import constant_wind, Water
 from gnome.weatherers import FayGravityViscous, Langmuir
+from gnome.weatherers.spreading import _blobs
 from .test_cleanup import ObjForTests
 
 # scalar inputs - for testing
@@ -203,6 +204,43 @@ class TestFayGravityViscous(object):
         assert np.all(area[:4] == i_area)
         assert np.all(area[4:] < i_area)
 
+    def test_update_area_spills(self):
+        '''
+        updating the blobs of all spills at once, grouped by spill and age,
+        gives the same areas as updating each spill on its own
+        '''
+        spill_num = np.array([0, 1, 0, 1, 0, 1, 2, 2])
+        age = np.array([900, 900, 1800, 900, 900, 1800, 900, 900])
+        bulk_init_volume = np.array([1000., 60., 500., 60., 1000., 30.,
+                                     10., 10.])
+        area = np.array([1000., 200., 800., 200., 1000., 100., 50., 50.])
+
+        expected = area.copy()
+        for s_num in np.unique(spill_num):
+            s_mask = spill_num == s_num
+            expected[s_mask] = self.spread.update_area2(water_viscosity,
+                                                        rel_buoy,
+                                                        bulk_init_volume[s_mask],
+                                                        expected[s_mask],
+                                                        default_ts,
+                                                        age[s_mask])
+
+        blobs = _blobs(spill_num, age)
+        assert len(blobs[1]) == 5
+
+        self.spread.update_area2(water_viscosity,
+                                 rel_buoy,
+                                 bulk_init_volume,
+                                 area,
+                                 default_ts,
+                                 age,
+                                 blobs=blobs)
+
+        assert np.allclose(area, expected)
+        # the elements of each blob share its area
+        assert area[0] == area[4]
+        assert area[1] == area[3]
+
 
 class TestLangmuir(ObjForTests):
     thick = 1e-4
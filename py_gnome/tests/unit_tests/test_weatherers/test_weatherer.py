@@ -4,13 +4,15 @@
 Unit tests for the Weatherer classes
 '''
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import numpy as np
 
 from gnome.utilities.inf_datetime import InfDateTime
 
-from gnome.environment import Water
+from gnome.environment import Water, Waves, constant_wind
+from gnome.spill_container import EnvironmentSamples
+from gnome.basic_types import fate
 from gnome.spills.gnome_oil import GnomeOil
 
 from .conftest import weathering_data_arrays, test_oil
@@ -19,6 +21,7 @@ from gnome.weatherers import (Weatherer,
                               HalfLifeWeatherer,
                               NaturalDispersion,
                               Dissolution,
+                              Evaporation,
                               weatherer_sort)
 
 subs = GnomeOil(test_oil)
@@ -63,5 +66,142 @@ class TestWeatherer(object):
         assert np.allclose(0.5 * orig_mc, sc['mass_components'])
 
 
+class TestEnvironmentSamples(object):
+    def test_get(self):
+        samples = EnvironmentSamples()
+        points = np.zeros((4, 3))
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.ones(4)
+
+        value = samples.get('wind_speed', points, rel_time, compute)
+
+        # same name, time and positions -- not recomputed
+        assert samples.get('wind_speed', points.copy(), rel_time,
+                           compute) is value
+        assert len(calls) == 1
+
+        samples.get('wind_speed', points,
+                    rel_time + timedelta(minutes=15), compute)
+        assert len(calls) == 2
+
+        points[0, 0] = 1.0
+        samples.get('wind_speed', points, rel_time, compute)
+        assert len(calls) == 3
+
+        samples.reset()
+        assert len(samples) == 0
+        samples.get('wind_speed', points, rel_time, compute)
+        assert len(calls) == 4
+
+    def test_wind_sampled_once(self, monkeypatch):
+        '''
+        weatherers and waves using the same wind share the wind speed
+        '''
+        wind = constant_wind(10, 0)
+        water = Water()
+        waves = Waves(wind, water)
+        evap = Evaporation(wind=wind, water=water)
+        diss = Dissolution(waves=waves, wind=wind)
+
+        calls = []
+        wind_at = wind.at
+
+        def at(*args, **kwargs):
+            calls.append(1)
+            return wind_at(*args, **kwargs)
+
+        monkeypatch.setattr(wind, 'at', at)
+
+        samples = EnvironmentSamples()
+        points = np.zeros((5, 3))
+
+        coeff = evap._mass_transport_coeff(points, rel_time, samples)
+        diss.get_wind_speed(points, rel_time, samples=samples)
+        waves.get_value(points, rel_time, samples=samples)
+        waves.get_emulsification_wind(points, rel_time, samples=samples)
+
+        assert len(calls) == 1
+        assert np.allclose(coeff, evap._mass_transport_coeff(points, rel_time))
+        assert np.allclose(waves.get_value(points, rel_time, samples=samples),
+                           waves.get_value(points, rel_time))
+
+
+class TestFateDataView(object):
+    def sample_sc(self):
+        sc = weathering_data_arrays(Weatherer().array_types,
+                                    Water(),
+                                    num_elements=4)[0]
+        sc['fate_status'][:] = fate.surface_weather
+        sc['fate_status'][1] = fate.non_weather
+        sc.reset_fate_dataview()
+
+        return sc
+
+    def test_copies_kept(self):
+        '''
+        the second weatherer gets the same copies, with the changes made by
+        the first one
+        '''
+        sc = self.sample_sc()
+
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        assert len(data['mass']) == 3
+        data['area'][:] = 1.0
+        sc.update_from_fatedataview()
+
+        new_data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        assert new_data['area'] is data['area']
+        assert np.all(sc['area'][[0, 2, 3]] == 1.0)
+        assert sc['area'][1] != 1.0
+
+    def test_direct_access(self):
+        '''
+        arrays changed directly in the SC are copied again
+        '''
+        sc = self.sample_sc()
+
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        sc.update_from_fatedataview()
+
+        sc['area'][:] = 2.0
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        assert np.all(data['area'] == 2.0)
+
+        # changing the fate_status changes the elements in the view
+        sc['fate_status'][1] = fate.surface_weather
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        assert len(data['mass']) == 4
+
+    def test_changes_not_written_back(self):
+        '''
+        changes to a view that isn't passed to update_sc() are not seen, or
+        written back, by the next weatherer
+        '''
+        sc = self.sample_sc()
+        area = sc['area'].copy()
+
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        data['area'][:] = 1.0
+
+        data = sc.itersubstancedata(['mass', 'area'])[0][1]
+        assert np.all(data['area'] == area[[0, 2, 3]])
+        sc.update_from_fatedataview()
+
+        assert np.all(sc['area'] == area)
+
+    def test_zero_mass(self):
+        sc = self.sample_sc()
+
+        data = sc.itersubstancedata(['mass'])[0][1]
+        data['mass'][0] = 0.0
+        sc.update_from_fatedataview()
+
+        data = sc.itersubstancedata(['mass'])[0][1]
+        assert len(data['mass']) == 2
+
+
 def test_sort_order():
     assert weatherer_sort(Dissolution()) > weatherer_sort(NaturalDispersion())